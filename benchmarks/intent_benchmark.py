@@ -0,0 +1,105 @@
+# benchmarks/intent_benchmark.py
+
+"""
+Mede a acurácia e a latência do classificador local de intenções.
+
+Uso:
+    python benchmarks/intent_benchmark.py [--threshold 0.85] [--repeat 200]
+
+Avalia dois conjuntos: os exemplos do prompt de análise de intenção (INTENT_EXAMPLES,
+comparando também os parâmetros extraídos) e frases inéditas, fora do treino do modelo.
+Para cada um, informa a cobertura (fração respondida localmente, sem LLM, no limiar dado),
+a acurácia das respostas locais e o tempo médio por classificação.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)  # os símbolos do sistema são lidos de 'src/'
+
+from src.core.intent_classifier import INTENT_EXAMPLES, IntentClassifier  # noqa: E402
+
+# Frases que não fazem parte do treino, com a intenção esperada
+HELD_OUT = [
+    ("crie uma loja virtual com carrinho de compras", "BUILD"),
+    ("construa um dashboard de vendas em streamlit", "BUILD"),
+    ("faça um conversor de moedas", "BUILD"),
+    ("quero um blog pessoal em flask", "BUILD"),
+    ("desenvolva uma api de agendamentos", "BUILD"),
+    ("um jogo de xadrez no terminal", "BUILD"),
+    ("gere um site institucional para uma padaria", "BUILD"),
+    ("altere o src/core/event_bus.py para registrar os tópicos publicados", "SELF_MODIFY"),
+    ("modifique o SecurityAgent para bloquear o comando wget", "SELF_MODIFY"),
+    ("corrija o tratamento de erro no BackendAgent", "SELF_MODIFY"),
+    ("adicione um timeout configurável no GitAgent", "SELF_MODIFY"),
+    ("refatore o código do orquestrador", "SELF_MODIFY"),
+    ("execute o comando pip list", "RUN"),
+    ("rode o comando python -m pytest", "RUN"),
+    ("execute `ls workspace/output`", "RUN"),
+    ("$ git log --oneline", "RUN"),
+    ("rode os testes do projeto", "RUN"),
+    ("commit com a mensagem \"adiciona login\"", "COMMIT"),
+    ("salve as alterações com a mensagem 'versão estável'", "COMMIT"),
+    ("grave tudo no git com a mensagem 'wip'", "COMMIT"),
+    ("faça commit", "COMMIT"),
+    ("boa noite", "UNKNOWN"),
+    ("quem criou você?", "UNKNOWN"),
+    ("valeu!", "UNKNOWN"),
+]
+
+
+def evaluate(classifier: IntentClassifier, cases: list[tuple[str, str, dict | None]], threshold: float, repeat: int) -> dict:
+    local = correct = params_ok = params_total = 0
+    for text, intent, params in cases:
+        prediction = classifier.classify(text)
+        if prediction.confidence < threshold:
+            continue
+        local += 1
+        if prediction.intent == intent:
+            correct += 1
+            if params is not None:
+                params_total += 1
+                # A descrição é livre; só os parâmetros estruturais precisam coincidir
+                params_ok += all(prediction.params.get(k) == v for k, v in params.items() if k != "description")
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, _, _ in cases:
+            classifier.classify(text)
+    per_call_us = (time.perf_counter() - start) / (repeat * len(cases)) * 1e6
+    return {
+        "casos": len(cases),
+        "cobertura": local / len(cases),
+        "acurácia": correct / local if local else 0.0,
+        "parâmetros": f"{params_ok}/{params_total}" if params_total else "-",
+        "µs": per_call_us,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = IntentClassifier()
+    classifier.symbols()
+    print(f"Treino e índice de símbolos: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    sets = {
+        "exemplos do prompt": [(text, expected["intent"], expected["params"]) for text, expected in INTENT_EXAMPLES],
+        "frases inéditas": [(text, intent, None) for text, intent in HELD_OUT],
+    }
+    print(f"{'conjunto':<20} {'casos':>5} {'cobertura':>10} {'acurácia':>9} {'parâmetros':>11} {'µs/classif.':>12}")
+    for name, cases in sets.items():
+        r = evaluate(classifier, cases, args.threshold, args.repeat)
+        print(f"{name:<20} {r['casos']:>5} {r['cobertura']:>10.0%} {r['acurácia']:>9.0%} {r['parâmetros']:>11} {r['µs']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
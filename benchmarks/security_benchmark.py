@@ -0,0 +1,99 @@
+# benchmarks/security_benchmark.py
+
+"""
+Mede o custo por comando do SecurityAgent conforme o conjunto de regras cresce.
+
+Uso:
+    python benchmarks/security_benchmark.py [--sizes 10,100,500,1000] [--commands 2000]
+
+Para cada tamanho, gera regras sintéticas em três formas: regras para os programas que os
+comandos de exemplo realmente usam (sobrepostas às regras padrão de 'rm', 'git', 'python'...),
+regras curinga ("*", conferidas em todo comando simples) e regras para executáveis fictícios,
+como uma lista de programas proibidos. Compara três cenários: a varredura por substring antiga
+(padrão 'in' comando para cada padrão), o analisador sem cache e o analisador com cache
+(comandos repetidos). Os logs ficam desligados durante a medição.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.agents.security_agent import DEFAULT_RULES, SecurityAgent  # noqa: E402
+
+SAMPLE_COMMANDS = [
+    "pip install -r workspace/output/{n}/requirements.txt",
+    "python workspace/output/{n}/main.py --verbose",
+    "ls -la workspace/output/{n} && cat workspace/output/{n}/README.md",
+    "git status; git diff --stat",
+    "rm -rf workspace/output/{n}/build",
+    "echo \"$(date)\" > workspace/output/{n}/stamp.txt",
+    "env DEBUG=1 nohup python -m http.server 8000",
+]
+
+
+# Programas presentes nos comandos de exemplo: as regras sintéticas caem nas mesmas expressões
+# combinadas que o analisador consulta para esses comandos
+REAL_PROGRAMS = ["rm", "pip", "python", "git", "ls", "cat", "echo", "date"]
+
+
+def synthetic_rules(size: int) -> list[dict]:
+    """Regras padrão + um terço sobrepostas a programas reais, um terço curinga e um terço fictícias."""
+    rules = list(DEFAULT_RULES)
+    for i in range(size - len(rules)):
+        kind = i % 3
+        if kind == 0:
+            program = REAL_PROGRAMS[i % len(REAL_PROGRAMS)]
+            rules.append({"name": f"{program} {i}", "program": program, "args": rf"(?:^| )--opt{i}(?: |$)"})
+        elif kind == 1:
+            rules.append({"name": f"curinga {i}", "program": "*", "args": rf"(?:^| )/srv/area{i}(?:/| |$)"})
+        else:
+            rules.append({"name": f"tool{i}", "program": f"tool{i}", "args": r"(?:^| )--danger(?: |$)"})
+    return rules
+
+
+def legacy_analyze(patterns: list[str], command: str) -> bool:
+    command_lower = command.lower().strip()
+    return any(pattern in command_lower for pattern in patterns)
+
+
+def per_command_us(function, commands: list[str]) -> float:
+    start = time.perf_counter()
+    for command in commands:
+        function(command)
+    return (time.perf_counter() - start) / len(commands) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,500,1000")
+    parser.add_argument("--commands", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    # Comandos perigosos geram avisos por comando: o custo da escrita do log não entra na medição
+    logging.disable(logging.CRITICAL)
+    # Comandos distintos (o cache não ajuda) e comandos repetidos (o cache ajuda)
+    unique = [random.choice(SAMPLE_COMMANDS).format(n=f"proj{i}") for i in range(args.commands)]
+    repeated = [random.choice(SAMPLE_COMMANDS).format(n="proj0") for _ in range(args.commands)]
+
+    print(f"{'regras':>7}  {'substring':>12}  {'analisador':>12}  {'com cache':>12}   (µs por comando)")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rules = synthetic_rules(size)
+        legacy_patterns = [rule["name"] for rule in rules]
+        uncached = SecurityAgent(rules=rules, policy_path=os.devnull + ".inexistente", cache_size=0)
+        cached = SecurityAgent(rules=rules, policy_path=os.devnull + ".inexistente")
+        legacy = per_command_us(lambda c: legacy_analyze(legacy_patterns, c), unique)
+        analyzer = per_command_us(uncached.analyze_command, unique)
+        per_command_us(cached.analyze_command, repeated)  # aquece o cache
+        with_cache = per_command_us(cached.analyze_command, repeated)
+        print(f"{size:>7}  {legacy:>12.1f}  {analyzer:>12.1f}  {with_cache:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/startup_benchmark.py
+
+"""
+Mede o tempo entre 'python main.py' e o primeiro prompt 'Você>' do shell.
+
+Uso:
+    python benchmarks/startup_benchmark.py [--runs 5]
+
+Usa o backend de LLM falso (LLM_BACKEND=fake), então não precisa de rede nem de chave de API.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = "Você>".encode("utf-8")
+
+
+def measure_once() -> float:
+    env = dict(os.environ, LLM_BACKEND="fake", PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=PROJECT_ROOT, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    )
+    output = b""
+    try:
+        while PROMPT not in output:
+            byte = process.stdout.read(1)
+            if not byte:
+                raise RuntimeError(f"main.py terminou antes do prompt. Saída:\n{output.decode('utf-8', 'replace')}")
+            output += byte
+        elapsed = time.perf_counter() - start
+        process.stdin.write(b"exit\n")
+        process.stdin.flush()
+        process.wait(timeout=10)
+        return elapsed
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    timings = [measure_once() for _ in range(args.runs)]
+    print(f"Tempo até o primeiro prompt ({args.runs} execuções):")
+    print(f"  mínimo:  {min(timings) * 1000:.0f} ms")
+    print(f"  mediana: {statistics.median(timings) * 1000:.0f} ms")
+    print(f"  máximo:  {max(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,21 @@
 # src/agents/architect_agent.py
 
+import asyncio
 import os
-import time
 import json
 import re
 from src.core.base_agent import BaseAgent
+from src.core.code_index import get_code_index
+from src.core.history import SUMMARIZE
+from src.core.event_bus import BUG_TICKET, PLAN_ENQUEUED, SHUTDOWN, get_event_bus
+from src.core.llm_client import LLMError
 from src.core.logger import get_logger
+from src.core.plan_queue import get_plan_queue
+from src.core.plan_stream import JSONLinesParser, PlanStream
+from src.core.project_map import get_project_map
+
+# Orçamento (tokens estimados) dos trechos de código existente incluídos no prompt do plano
+CODE_CONTEXT_TOKENS = int(os.environ.get("ARCHITECT_CONTEXT_TOKENS", "1500"))
 
 ARCHITECT_SYSTEM_PROMPT = """
 Você é um Arquiteto de Software Sênior. Sua função é receber uma solicitação e criar um plano de desenvolvimento em JSON.
@@ -36,20 +46,31 @@ O JSON deve ter a seguinte estrutura:
     }
   ]
 }
+As tarefas de codificação independentes são executadas em paralelo. Se uma tarefa precisar que outra termine antes,
+adicione o campo opcional "depends_on" com a lista dos números das tarefas (começando em 1) ou dos 'target_file' dos quais ela depende.
+Tarefas do 'executor' sempre rodam na ordem do plano, depois dos arquivos que seus comandos mencionam.
 Siga as regras do `project_map.md` fornecido no contexto.
 """
 
+STREAMING_FORMAT_INSTRUCTIONS = """
+Para esta resposta, em vez de um único bloco JSON, use o formato JSON Lines: um objeto JSON
+completo por linha, sem quebras de linha dentro dos objetos, sem cercas de código e sem texto extra.
+A primeira linha é o cabeçalho: {"project_id": "...", "description": "..."}
+Cada linha seguinte é uma tarefa do action_plan, na ordem de execução, com os mesmos campos
+("agent", "task", "target_file" ou "command", e opcionalmente "id" e "depends_on").
+As tarefas começam a ser executadas assim que chegam; portanto, liste primeiro os arquivos
+que não dependem de outros e só use "depends_on" para tarefas que já foram listadas.
+"""
+
 class ArchitectAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="Arquiteto",
-            system_prompt=ARCHITECT_SYSTEM_PROMPT
+            system_prompt=ARCHITECT_SYSTEM_PROMPT,
+            history_strategy=SUMMARIZE
         )
         self.logger = get_logger(self.agent_name)
-        self.project_map_path = "workspace/project_map.md"
-        self.plans_queue_dir = "workspace/plans_queue"
         self.bug_dir = "workspace/bugs"
-        os.makedirs(self.plans_queue_dir, exist_ok=True)
         os.makedirs(self.bug_dir, exist_ok=True)
 
     def _save_plan_to_queue(self, plan_json_str: str):
@@ -57,43 +78,114 @@ class ArchitectAgent(BaseAgent):
             if "```" in plan_json_str:
                 plan_json_str = plan_json_str.split('```')[1].replace("json", "").strip()
             
-            json.loads(plan_json_str)
-            
-            timestamp = int(time.time() * 1000)
-            plan_filename = f"plan_{timestamp}.json"
-            plan_path = os.path.join(self.plans_queue_dir, plan_filename)
+            plan = json.loads(plan_json_str)
             
-            with open(plan_path, "w", encoding="utf-8") as f:
-                f.write(plan_json_str)
-            self.logger.info(f"Plano enfileirado com sucesso como '{plan_filename}'.")
+            plan_id = get_plan_queue().put(plan)
+            self.logger.info(f"Plano enfileirado com sucesso como '{plan_id}'.")
+            get_event_bus().publish(PLAN_ENQUEUED, plan_id)
         except (json.JSONDecodeError, IndexError) as e:
             self.logger.error(f"O Arquiteto gerou um JSON inválido: {e}\nJSON Recebido: {plan_json_str}")
             raise Exception("Arquiteto falhou em gerar um plano JSON válido.")
 
-    def create_master_plan(self, user_request: str):
-        self.logger.info(f"Criando plano mestre para: '{user_request[:50]}...'")
-        try:
-            with open(self.project_map_path, 'r', encoding='utf-8') as f:
-                project_map_context = f.read()
-        except FileNotFoundError:
-            project_map_context = "Nenhum mapa de projeto encontrado."
-
-        prompt_with_context = f"""
+    def _plan_prompt(self, user_request: str, streaming: bool = False) -> str:
+        # Snapshot em memória mantido pelo LibrarianAgent; nenhum acesso ao disco aqui
+        project_map_context = get_project_map().render()
+        output_format = STREAMING_FORMAT_INSTRUCTIONS if streaming else "Agora, gere o plano mestre completo em formato JSON para esta solicitação."
+        return f"""
         **Contexto de Arquitetura (Regras a Seguir):**
         ---
         {project_map_context}
         ---
+        {self._code_context(user_request)}
         **Solicitação do Usuário:**
         "{user_request}"
-        Agora, gere o plano mestre completo em formato JSON para esta solicitação.
+        {output_format}
         """
-        master_plan_json_str = self.think(prompt_with_context)
-        if master_plan_json_str and not master_plan_json_str.startswith("Erro:"):
+
+    def _code_context(self, user_request: str) -> str:
+        """
+        Trechos relevantes do código já gerado para os projetos citados na solicitação, para
+        que o plano altere o que existe em vez de recriar o projeto. Vazio para projetos novos.
+        """
+        index = get_code_index()
+        sections = []
+        for project in index.projects_mentioned(user_request):
+            snippets = index.context(user_request, project, token_budget=CODE_CONTEXT_TOKENS)
+            sections += [f"**Código existente no projeto '{project}' (use o mesmo 'project_id' e altere apenas o necessário):**",
+                         index.outline(project)] + ([snippets] if snippets else []) + ["---"]
+        return "\n".join(sections)
+
+    def create_master_plan(self, user_request: str):
+        self.logger.info(f"Criando plano mestre para: '{user_request[:50]}...'")
+        prompt_with_context = self._plan_prompt(user_request)
+        try:
+            master_plan_json_str = self.think(prompt_with_context)
+        except LLMError as e:
+            self.logger.error(f"Falha ao gerar o plano mestre: {e}")
+            raise Exception("Arquiteto falhou em gerar o plano mestre.") from e
+        if master_plan_json_str:
             self._save_plan_to_queue(master_plan_json_str)
         else:
             self.logger.error("Falha ao gerar o plano mestre.")
             raise Exception("Arquiteto falhou em gerar o plano mestre.")
 
+    async def stream_master_plan(self, user_request: str, plan_stream: PlanStream):
+        """
+        Gera o plano mestre em JSON Lines e entrega o cabeçalho e cada tarefa a 'plan_stream'
+        assim que a linha correspondente é recebida do modelo. Se o modelo responder com um
+        único bloco JSON (formato antigo), o plano é entregue inteiro ao final.
+        """
+        self.logger.info(f"Criando plano mestre (streaming) para: '{user_request[:50]}...'")
+        parser = JSONLinesParser()
+        chunks = []
+        try:
+            # O contexto vem dos índices compartilhados com o Bibliotecário: montado fora do event loop
+            prompt = await asyncio.to_thread(self._plan_prompt, user_request, True)
+            async for chunk in self.think_stream(prompt, use_history=True):
+                chunks.append(chunk)
+                for item in parser.feed(chunk):
+                    await self._emit_plan_item(plan_stream, item)
+            for item in parser.close():
+                await self._emit_plan_item(plan_stream, item)
+
+            if plan_stream.header is None:
+                await self._emit_full_plan(plan_stream, "".join(chunks))
+            await plan_stream.finish()
+            self.logger.info(f"Plano '{plan_stream.header.get('project_id')}' recebido com {len(plan_stream.tasks)} tarefa(s).")
+        except LLMError as e:
+            self.logger.error(f"Falha ao gerar o plano mestre: {e}")
+            error = Exception("Arquiteto falhou em gerar o plano mestre.")
+            await plan_stream.finish(error)
+            raise error from e
+        except BaseException as e:
+            await plan_stream.finish(e)
+            raise
+
+    @staticmethod
+    async def _emit_plan_item(plan_stream: PlanStream, item: dict):
+        if "agent" in item:
+            await plan_stream.add_task(item)
+        elif "project_id" in item and plan_stream.header is None:
+            await plan_stream.set_header({key: value for key, value in item.items() if key != "action_plan"})
+            # Um plano completo numa única linha também é aceito
+            for task in item.get("action_plan", []) or []:
+                await plan_stream.add_task(task)
+
+    async def _emit_full_plan(self, plan_stream: PlanStream, text: str):
+        """Alternativa para respostas no formato antigo (um único objeto JSON)."""
+        if "```" in text:
+            text = text.split("```")[1].replace("json", "", 1).strip()
+        try:
+            plan = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.logger.error(f"O Arquiteto gerou um plano inválido no streaming: {e}\nTexto Recebido: {text}")
+            raise Exception("Arquiteto falhou em gerar um plano JSON válido.")
+        if not isinstance(plan, dict) or "project_id" not in plan:
+            raise Exception("Arquiteto falhou em gerar um plano JSON válido.")
+        await plan_stream.set_header({key: value for key, value in plan.items() if key != "action_plan"})
+        for task in plan.get("action_plan", [])[len(plan_stream.tasks):]:
+            await plan_stream.add_task(task)
+
     def create_correction_plan(self, ticket_file: str, bug_description: str):
         self.logger.info(f"Gerando plano de correção para o bug: {ticket_file}")
         correction_plan = None
@@ -121,22 +213,33 @@ class ArchitectAgent(BaseAgent):
         else:
             self.logger.warning(f"Lógica de correção para o bug '{ticket_file}' ainda não implementada.")
 
+    def _process_bug_ticket(self, ticket_file: str):
+        ticket_path = os.path.join(self.bug_dir, ticket_file)
+        if not os.path.exists(ticket_path):
+            return
+        with open(ticket_path, 'r', encoding='utf-8') as f:
+            bug_description = f.read()
+        os.remove(ticket_path)
+        self.create_correction_plan(ticket_file, bug_description)
+
     def run(self, stop_event):
+        """
+        Reage aos tickets de bug publicados pelo Auditor no barramento de eventos.
+        Tickets que já estavam na pasta de bugs são processados ao iniciar.
+        """
         self.logger.info("Arquiteto iniciando ciclo de monitoramento proativo de bugs...")
+        events = get_event_bus().subscribe(BUG_TICKET)
+        pending_tickets = sorted(f for f in os.listdir(self.bug_dir) if f.endswith(".md"))
         while not stop_event.is_set():
             try:
-                tickets = [f for f in os.listdir(self.bug_dir) if f.endswith(".md")]
-                if tickets:
-                    ticket_file = tickets[0]
-                    ticket_path = os.path.join(self.bug_dir, ticket_file)
-                    with open(ticket_path, 'r', encoding='utf-8') as f:
-                        bug_description = f.read()
-                    os.remove(ticket_path)
-                    self.create_correction_plan(ticket_file, bug_description)
+                if pending_tickets:
+                    self._process_bug_ticket(pending_tickets.pop(0))
+                    continue
+                event = events.get()
+                if event.topic == SHUTDOWN:
+                    break
+                self._process_bug_ticket(event.payload)
             except Exception as e:
                 self.logger.error(f"Erro no ciclo de monitoramento de bugs do Arquiteto: {e}", exc_info=True)
-            
-            for _ in range(10):
-                if stop_event.is_set(): break
-                time.sleep(1)
-        self.logger.info("Arquiteto encerrado.")
\ No newline at end of file
+        get_event_bus().unsubscribe(events)
+        self.logger.info("Arquiteto encerrado.")
@@ -1,8 +1,15 @@
 # src/agents/backend_agent.py
 
+import ast
+import asyncio
 import os
+from src.core.async_runtime import run_sync
 from src.core.base_agent import BaseAgent
+from src.core.history import FRESH
+from src.core.code_stream import write_file_atomic
+from src.core.llm_client import LLMError
 from src.core.logger import get_logger
+from src.core.patching import apply_hunks, parse_edits
 
 BACKEND_DEV_SYSTEM_PROMPT = """
 Você é um Desenvolvedor de Software Sênior especialista em Python.
@@ -12,6 +19,9 @@ Siga a instrução da tarefa à risca. Se a tarefa pedir para criar a lógica pa
 Sua resposta deve ser APENAS o bloco de código Python. Não inclua explicações, comentários fora do código ou qualquer outro texto.
 """
 
+# Linhas de linguagem removidas da abertura do bloco de código gerado
+CODE_LANGUAGES = ('python', 'py')
+
 class BackendAgent(BaseAgent):
     """
     Agente desenvolvedor cognitivo. Recebe tarefas do Arquiteto e escreve
@@ -20,20 +30,34 @@ class BackendAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="BackendDev",
-            system_prompt=BACKEND_DEV_SYSTEM_PROMPT
+            system_prompt=BACKEND_DEV_SYSTEM_PROMPT,
+            history_strategy=FRESH
         )
         self.logger = get_logger(self.agent_name)
 
-    def write_code(self, file_path: str, task_description: str):
+    async def write_code_async(self, file_path: str, task_description: str, stream: bool = True, use_cache: bool = True) -> bool:
         """
         Gera o código para uma tarefa específica e o salva no arquivo correspondente.
         """
         self.logger.info(f"Iniciando a tarefa de codificação para o caminho final: '{file_path}'")
         self.logger.debug(f"Descrição da tarefa: {task_description}")
 
-        generated_code = self.think(task_description)
+        if stream:
+            try:
+                bytes_written = await self.stream_code_to_file(file_path, task_description, CODE_LANGUAGES, use_cache)
+                self.logger.info(f"Código para '{file_path}' escrito com sucesso ({bytes_written} bytes, em streaming).")
+                return True
+            except Exception as e:
+                self.logger.error(f"O LLM falhou em gerar o código para a tarefa '{task_description}': {e}", exc_info=True)
+                return False
+
+        try:
+            generated_code = await self.think_async(task_description, use_history=False, use_cache=use_cache)
+        except LLMError as e:
+            self.logger.error(f"O LLM falhou em gerar o código para a tarefa '{task_description}': {e}")
+            return False
 
-        if generated_code and not generated_code.startswith("Erro:"):
+        if generated_code:
             if "```" in generated_code:
                 parts = generated_code.split('```')
                 if len(parts) > 1:
@@ -45,11 +69,7 @@ class BackendAgent(BaseAgent):
                     generated_code = generated_code.strip()
 
             try:
-                parent_dir = os.path.dirname(file_path)
-                os.makedirs(parent_dir, exist_ok=True)
-                
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(generated_code)
+                write_file_atomic(file_path, generated_code)
                 
                 self.logger.info(f"Código para '{file_path}' escrito com sucesso.")
                 return True
@@ -60,6 +80,108 @@ class BackendAgent(BaseAgent):
             self.logger.error(f"O LLM falhou em gerar o código para a tarefa: {task_description}")
             return False
 
+    def write_code(self, file_path: str, task_description: str, stream: bool = True) -> bool:
+        """Versão síncrona de write_code_async."""
+        return run_sync(self.write_code_async(file_path, task_description, stream=stream))
+
+    async def modify_files_async(self, file_paths: str | list[str], description: str, prompt_engineer, max_retries: int = 2) -> dict:
+        """
+        Modifica arquivos existentes em modo patch: o modelo devolve apenas blocos de edição
+        (SEARCH/REPLACE ou diff unificado), aplicados localmente com casamento aproximado de
+        contexto. Os blocos que não casam (ou um arquivo .py que deixa de compilar) voltam ao
+        modelo sozinhos, junto do arquivo já editado, até 'max_retries' vezes por arquivo.
+        Nada é gravado se algum arquivo continuar com falhas; senão, todos são gravados.
+
+        Args:
+            file_paths: Um caminho ou uma lista de caminhos (a forma 'file_path' do SELF_MODIFY).
+            description: A modificação solicitada.
+            prompt_engineer: O PromptEngineerAgent que monta os prompts de patch.
+
+        Returns:
+            {"success": bool, "files": {caminho: {"applied": int, "failed": [motivos]}}}
+        """
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        paths = [os.path.normpath(path) for path in file_paths]
+        originals = {}
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    originals[path] = f.read()
+            except FileNotFoundError:
+                originals[path] = ""
+        self.logger.info(f"Modificando {len(paths)} arquivo(s) em modo patch: {paths}")
+
+        prompt = prompt_engineer.optimize_patch_prompt(originals, description)
+        try:
+            response = await self.think_async(prompt, use_history=False)
+        except LLMError as e:
+            self.logger.error(f"O LLM falhou em gerar as edições para '{description}': {e}")
+            return {"success": False, "files": {}}
+
+        edits = self._edits_by_file(response, paths)
+        results = await asyncio.gather(*(
+            self._patch_file(path, originals[path], edits.get(path, []), description, prompt_engineer, max_retries)
+            for path in paths
+        ))
+        report = {path: {"applied": applied, "failed": failed} for path, (_, applied, failed) in zip(paths, results)}
+        if not any(applied for _, applied, _ in results):
+            self.logger.error("O LLM não propôs nenhuma edição aplicável.")
+            return {"success": False, "files": report}
+        if any(failed for _, _, failed in results):
+            self.logger.error(f"Edições não aplicadas após {max_retries} nova(s) tentativa(s); nenhum arquivo foi alterado: {report}")
+            return {"success": False, "files": report}
+
+        for path, (content, applied, _) in zip(paths, results):
+            if applied and content != originals[path]:
+                write_file_atomic(path, content)
+                self.logger.info(f"Arquivo '{path}' modificado ({applied} edição(ões) aplicada(s)).")
+        return {"success": True, "files": report}
+
+    def modify_files(self, file_paths: str | list[str], description: str, prompt_engineer, max_retries: int = 2) -> dict:
+        """Versão síncrona de modify_files_async."""
+        return run_sync(self.modify_files_async(file_paths, description, prompt_engineer, max_retries))
+
+    def _edits_by_file(self, response: str, paths: list[str]) -> dict:
+        """Agrupa os hunks da resposta pelos arquivos solicitados; edições em outros arquivos são ignoradas."""
+        hunks = {}
+        for edit in parse_edits(response, default_path=paths[0] if len(paths) == 1 else None, known_paths=paths):
+            edit_path = os.path.normpath(edit.path)
+            path = next((p for p in paths if p == edit_path or p.endswith(os.sep + edit_path)), None)
+            if path is None:
+                self.logger.warning(f"Edição para '{edit.path}', que não foi solicitado, ignorada.")
+                continue
+            hunks.setdefault(path, []).extend(edit.hunks)
+        return hunks
+
+    async def _patch_file(self, path: str, content: str, hunks: list, description: str, prompt_engineer, max_retries: int) -> tuple[str, int, list[str]]:
+        """Aplica os hunks a um arquivo e refaz só os que falharam. Retorna (conteúdo, aplicados, falhas)."""
+        applied = 0
+        for attempt in range(max_retries + 1):
+            content, failures = apply_hunks(content, hunks)
+            applied += len(hunks) - len(failures)
+            problems = [f"{reason}:\n{hunk.to_block(path)}" for hunk, reason in failures]
+            if not failures and path.endswith(".py"):
+                try:
+                    ast.parse(content, filename=path)
+                except SyntaxError as e:
+                    problems.append(f"O arquivo resultante não compila: {e.msg} (linha {e.lineno}).")
+            if not problems or attempt == max_retries:
+                return content, applied, problems
+
+            self.logger.warning(f"{len(problems)} problema(s) ao editar '{path}'; pedindo correção (tentativa {attempt + 1}/{max_retries}).")
+            prompt = prompt_engineer.optimize_patch_retry_prompt(path, content, problems, description)
+            try:
+                response = await self.think_async(prompt, use_history=False)
+            except LLMError as e:
+                self.logger.error(f"O LLM falhou em corrigir as edições de '{path}': {e}")
+                return content, applied, problems
+            hunks = self._edits_by_file(response, [path]).get(path, [])
+            if not hunks:
+                self.logger.error(f"O LLM não propôs correções para '{path}'.")
+                return content, applied, problems
+        return content, applied, problems
+
     def run(self, stop_event):
         """O BackendAgent v3.0 é reativo."""
         self.logger.info("BackendDev em modo de espera (reativo).")
@@ -1,15 +1,96 @@
 # src/agents/compiler_agent.py
 
+import ast
+import asyncio
+import hashlib
+import importlib.metadata
+import json
 import os
-import subprocess
+import sys
+import time
+from src.core.async_runtime import run_sync
 from src.core.functional_agent import FunctionalAgent # <-- CORREÇÃO DA IMPORTAÇÃO
 from src.core.logger import get_logger
+from src.core.tracing import get_tracer
 # Precisamos importar o ExecutionAgent para usá-lo
-from src.agents.execution_agent import ExecutionAgent 
+from src.agents.execution_agent import ExecutionAgent
+
+OUTPUT_DIR = "workspace/output"
+DIST_DIR = "workspace/dist"
+BUILD_DIR = "workspace/build"
+# Opções fixas de empacotamento; fazem parte da impressão digital
+PYINSTALLER_OPTIONS = ("--onefile", "--noconsole", "--noconfirm")
+
+
+def local_modules(script_path: str) -> list[str]:
+    """
+    Módulos locais importados (direta ou indiretamente) pelo script: arquivos .py resolvidos
+    a partir do diretório do script, incluindo os __init__.py dos pacotes atravessados.
+    """
+    base_dir = os.path.dirname(os.path.abspath(script_path))
+    seen = set()
+    pending = [os.path.abspath(script_path)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [(alias.name, base_dir) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                origin = base_dir
+                if node.level:
+                    origin = path
+                    for _ in range(node.level):
+                        origin = os.path.dirname(origin)
+                module = node.module or ""
+                # 'from pacote import modulo' também pode importar um submódulo
+                names = [(module, origin)] + [(f"{module}.{alias.name}".lstrip("."), origin) for alias in node.names]
+            else:
+                continue
+            for name, origin in names:
+                pending.extend(_resolve_module(name, origin))
+    return sorted(seen)
+
+
+def _resolve_module(name: str, origin: str) -> list[str]:
+    """Arquivos locais de 'a.b.c' a partir de 'origin' (pacotes intermediários inclusos)."""
+    files = []
+    current = origin
+    for part in [p for p in name.split(".") if p]:
+        package_init = os.path.join(current, part, "__init__.py")
+        module_file = os.path.join(current, f"{part}.py")
+        if os.path.isfile(package_init):
+            files.append(package_init)
+            current = os.path.join(current, part)
+        elif os.path.isfile(module_file):
+            files.append(module_file)
+            break
+        else:
+            break
+    return files
+
 
 class CompilerAgent(FunctionalAgent):
     """
     Agente funcional que empacota scripts Python em executáveis usando PyInstaller.
+
+    Cada compilação tem uma impressão digital (script, módulos locais importados, opções,
+    interpretador e pacotes instalados). Se ela coincide com a do executável já presente
+    em workspace/dist, a compilação é pulada. Cada projeto tem seu diretório de trabalho
+    em workspace/build/<projeto>/<script>, reaproveitado pelo PyInstaller entre compilações,
+    e seus executáveis em workspace/dist/<projeto>, o que permite compilar vários projetos
+    em paralelo (compile_many).
+
+    As dependências de um projeto com ambiente próprio (ver EnvironmentCache) não estão no
+    interpretador global: o site-packages do ambiente é passado ao PyInstaller ('--paths') e
+    as versões resolvidas do ambiente entram na impressão digital.
     """
     def __init__(self):
         super().__init__(agent_name="Compiler")
@@ -20,52 +101,192 @@ class CompilerAgent(FunctionalAgent):
         # Por enquanto, vamos simplificar e usar o ExecutionAgent diretamente.
         # NOTA: Uma arquitetura melhor seria passar o executor como dependência.
         # Vamos criar uma instância simples por enquanto.
-        self.executor = ExecutionAgent() 
-        self._check_pyinstaller()
+        self.executor = ExecutionAgent()
+        # A verificação do PyInstaller é feita só na primeira compilação
+        self._pyinstaller_version = None
+        self._pyinstaller_lock = None
+        self._environment_digest = None
+        self._build_locks: dict[str, asyncio.Lock] = {}
 
-    def _check_pyinstaller(self):
-        """Verifica se o PyInstaller está instalado e, se não, instala."""
-        self.logger.debug("Verificando instalação do PyInstaller...")
-        try:
-            subprocess.run(["pip", "show", "pyinstaller"], check=True, capture_output=True)
-            self.logger.debug("PyInstaller já está instalado.")
-        except subprocess.CalledProcessError:
-            self.logger.info("PyInstaller não encontrado. Instalando...")
-            print("[USER] Dependência necessária (pyinstaller) não encontrada. Instalando...")
-            self.executor.run("pip install pyinstaller")
-
-    def run(self, script_path: str):
+    async def _check_pyinstaller(self) -> str | None:
+        """Verifica se o PyInstaller está instalado e, se não, instala. Retorna a versão."""
+        if self._pyinstaller_lock is None:
+            self._pyinstaller_lock = asyncio.Lock()
+        async with self._pyinstaller_lock:
+            if self._pyinstaller_version is not None:
+                return self._pyinstaller_version
+            self.logger.debug("Verificando instalação do PyInstaller...")
+            try:
+                self._pyinstaller_version = importlib.metadata.version("pyinstaller")
+                self.logger.debug("PyInstaller já está instalado.")
+            except importlib.metadata.PackageNotFoundError:
+                self.logger.info("PyInstaller não encontrado. Instalando...")
+                print("[USER] Dependência necessária (pyinstaller) não encontrada. Instalando...")
+                result = await self.executor.run_async("pip install pyinstaller")
+                if result.get("success"):
+                    importlib.invalidate_caches()
+                    self._pyinstaller_version = importlib.metadata.version("pyinstaller")
+                    self._environment_digest = None
+            return self._pyinstaller_version
+
+    @staticmethod
+    def _site_signature() -> tuple:
+        """
+        mtime dos diretórios do sys.path: instalar, atualizar ou remover um pacote cria ou
+        apaga o seu diretório .dist-info e altera o mtime do site-packages.
+        """
+        signature = []
+        for path in sys.path:
+            try:
+                signature.append((path, os.stat(path or ".").st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(signature)
+
+    def _environment(self) -> str:
+        """
+        Resumo do interpretador e dos pacotes instalados. É recalculado sempre que o
+        site-packages muda (ver _site_signature), inclusive por um 'pip install' durante a sessão.
+        """
+        signature = self._site_signature()
+        cached = self._environment_digest
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        packages = sorted(f"{dist.metadata['Name']}=={dist.version}".lower() for dist in importlib.metadata.distributions())
+        payload = "\n".join([sys.executable, sys.version, sys.platform, *packages])
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        self._environment_digest = (signature, digest)
+        return digest
+
+    def fingerprint(self, script_path: str, pyinstaller_version: str, env_dir: str | None = None) -> dict:
+        """Impressão digital de uma compilação: hash de cada entrada e o hash combinado."""
+        base_dir = os.path.dirname(os.path.abspath(script_path))
+        sources = {}
+        for path in local_modules(script_path):
+            with open(path, "rb") as f:
+                sources[os.path.relpath(path, base_dir).replace(os.sep, "/")] = hashlib.sha256(f.read()).hexdigest()
+        inputs = {
+            "sources": sources,
+            "options": list(PYINSTALLER_OPTIONS),
+            "pyinstaller": pyinstaller_version,
+            "environment": self._environment(),
+        }
+        if env_dir:
+            marker = self.executor.env_cache.marker(env_dir) or {}
+            inputs["project_environment"] = marker.get("resolved", [])
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+        return {"digest": digest, **inputs}
+
+    @staticmethod
+    def _project_of(script_path: str) -> str | None:
+        """Projeto em workspace/output que contém o script, se houver."""
+        relative = os.path.relpath(os.path.abspath(script_path), os.path.abspath(OUTPUT_DIR))
+        parts = relative.split(os.sep)
+        return parts[0] if parts[0] != ".." and len(parts) > 1 else None
+
+    def run(self, script_path: str, force: bool = False) -> dict:
         """
         Executa o PyInstaller para compilar o script fornecido.
 
         Args:
             script_path: O caminho para o script Python principal (ex: workspace/hello.py)
+            force: Se True, compila mesmo que o executável esteja atualizado.
+        """
+        return run_sync(self.run_async(script_path, force=force))
+
+    def compile_many(self, script_paths: list[str], force: bool = False) -> list[dict]:
+        """Compila vários scripts em paralelo, cada um no seu diretório de trabalho."""
+        async def compile_all():
+            return await asyncio.gather(*(self.run_async(path, force=force) for path in script_paths))
+        return run_sync(compile_all())
+
+    async def run_async(self, script_path: str, force: bool = False) -> dict:
+        """
+        Compila o script, a menos que o executável em workspace/dist já corresponda à
+        impressão digital atual.
+
+        Returns:
+            Um dicionário com 'success', 'skipped', 'artifact' e 'timings' (segundos por fase).
         """
         if not os.path.exists(script_path):
             print(f"[USER] ❌ Erro de Compilação: Arquivo não encontrado em '{script_path}'")
             self.logger.error(f"Arquivo para compilação não encontrado: {script_path}")
-            return
+            return {"success": False, "skipped": False, "artifact": None, "timings": {}}
 
         script_name = os.path.splitext(os.path.basename(script_path))[0]
         output_name = f"{script_name}_app" # Nome final do executável
+        project = self._project_of(script_path)
+        # Projetos de workspace/output têm subdiretórios próprios em dist/ e build/
+        dist_dir = os.path.join(DIST_DIR, project) if project else DIST_DIR
+        artifact = os.path.join(dist_dir, output_name + (".exe" if os.name == "nt" else ""))
+        fingerprint_path = os.path.join(dist_dir, ".fingerprints", f"{output_name}.json")
+        workpath = os.path.join(BUILD_DIR, project or "_scripts", script_name)
+        env_dir = self.executor.env_cache.environment_for(project) if project else None
+        site_packages = self.executor.env_cache.site_packages(env_dir) if env_dir else None
+        timings = {}
 
-        # Comando de compilação
-        command = (
-            f"pyinstaller --onefile --noconsole "
-            f"--name \"{output_name}\" "
-            f"--distpath \"workspace/dist\" " # Coloca o executável final em workspace/dist
-            f"--workpath \"workspace/build\" " # Coloca arquivos temporários em workspace/build
-            f"\"{script_path}\""
-        )
-
-        print(f"[USER] Compilando '{script_path}'... Isso pode levar alguns minutos.")
-        self.logger.info(f"Executando comando de compilação: {command}")
-        
-        # Delega a execução ao ExecutionAgent para manter a segurança
-        self.executor.run(command)
-        
-        final_path = f"workspace/dist/{output_name}"
-        if os.path.exists(final_path):
-            print(f"[USER] ✅ Compilação concluída! Executável disponível em: {final_path}")
-        else:
-            print("[USER] ❌ Compilação falhou. Verifique os logs.")
\ No newline at end of file
+        async with self._build_locks.setdefault(artifact, asyncio.Lock()):
+            with get_tracer().span("compiler.run", "agent", script=script_path) as span:
+                # 1. Verificação do PyInstaller
+                start = time.perf_counter()
+                pyinstaller_version = await self._check_pyinstaller()
+                timings["pyinstaller_check"] = time.perf_counter() - start
+                if pyinstaller_version is None:
+                    print("[USER] ❌ Compilação falhou: PyInstaller indisponível.")
+                    return {"success": False, "skipped": False, "artifact": None, "timings": timings}
+
+                # 2. Impressão digital (leitura de arquivos e metadados: fora do event loop)
+                start = time.perf_counter()
+                fingerprint = await asyncio.to_thread(self.fingerprint, script_path, pyinstaller_version, env_dir)
+                timings["fingerprint"] = time.perf_counter() - start
+                if not force and os.path.exists(artifact) and self._stored_digest(fingerprint_path) == fingerprint["digest"]:
+                    span.set(skipped=True)
+                    self._report(f"[USER] ✅ '{artifact}' já está atualizado; compilação pulada.", timings)
+                    return {"success": True, "skipped": True, "artifact": artifact, "timings": timings}
+
+                # 3. Compilação, reaproveitando o diretório de trabalho do projeto
+                command = (
+                    f"pyinstaller {' '.join(PYINSTALLER_OPTIONS)} "
+                    f"--name \"{output_name}\" "
+                    f"--distpath \"{dist_dir}\" " # Coloca o executável final em workspace/dist
+                    f"--workpath \"{workpath}\" " # Arquivos temporários ficam no diretório do projeto
+                    f"--specpath \"{workpath}\" "
+                    + (f"--paths \"{site_packages}\" " if site_packages else "") +
+                    f"\"{os.path.abspath(script_path)}\""
+                )
+                print(f"[USER] Compilando '{script_path}'... Isso pode levar alguns minutos.")
+                self.logger.info(f"Executando comando de compilação: {command}")
+                start = time.perf_counter()
+                # Delega a execução ao ExecutionAgent para manter a segurança
+                result = await self.executor.run_async(command)
+                timings["pyinstaller"] = time.perf_counter() - start
+                span.set(skipped=False, success=result.get("success"))
+
+                if not result.get("success") or not os.path.exists(artifact):
+                    self._report("[USER] ❌ Compilação falhou. Verifique os logs.", timings)
+                    return {"success": False, "skipped": False, "artifact": None, "timings": timings}
+
+                self._store_fingerprint(fingerprint_path, fingerprint)
+                self._report(f"[USER] ✅ Compilação concluída! Executável disponível em: {artifact}", timings)
+                return {"success": True, "skipped": False, "artifact": artifact, "timings": timings}
+
+    @staticmethod
+    def _stored_digest(fingerprint_path: str) -> str | None:
+        try:
+            with open(fingerprint_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("digest")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _store_fingerprint(fingerprint_path: str, fingerprint: dict):
+        os.makedirs(os.path.dirname(fingerprint_path), exist_ok=True)
+        with open(fingerprint_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f, indent=2)
+        os.replace(fingerprint_path + ".tmp", fingerprint_path)
+
+    def _report(self, message: str, timings: dict):
+        phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+        print(message)
+        print(f"[USER] Tempos por fase: {phases}")
+        self.logger.info(f"{message.removeprefix('[USER] ')} ({phases})")
@@ -1,42 +1,97 @@
 # src/agents/execution_agent.py
 
-import subprocess
+import asyncio
+import collections
+import contextlib
+import os
+import re
+import signal
+import time
+from src.core.async_runtime import run_sync
+from src.core.env_cache import get_env_cache, parse_requirements_install
 from src.core.functional_agent import FunctionalAgent
 from src.core.logger import get_logger
+from src.core.tracing import get_tracer
 from src.agents.security_agent import SecurityAgent
 
+_PROJECT_PATH = re.compile(r"workspace[/\\]output[/\\]([^/\\\s'\"]+)")
+_PIP_COMMAND = re.compile(r"(^|[\s;&|(])(pip3?|python3?\s+-m\s+pip)\s")
+
+
+def command_resources(command: str) -> set[str]:
+    """
+    Recursos que um comando de shell modifica, para serializar apenas comandos conflitantes:
+    o diretório de cada projeto em workspace/output que ele menciona, o ambiente Python
+    compartilhado para 'pip' e o repositório para 'git'.
+    """
+    resources = {f"project:{name}" for name in _PROJECT_PATH.findall(command)}
+    if _PIP_COMMAND.search(f" {command} "):
+        resources.add("pip")
+    if re.search(r"(^|[\s;&|(])git\s", f" {command} "):
+        resources.add("git")
+    return resources
+
+
 class ExecutionAgent(FunctionalAgent):
     """
     Agente funcional responsável por executar comandos de linha de comando,
     com verificação de existência e consulta de segurança.
+
+    Os comandos rodam como subprocessos assíncronos no event loop compartilhado: a saída é
+    repassada linha a linha ao console e ao log, e apenas as últimas 'max_output_lines'
+    linhas de cada fluxo são retidas. Cada comando tem um tempo limite (EXECUTOR_TIMEOUT,
+    padrão 1800 s) e pode ser cancelado. Até EXECUTOR_MAX_CONCURRENCY comandos (padrão 4)
+    rodam ao mesmo tempo; comandos que mexem nos mesmos recursos (ver command_resources)
+    são serializados.
+
+    'pip install -r workspace/output/<projeto>/requirements.txt' não instala no interpretador
+    global: o projeto recebe um ambiente virtual do EnvironmentCache, compartilhado com os
+    projetos de mesmos requisitos, e todo comando que referencia o projeto roda com esse
+    ambiente ativado (PATH e VIRTUAL_ENV; ver EnvironmentCache.subprocess_env).
     """
-    def __init__(self):
+    def __init__(self, max_output_lines: int = 200):
         super().__init__(agent_name="Executor")
         self.logger = get_logger(self.agent_name)
         self.security_agent = SecurityAgent()
+        self.env_cache = get_env_cache()
+        self.max_output_lines = max_output_lines
+        self.default_timeout = float(os.environ.get("EXECUTOR_TIMEOUT", 1800))
+        self.max_concurrency = int(os.environ.get("EXECUTOR_MAX_CONCURRENCY", 4))
+        self._semaphore = None
+        self._resource_locks: dict[str, asyncio.Lock] = {}
 
-    def _command_exists(self, cmd: str) -> bool:
-        """Verifica se um comando existe no PATH do sistema."""
+    def _command_exists(self, cmd: str, env: dict | None = None) -> bool:
+        """Verifica se um comando existe no PATH do sistema (ou no PATH de 'env', se informado)."""
         # Usa 'shutil.which' que é a forma mais robusta e multiplataforma em Python 3.3+
         from shutil import which
-        return which(cmd) is not None
+        return which(cmd, path=env.get("PATH") if env else None) is not None
+
+    def run(self, command_to_execute: str, skip_security_check=False, timeout: float | None = None) -> dict:
+        """
+        Versão síncrona de run_async, executada no event loop compartilhado.
+        Não pode ser chamada de dentro do próprio loop; use 'await run_async(...)' nesse caso.
+        """
+        return run_sync(self.run_async(command_to_execute, skip_security_check=skip_security_check, timeout=timeout))
 
-    def run(self, command_to_execute: str, skip_security_check=False) -> dict:
+    async def run_async(self, command_to_execute: str, skip_security_check=False, timeout: float | None = None) -> dict:
         """
         Executa um comando de shell após as verificações.
 
         Args:
             command_to_execute: A string completa do comando.
             skip_security_check: Se True, pula a análise de segurança (usado após confirmação do usuário).
+            timeout: Tempo limite em segundos (padrão: EXECUTOR_TIMEOUT).
 
         Returns:
-            Um dicionário com o status da execução.
+            Um dicionário com o status da execução ('success', 'reason' e, quando o comando
+            chega a rodar, 'exit_code', 'stdout', 'stderr' e 'duration').
         """
         self.logger.info(f"Recebido pedido para executar comando: '{command_to_execute}'")
-        
-        # 1. Verifica se o comando existe
+
+        # 1. Verifica se o comando existe (no ambiente do projeto, se o comando se refere a um)
         main_command = command_to_execute.split()[0]
-        if not self._command_exists(main_command):
+        env = self.env_cache.subprocess_env(command_to_execute)
+        if not self._command_exists(main_command, env):
             message = f"O comando '{main_command}' não foi encontrado no sistema. Verifique se a dependência está instalada."
             print(f"[USER] ❌ Erro: {message}")
             self.logger.error(message)
@@ -44,26 +99,160 @@ class ExecutionAgent(FunctionalAgent):
 
         # 2. Análise de Segurança (a menos que seja pulada)
         if not skip_security_check:
-            security_check = self.security_agent.analyze_command(command_to_execute)
+            projects = [r.split(":", 1)[1] for r in command_resources(command_to_execute) if r.startswith("project:")]
+            security_check = self.security_agent.analyze_command(command_to_execute, project=projects[0] if len(projects) == 1 else None)
+            if security_check["status"] == "denied":
+                print(f"[USER] ⛔ {security_check['reason']}")
+                return {"success": False, "reason": security_check["reason"], "status": "denied"}
             if security_check["status"] == "needs_confirmation":
                 self.logger.warning(f"Comando '{command_to_execute}' precisa de confirmação.")
                 # Retorna o status para o Orquestrador decidir
                 return {"success": False, "reason": security_check["reason"], "status": "needs_confirmation"}
 
-        # 3. Execução
-        self.logger.info(f"Executando: '{command_to_execute}'")
+        timeout = timeout or self.default_timeout
+
+        # 3. Dependências de projeto vão para um ambiente virtual em cache
+        install = parse_requirements_install(command_to_execute)
+        if install:
+            result = await self._install_requirements(*install, timeout)
+            if result is not None:
+                return result
+
+        # 4. Execução (serializada apenas com comandos que disputam os mesmos recursos)
+        async with self._slot(command_resources(command_to_execute)):
+            self.logger.info(f"Executando: '{command_to_execute}'" + (f" (ambiente {env['VIRTUAL_ENV']})" if env else ""))
+            with get_tracer().span("subprocess", "subprocess", command=command_to_execute[:200]) as span:
+                result = await self._execute(command_to_execute, main_command, timeout, env)
+                span.set(exit_code=result.get("exit_code"), timed_out=result.get("timed_out", False))
+
+        if result["success"]:
+            print(f"[USER] ✅ Comando executado com sucesso ({result['duration']:.1f}s).")
+        elif result.get("timed_out"):
+            print(f"[USER] ❌ {result['reason']}")
+        else:
+            print(f"[USER] ❌ Erro ao executar o comando (código de saída: {result['exit_code']}).")
+            self.logger.error(f"Erro de subprocesso ao executar '{command_to_execute}': {result['stderr']}")
+        return result
+
+    async def _install_requirements(self, project: str, requirements_path: str, timeout: float) -> dict | None:
+        """Instala as dependências do projeto pelo EnvironmentCache (None: instalar da forma tradicional)."""
+        async def run(command):
+            with get_tracer().span("subprocess", "subprocess", command=command[:200]) as span:
+                result = await self._execute(command, "pip", timeout)
+                span.set(exit_code=result.get("exit_code"), timed_out=result.get("timed_out", False))
+                return result
+
         try:
-            result = subprocess.run(
-                command_to_execute,
-                shell=True, check=True, capture_output=True, text=True, encoding='utf-8'
+            async with self._slot({f"project:{project}"}):
+                with get_tracer().span("env_cache.ensure", "subprocess", project=project) as span:
+                    result = await self.env_cache.ensure(project, requirements_path, run)
+                    if result is not None:
+                        span.set(reused=result.get("reused"), success=result["success"])
+        except OSError as e:
+            return {"success": False, "reason": f"Não foi possível ler '{requirements_path}': {e}"}
+        if result is None:
+            self.logger.info(f"'{requirements_path}' referencia outros arquivos; instalando sem o cache de ambientes.")
+            return None
+
+        if result["success"]:
+            print(f"[USER] ✅ {result['reason']} Ambiente do projeto '{project}': {result['env']}")
+        else:
+            print(f"[USER] ❌ Falha ao preparar o ambiente do projeto '{project}': {result['reason']}")
+        return result
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, resources: set[str]):
+        """Uma vaga no limite de concorrência, mais os locks dos recursos do comando."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        async with contextlib.AsyncExitStack() as stack:
+            # Ordem fixa de aquisição para evitar deadlock entre comandos
+            for resource in sorted(resources):
+                await stack.enter_async_context(self._resource_locks.setdefault(resource, asyncio.Lock()))
+            await stack.enter_async_context(self._semaphore)
+            yield
+
+    async def _execute(self, command: str, label: str, timeout: float, env: dict | None = None) -> dict:
+        start = time.monotonic()
+        stdout_tail = collections.deque(maxlen=self.max_output_lines)
+        stderr_tail = collections.deque(maxlen=self.max_output_lines)
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            start_new_session=hasattr(os, "killpg")
+        )
+
+        async def pump_and_wait():
+            await asyncio.gather(
+                self._pump(process.stdout, stdout_tail, f"[{label}]"),
+                self._pump(process.stderr, stderr_tail, f"[{label}:stderr]")
             )
-            print("[USER] ✅ Comando executado com sucesso.")
-            if result.stdout: print(f"--- Saída (stdout) ---\n{result.stdout}")
-            if result.stderr: print(f"--- Erros (stderr) ---\n{result.stderr}")
-            return {"success": True, "reason": "Executado com sucesso."}
-        except subprocess.CalledProcessError as e:
-            message = f"Erro ao executar o comando (código de saída: {e.returncode})."
-            print(f"[USER] ❌ {message}")
-            if e.stderr: print(f"--- Erros (stderr) ---\n{e.stderr}")
-            self.logger.error(f"Erro de subprocesso ao executar '{command_to_execute}': {e.stderr}")
-            return {"success": False, "reason": e.stderr}
\ No newline at end of file
+            return await process.wait()
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(pump_and_wait(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await self._terminate(process)
+        except asyncio.CancelledError:
+            self.logger.warning(f"Execução cancelada; encerrando '{command}'.")
+            await self._terminate(process)
+            raise
+
+        duration = time.monotonic() - start
+        result = {
+            "exit_code": process.returncode,
+            "stdout": "\n".join(stdout_tail),
+            "stderr": "\n".join(stderr_tail),
+            "duration": duration,
+        }
+        if timed_out:
+            return {**result, "success": False, "timed_out": True,
+                    "reason": f"O comando excedeu o tempo limite de {timeout:g}s e foi encerrado."}
+        if process.returncode != 0:
+            return {**result, "success": False, "reason": result["stderr"] or f"Código de saída {process.returncode}."}
+        return {**result, "success": True, "reason": "Executado com sucesso."}
+
+    async def _pump(self, stream: asyncio.StreamReader, tail: collections.deque, prefix: str, max_line: int = 65536):
+        """Repassa um fluxo do subprocesso linha a linha ao console e ao log, retendo só o final."""
+        buffer = b""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > max_line:
+                lines.append(buffer)
+                buffer = b""
+            for raw_line in lines:
+                self._emit(raw_line, tail, prefix)
+        if buffer:
+            self._emit(buffer, tail, prefix)
+
+    def _emit(self, raw_line: bytes, tail: collections.deque, prefix: str):
+        line = raw_line.decode("utf-8", errors="replace").rstrip("\r")
+        tail.append(line)
+        print(f"  {prefix} {line}")
+        self.logger.debug(f"{prefix} {line}")
+
+    async def _terminate(self, process, grace: float = 5.0):
+        """Encerra o subprocesso (e seus filhos): SIGTERM e, se não sair a tempo, SIGKILL."""
+        if process.returncode is not None:
+            return
+        for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(process.pid, sig)
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                return
+            try:
+                await asyncio.wait_for(process.wait(), grace)
+                return
+            except asyncio.TimeoutError:
+                continue
@@ -1,7 +1,10 @@
 # src/agents/frontend_agent.py
 
-import os
+from src.core.async_runtime import run_sync
 from src.core.base_agent import BaseAgent
+from src.core.history import FRESH
+from src.core.code_stream import write_file_atomic
+from src.core.llm_client import LLMError
 from src.core.logger import get_logger
 
 FRONTEND_DEV_SYSTEM_PROMPT = """
@@ -11,6 +14,9 @@ O CSS e o JavaScript devem ser incluídos dentro do arquivo HTML usando as tags
 Sua resposta deve ser APENAS o bloco de código. Não inclua explicações ou texto extra.
 """
 
+# Linhas de linguagem removidas da abertura do bloco de código gerado
+CODE_LANGUAGES = ('html', 'css', 'javascript', 'js')
+
 class FrontendAgent(BaseAgent):
     """
     Agente desenvolvedor cognitivo. Recebe tarefas do Arquiteto e escreve
@@ -19,20 +25,34 @@ class FrontendAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="FrontendDev",
-            system_prompt=FRONTEND_DEV_SYSTEM_PROMPT
+            system_prompt=FRONTEND_DEV_SYSTEM_PROMPT,
+            history_strategy=FRESH
         )
         self.logger = get_logger(self.agent_name)
 
-    def write_code(self, file_path: str, task_description: str):
+    async def write_code_async(self, file_path: str, task_description: str, stream: bool = True, use_cache: bool = True) -> bool:
         """
         Gera o código de frontend para uma tarefa e o salva no arquivo.
         """
         self.logger.info(f"Iniciando a tarefa de design para o caminho final: '{file_path}'")
         self.logger.debug(f"Descrição da tarefa: {task_description}")
 
-        generated_code = self.think(task_description)
+        if stream:
+            try:
+                bytes_written = await self.stream_code_to_file(file_path, task_description, CODE_LANGUAGES, use_cache)
+                self.logger.info(f"Código de frontend para '{file_path}' escrito com sucesso ({bytes_written} bytes, em streaming).")
+                return True
+            except Exception as e:
+                self.logger.error(f"O LLM falhou em gerar o código de frontend para a tarefa '{task_description}': {e}", exc_info=True)
+                return False
 
-        if generated_code and not generated_code.startswith("Erro:"):
+        try:
+            generated_code = await self.think_async(task_description, use_history=False, use_cache=use_cache)
+        except LLMError as e:
+            self.logger.error(f"O LLM falhou em gerar o código de frontend para a tarefa '{task_description}': {e}")
+            return False
+
+        if generated_code:
             if "```" in generated_code:
                 parts = generated_code.split('```')
                 if len(parts) > 1:
@@ -45,11 +65,7 @@ class FrontendAgent(BaseAgent):
                     generated_code = generated_code.strip()
 
             try:
-                parent_dir = os.path.dirname(file_path)
-                os.makedirs(parent_dir, exist_ok=True)
-                
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(generated_code)
+                write_file_atomic(file_path, generated_code)
                 
                 self.logger.info(f"Código de frontend para '{file_path}' escrito com sucesso.")
                 return True
@@ -60,6 +76,10 @@ class FrontendAgent(BaseAgent):
             self.logger.error(f"O LLM falhou em gerar o código de frontend para a tarefa: {task_description}")
             return False
 
+    def write_code(self, file_path: str, task_description: str, stream: bool = True) -> bool:
+        """Versão síncrona de write_code_async."""
+        return run_sync(self.write_code_async(file_path, task_description, stream=stream))
+
     def run(self, stop_event):
         """O FrontendAgent v3.0 é reativo."""
         self.logger.info("FrontendDev em modo de espera (reativo).")
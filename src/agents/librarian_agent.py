@@ -1,10 +1,13 @@
 # src/agents/librarian_agent.py
 
 import os
-import time
-import json
+from src.core.code_index import get_code_index
+from src.core.code_stream import write_file_atomic
+from src.core.file_watcher import FileWatcher
 from src.core.functional_agent import FunctionalAgent
 from src.core.logger import get_logger
+from src.core.manifest_store import get_manifest_store
+from src.core.project_map import get_project_map
 
 class LibrarianAgent(FunctionalAgent):
     """
@@ -15,72 +18,55 @@ class LibrarianAgent(FunctionalAgent):
         super().__init__(agent_name="Librarian")
         self.logger = get_logger(self.agent_name)
         self.project_map_path = "workspace/project_map.md"
-        self.manifest_path = "workspace/manifest.json"
         self.project_root = "."
+        self.project_map = get_project_map()
+        self._written_version = None
+        self._written_content = None
+        self.manifest = get_manifest_store()
+        self.code_index = get_code_index()
 
     def _initialize_files(self):
-        """Garante que o mapa e o manifesto existam."""
+        """Garante que o mapa exista (o manifesto é criado pelo próprio ManifestStore)."""
         if not os.path.exists(self.project_map_path):
             self.generate_project_map()
-        if not os.path.exists(self.manifest_path):
-            with open(self.manifest_path, 'w', encoding='utf-8') as f:
-                json.dump({}, f, indent=4)
-            self.logger.info(f"Manifesto de projetos inicializado em '{self.manifest_path}'")
 
-    def generate_project_map(self):
+    def generate_project_map(self, changed_paths=None) -> bool:
         """
-        Escaneia a estrutura do projeto e gera/atualiza o arquivo project_map.md.
-        """
-        self.logger.debug("Atualizando o mapa do projeto...")
-        
-        dir_map = {
-            "src/core": "Contém os componentes centrais e a lógica de arquitetura do sistema (Orchestrator, BaseAgent). Regra: Apenas código de infraestrutura crítica.",
-            "src/agents": "Contém a implementação de cada agente individual. Regra: Cada novo agente deve ter seu próprio arquivo aqui.",
-            "workspace": "Diretório de trabalho para operações. Contém subpastas para artefatos gerados.",
-            "workspace/output": "Diretório padrão para a saída de projetos gerados. Regra: Todos os novos projetos devem ser criados aqui.",
-            "logs": "Contém todos os logs do sistema.",
-            "Ambiente": "O sistema operacional é Linux (WSL). Use comandos de shell compatíveis (ex: `xdg-open`, `rm -r`). O comando `open` (macOS) não funcionará."
-        }
+        Atualiza o índice em memória do workspace (e o índice de busca do código gerado) e
+        regrava o project_map.md somente se o mapa mudou. 'changed_paths' (vindos do
+        FileWatcher) limita a atualização a esses caminhos; sem eles, a árvore inteira é
+        reescaneada (apenas stat nos arquivos inalterados).
 
+        Returns:
+            True se o arquivo do mapa foi regravado.
+        """
         try:
-            with open(self.project_map_path, "w", encoding="utf-8") as f:
-                f.write("# Mapa do Projeto e Regras de Arquitetura\n\n")
-                f.write("Este documento é a fonte da verdade sobre a estrutura do projeto. É mantido pelo LibrarianAgent.\n\n")
-                
-                for path, description in dir_map.items():
-                    if path != "Ambiente":
-                        full_path = os.path.join(self.project_root, path)
-                        status = "✅ Encontrado" if os.path.isdir(full_path) else "❌ Não Encontrado"
-                        f.write(f"### Diretório: `{path}` ({status})\n")
-                    else:
-                        f.write(f"### {path}\n")
-                    f.write(f"- **Descrição/Regra:** {description}\n\n")
-            
-            self.logger.debug(f"Mapa do projeto atualizado com sucesso em '{self.project_map_path}'")
+            if changed_paths is None:
+                self.project_map.scan()
+                self.code_index.scan()
+            elif changed_paths:
+                self.project_map.update(changed_paths)
+                self.code_index.update(changed_paths)
+
+            if self.project_map.version == self._written_version and os.path.exists(self.project_map_path):
+                return False
+            content = self.project_map.render()
+            self._written_version = self.project_map.version
+            if content == self._written_content and os.path.exists(self.project_map_path):
+                return False
+            write_file_atomic(self.project_map_path, content)
+            self._written_content = content
+            self.logger.debug(f"Mapa do projeto atualizado com sucesso em '{self.project_map_path}' (versão {self._written_version}).")
+            return True
         except Exception as e:
             self.logger.error(f"Falha ao gerar o mapa do projeto: {e}", exc_info=True)
+            return False
 
     def register_project_in_manifest(self, project_id: str, project_path: str, description: str):
         """Adiciona ou atualiza a entrada de um projeto no manifesto."""
         self.logger.info(f"Registrando projeto '{project_id}' no manifesto.")
         try:
-            if not os.path.exists(self.manifest_path):
-                manifest = {}
-            else:
-                with open(self.manifest_path, 'r', encoding='utf-8') as f:
-                    manifest = json.load(f)
-            
-            manifest[project_id] = {
-                "path": project_path,
-                "description": description,
-                "status": "ACTIVE",
-                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                "last_accessed": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-            }
-
-            with open(self.manifest_path, 'w', encoding='utf-8') as f:
-                json.dump(manifest, f, indent=4)
-
+            self.manifest.register(project_id, project_path, description)
         except Exception as e:
             self.logger.error(f"Falha ao registrar projeto no manifesto: {e}", exc_info=True)
 
@@ -94,17 +80,21 @@ class LibrarianAgent(FunctionalAgent):
 
     def run(self, stop_event):
         """
-        Loop principal do agente. Atualiza o mapa do projeto periodicamente.
+        Loop principal do agente. Mantém o mapa do projeto atualizado a partir dos
+        eventos do sistema de arquivos no workspace.
         """
         self.logger.info("Iniciando monitoramento da estrutura do projeto...")
         self._initialize_files()
+        self.generate_project_map()
 
-        while not stop_event.is_set():
-            self.generate_project_map()
-            
-            for _ in range(60):
-                if stop_event.is_set():
-                    break
-                time.sleep(1)
+        watcher = FileWatcher(self.project_map.root)
+        watcher.start()
+        try:
+            while not stop_event.is_set():
+                changed_paths = watcher.wait_for_changes(stop_event)
+                if not stop_event.is_set():
+                    self.generate_project_map(changed_paths)
+        finally:
+            watcher.stop()
         
         self.logger.info("Monitoramento da estrutura do projeto encerrado.")
\ No newline at end of file
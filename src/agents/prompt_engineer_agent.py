@@ -1,7 +1,11 @@
 # src/agents/prompt_engineer_agent.py
 
 import json
+import os
 from src.core.base_agent import BaseAgent
+from src.core.history import FRESH
+from src.core.intent_classifier import INTENT_EXAMPLES, get_intent_classifier
+from src.core.llm_client import LLMError
 from src.core.logger import get_logger
 
 PROMPT_ENGINEER_SYSTEM_PROMPT = """
@@ -18,16 +22,31 @@ class PromptEngineerAgent(BaseAgent):
     def __init__(self):
         super().__init__(
             agent_name="PromptEngineer",
-            system_prompt=PROMPT_ENGINEER_SYSTEM_PROMPT
+            system_prompt=PROMPT_ENGINEER_SYSTEM_PROMPT,
+            history_strategy=FRESH
         )
         self.logger = get_logger(self.agent_name)
+        # Abaixo deste nível de confiança o classificador local cede a decisão ao LLM
+        self.intent_confidence_threshold = float(os.environ.get("INTENT_CONFIDENCE_THRESHOLD", "0.85"))
 
     def analyze_user_intent(self, user_input: str) -> dict:
         """
         Analisa a entrada do usuário para classificar a intenção e extrair parâmetros.
+        O classificador local responde os casos comuns sem chamar o LLM; o LLM só é
+        consultado quando a confiança local fica abaixo de 'intent_confidence_threshold'.
+        O resultado inclui 'source' ("rules", "model" ou "llm").
         """
         self.logger.debug(f"Analisando intenção do usuário: '{user_input}'")
 
+        prediction = get_intent_classifier().classify(user_input)
+        if prediction.confidence >= self.intent_confidence_threshold:
+            self.logger.debug(f"Intenção resolvida localmente: {prediction}")
+            return prediction.to_dict()
+        self.logger.debug(f"Classificação local incerta ({prediction}); consultando o LLM.")
+        examples = "\n".join(
+            f'        - "{text}" -> {json.dumps(expected, ensure_ascii=False)}' for text, expected in INTENT_EXAMPLES
+        )
+
         intent_analysis_prompt = f"""
         Analise a seguinte solicitação do usuário e a estruture em um objeto JSON.
         A solicitação é: "{user_input}"
@@ -45,22 +64,25 @@ class PromptEngineerAgent(BaseAgent):
         - Para COMMIT: "commit_message"
 
         Exemplos Detalhados:
-        - "crie um app flask simples" -> {{"intent": "BUILD", "params": {{"description": "um app flask simples"}}}}
-        - "modifique o arquivo src/core/orchestrator.py para adicionar um log" -> {{"intent": "SELF_MODIFY", "params": {{"file_path": "src/core/orchestrator.py", "description": "adicionar um log"}}}}
-        - "altere o ExecutionAgent e o Orchestrator para pedir confirmação" -> {{"intent": "SELF_MODIFY", "params": {{"file_path": ["src/agents/execution_agent.py", "src/core/orchestrator.py"], "description": "pedir confirmação ao usuário para comandos perigosos"}}}}
-        - "execute o comando ls -l" -> {{"intent": "RUN", "params": {{"command_to_execute": "ls -l"}}}}
-        - "salve meu trabalho com a mensagem 'finalizei'" -> {{"intent": "COMMIT", "params": {{"commit_message": "finalizei"}}}}
+{examples}
 
         Responda APENAS com o objeto JSON.
         """
         
-        response_text = self.think(intent_analysis_prompt)
+        try:
+            response_text = self.think(intent_analysis_prompt)
+        except LLMError as e:
+            self.logger.error(f"Falha ao analisar a intenção do usuário: {e}")
+            return {"intent": "UNKNOWN", "params": {}}
         
         try:
             if "```" in response_text:
                 response_text = response_text.split('```')[1].replace("json", "").strip()
             
-            return json.loads(response_text)
+            analysis = json.loads(response_text)
+            if isinstance(analysis, dict):
+                analysis["source"] = "llm"
+            return analysis
         except (json.JSONDecodeError, IndexError) as e:
             self.logger.error(f"Falha ao decodificar a análise de intenção em JSON: {e}\nResposta recebida: {response_text}")
             return {"intent": "UNKNOWN", "params": {}}
@@ -99,4 +121,69 @@ class PromptEngineerAgent(BaseAgent):
 
         Agora, forneça o novo código completo para o arquivo, sem nenhum texto adicional.
         """
-        return optimized_prompt
\ No newline at end of file
+        return optimized_prompt
+
+    def optimize_patch_prompt(self, files: dict[str, str], description: str) -> str:
+        """
+        Prompt de modificação em modo patch: o modelo vê os arquivos atuais, mas responde apenas
+        com blocos SEARCH/REPLACE das linhas alteradas (ver src/core/patching.py), em vez de
+        reescrever os arquivos inteiros. 'files' mapeia cada caminho ao seu conteúdo atual.
+        """
+        self.logger.debug(f"Otimizando prompt de modificação (patch) para: {list(files)}")
+
+        sources = "\n\n".join(f"**Arquivo '{path}':**\n---\n{code}\n---" for path, code in files.items())
+        optimized_prompt = f"""
+        Sua tarefa é executar uma modificação cirúrgica e literal nos arquivos de código abaixo.
+
+        **REGRAS E RESTRIÇÕES ESTRITAS (LEIA COM ATENÇÃO E SIGA-AS):**
+        1.  **NÃO ALTERE A LÓGICA EXISTENTE:** Você só deve aplicar a mudança solicitada. Não refatore, não renomeie variáveis, não adicione comentários e não altere o estilo do código que não esteja diretamente relacionado à tarefa.
+        2.  **NÃO ADICIONE NOVAS DEPENDÊNCIAS:** Não adicione novas declarações de 'import' que não foram explicitamente solicitadas.
+        3.  **SEJA LITERAL:** Aplique a mudança exatamente como descrita na solicitação.
+        4.  **RESPONDA APENAS COM BLOCOS DE EDIÇÃO:** Não forneça os arquivos completos. Para cada alteração, escreva o caminho do arquivo numa linha e, em seguida, um bloco no formato:
+
+        caminho/do/arquivo.py
+        <<<<<<< SEARCH
+        (linhas atuais, copiadas exatamente do arquivo, com algumas linhas de contexto)
+        =======
+        (as mesmas linhas com a alteração aplicada)
+        >>>>>>> REPLACE
+
+        O trecho SEARCH deve aparecer uma única vez no arquivo; use blocos pequenos e separados para alterações em lugares diferentes. Para acrescentar código ao fim de um arquivo (ou criar um arquivo novo), deixe o trecho SEARCH vazio.
+
+        **OS ARQUIVOS ATUAIS SÃO:**
+        {sources}
+
+        **A MODIFICAÇÃO SOLICITADA É A SEGUINTE:**
+        "{description}"
+
+        Agora, forneça apenas os blocos SEARCH/REPLACE, sem nenhum texto adicional.
+        """
+        return optimized_prompt
+
+    def optimize_patch_retry_prompt(self, file_path: str, current_code: str, failures: list[str], description: str) -> str:
+        """
+        Prompt para refazer apenas as edições de 'file_path' que não puderam ser aplicadas.
+        'failures' descreve cada bloco rejeitado (o bloco e o motivo) ou o erro de validação
+        do arquivo resultante; 'current_code' já contém as edições aceitas.
+        """
+        self.logger.debug(f"Otimizando prompt de correção (patch) para: {file_path} ({len(failures)} falha(s))")
+
+        problems = "\n\n".join(failures)
+        optimized_prompt = f"""
+        Algumas edições que você propôs para o arquivo '{file_path}' não puderam ser aplicadas.
+        As demais já foram aplicadas e estão no código abaixo; NÃO as repita.
+
+        **PROBLEMAS ENCONTRADOS:**
+        {problems}
+
+        **O CÓDIGO ATUAL COMPLETO DO ARQUIVO É:**
+        ---
+        {current_code}
+        ---
+
+        **A MODIFICAÇÃO SOLICITADA ORIGINALMENTE É:**
+        "{description}"
+
+        Refaça apenas as edições que faltam, no mesmo formato de blocos SEARCH/REPLACE, copiando o trecho SEARCH exatamente do código atual acima. Responda apenas com os blocos, sem nenhum texto adicional.
+        """
+        return optimized_prompt
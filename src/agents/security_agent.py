@@ -1,42 +1,347 @@
 # src/agents/security_agent.py
 
-# --- CORREÇÃO DE SINTAXE APLICADA AQUI ---
+import collections
+import json
+import os
+import re
+import shlex
+import threading
 from src.core.functional_agent import FunctionalAgent
 from src.core.logger import get_logger
 
+# Regras padrão: 'program' é o nome do executável (sem diretório; "mkfs" cobre "mkfs.ext4"),
+# "*" vale para qualquer comando simples e "raw" é aplicada ao texto do comando sem espaços.
+# 'args' é buscada na linha canônica dos argumentos (ver SecurityAgent._canonical), onde
+# flags curtas aparecem separadas e em minúsculas quando equivalentes ('-R' vira '-r').
+DEFAULT_RULES = [
+    {"name": "rm -rf", "program": "rm", "args": r"(?=.*(?:^| )-r(?: |$))(?=.*(?:^| )-f(?: |$))"},
+    {"name": "rm --no-preserve-root", "program": "rm", "args": r"--no-preserve-root"},
+    {"name": "sudo", "program": "sudo", "args": r""},
+    {"name": "doas", "program": "doas", "args": r""},
+    {"name": "su", "program": "su", "args": r""},
+    {"name": "mv /", "program": "mv", "args": r"(?:^| )/"},
+    {"name": "dd", "program": "dd", "args": r""},
+    {"name": "mkfs", "program": "mkfs", "args": r""},
+    {"name": "fdisk", "program": "fdisk", "args": r""},
+    {"name": "shutdown", "program": "shutdown", "args": r""},
+    {"name": "reboot", "program": "reboot", "args": r""},
+    {"name": "poweroff", "program": "poweroff", "args": r""},
+    {"name": "chmod -R 777", "program": "chmod", "args": r"(?=.*(?:^| )-r(?: |$))(?=.*(?:^| )0?777(?: |$))"},
+    {"name": "chown -R /", "program": "chown", "args": r"(?=.*(?:^| )-r(?: |$))(?=.*(?:^| )/(?: |$))"},
+    {"name": "> /dev/sd", "program": "*", "args": r"(?:^| )>>? /dev/(?:sd|hd|nvme|xvd|mmcblk)"},
+    {"name": ":(){:|:&};:", "program": "raw", "args": r"(?P<bomb>\S+)\(\)\{(?P=bomb)\|(?P=bomb)&?\};(?P=bomb)"},  # Fork bomb
+    {"name": "curl | sh", "program": "raw", "args": r"(?:curl|wget)[^|;&]*\|(?:sudo)?(?:ba|z|da|k)?sh(?:$|[;&|])"},
+]
+
+# Padrões da varredura por substring original, mantidos como rede de segurança: são buscados
+# no texto do comando em minúsculas e com os espaços colapsados, depois da análise estrutural,
+# para que o analisador nunca deixe passar algo que a varredura antiga pegava.
+# Cada padrão precisa começar no início de uma palavra ('dd ' não casa com 'git add .').
+LEGACY_PATTERNS = ["rm -rf", "sudo", "mv /", "dd ", ":(){:|:&};:", "mkfs", "> /dev/sd"]
+_LEGACY = re.compile("|".join(f"(?<![a-z0-9_])(?P<p{i}>{re.escape(p)})" for i, p in enumerate(LEGACY_PATTERNS)))
+
+# Programas que apenas executam outro comando: a análise segue para o comando "embrulhado"
+_WRAPPERS = {"env", "nohup", "time", "nice", "command", "exec", "xargs", "stdbuf", "timeout", "busybox"}
+# Opções de wrappers que consomem o token seguinte como valor ('nice -n 5 rm ...')
+_WRAPPER_VALUE_OPTIONS = {
+    "env": {"-u", "--unset", "-C", "--chdir"},
+    "nice": {"-n", "--adjustment"},
+    "timeout": {"-s", "--signal", "-k", "--kill-after"},
+    "xargs": {"-n", "-I", "-i", "-P", "-L", "-l", "-s", "-d", "-E", "-a", "--max-args", "--max-procs",
+              "--delimiter", "--arg-file", "--replace"},
+    "stdbuf": {"-i", "-o", "-e"},
+    "time": {"-f", "-o", "--format", "--output"},
+}
+# Interpretadores cujo código inline ('-c'/'-e') pode chamar o shell: os literais de texto são analisados
+_INTERPRETERS = {"python", "python2", "python3", "perl", "ruby", "node", "php"}
+_FIND_EXEC = {"-exec", "-execdir", "-ok", "-okdir"}
+_SHELLS = {"sh", "bash", "zsh", "dash", "ksh"}
+_LONG_FLAGS = {"--recursive": "-r", "--force": "-f"}
+_SHORT_FLAGS = {"R": "r"}
+_CONTROL_CHARS = set(";&|()\n")
+_ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+_FLAG_CLUSTER = re.compile(r"^-[A-Za-z]+$")
+_SUBSTITUTION = re.compile(r"\$\(([^()]*)\)|`([^`]*)`")
+_STRING_LITERAL = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"")
+
+
 class SecurityAgent(FunctionalAgent):
     """
     Agente funcional que analisa comandos para prevenir a execução de ações perigosas.
+
+    O comando é quebrado em tokens com as regras do shell (aspas, escapes, operadores) e
+    dividido em comandos simples; cada um é reduzido a uma linha canônica (executável sem
+    diretório, wrappers como 'env'/'nohup' removidos, flags agrupadas separadas: 'rm -fr'
+    vira 'rm -f -r'). As regras são compiladas uma única vez numa expressão combinada por
+    executável, então o custo por comando não cresce com o número de regras de outros
+    programas. Substituições '$(...)', 'sh -c "..."', 'eval', 'find -exec', 'busybox <applet>' e
+    os literais de 'python -c' são analisados recursivamente; um pipe para um shell recebe um
+    script que não dá para ver e sempre pede confirmação. Por fim, os padrões da varredura por
+    substring original (LEGACY_PATTERNS) são conferidos no texto do comando.
+
+    Listas de permissão/bloqueio por projeto vêm de 'policy_path' (JSON, recarregado quando
+    muda): {"*": {"allow": [...], "deny": [...]}, "<projeto>": {...}}, com expressões
+    regulares buscadas na linha canônica de cada comando simples. Bloqueios vencem
+    permissões, e permissões dispensam as regras padrão. Os veredictos ficam num cache LRU.
     """
-    def __init__(self):
+    def __init__(self, rules: list[dict] | None = None, policy_path: str | None = None, cache_size: int = 1024):
         super().__init__(agent_name="SecurityAgent")
         self.logger = get_logger(self.agent_name)
-        # Lista de padrões que sempre exigirão confirmação do usuário
-        self.confirmation_patterns = [
-            "rm -rf",
-            "sudo",
-            "mv /",
-            "dd ",
-            ":(){:|:&};:", # Fork bomb
-            "mkfs",
-            "> /dev/sd"
-        ]
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.policy_path = policy_path or os.environ.get("SECURITY_POLICY_FILE", "workspace/security_policy.json")
+        self.cache_size = cache_size
+        self._by_program = self._compile(self.rules)
+        self._policies: dict[str, tuple] = {}
+        self._policy_signature = None
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Compilação das regras ---
+
+    @staticmethod
+    def _combine(rules: list[dict], key: str = "args"):
+        """
+        Uma única expressão com um grupo nomeado por regra; 'lastgroup' indica qual casou.
+        As regras não podem usar referências numeradas (\\1); use grupos nomeados.
+        """
+        if not rules:
+            return None
+        alternatives = "|".join(f"(?P<r{i}>.*?(?:{rule[key]}))" for i, rule in enumerate(rules))
+        return re.compile(f"^(?:{alternatives})", re.DOTALL)
+
+    def _compile(self, rules: list[dict]) -> dict:
+        grouped = collections.defaultdict(list)
+        for rule in rules:
+            grouped[rule["program"]].append(rule)
+        return {program: (self._combine(group), group) for program, group in grouped.items()}
+
+    # --- Políticas por projeto ---
+
+    def _load_policies(self):
+        """Recarrega o arquivo de políticas se ele mudou (o cache de veredictos é descartado)."""
+        try:
+            stat = os.stat(self.policy_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == self._policy_signature:
+            return
+        policies = {}
+        if signature is not None:
+            try:
+                with open(self.policy_path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                for project, lists in raw.items():
+                    policies[project] = (self._combine_patterns(lists.get("deny", [])),
+                                         self._combine_patterns(lists.get("allow", [])))
+                self.logger.info(f"Políticas de segurança carregadas de '{self.policy_path}' ({len(policies)} escopo(s)).")
+            except (OSError, ValueError, AttributeError, re.error) as e:
+                self.logger.error(f"Arquivo de políticas inválido '{self.policy_path}': {e}. Usando apenas as regras padrão.")
+                policies = {}
+        self._policies = policies
+        self._policy_signature = signature
+        self._cache.clear()
+
+    @staticmethod
+    def _combine_patterns(patterns: list[str]):
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns)) if patterns else None
+
+    def _policy_for(self, project: str | None) -> tuple[list, list]:
+        scopes = [self._policies.get("*")] + ([self._policies.get(project)] if project else [])
+        scopes = [scope for scope in scopes if scope]
+        return [deny for deny, _ in scopes if deny], [allow for _, allow in scopes if allow]
+
+    # --- Análise ---
 
-    def analyze_command(self, command_string: str) -> dict:
+    def analyze_command(self, command_string: str, project: str | None = None) -> dict:
         """
-        Verifica um comando contra uma lista de padrões perigosos.
+        Verifica um comando contra as políticas do projeto e as regras de comandos perigosos.
+
+        Args:
+            command_string: O comando de shell completo.
+            project: Projeto em workspace/output ao qual o comando se refere, se houver.
 
         Returns:
-            Um dicionário com o status da análise e um motivo.
+            Um dicionário com o status da análise ('safe', 'needs_confirmation' ou 'denied') e um motivo.
         """
+        with self._lock:
+            self._load_policies()
+            key = (project, command_string)
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                self._cache.move_to_end(key)
+                return dict(verdict)
+
         self.logger.debug(f"Analisando comando: '{command_string}'")
-        command_lower = command_string.lower().strip()
+        deny, allow = self._policy_for(project)
+        verdict = self._analyze(command_string, deny, allow, depth=0)
+
+        if verdict["status"] == "safe":
+            self.logger.debug("Comando aprovado como seguro.")
+        else:
+            self.logger.warning(f"Comando requer atenção ({verdict['status']}): '{command_string}'. Motivo: {verdict['reason']}")
+        with self._lock:
+            if self.cache_size:
+                self._cache[key] = verdict
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return dict(verdict)
+
+    def _analyze(self, command: str, deny: list, allow: list, depth: int) -> dict:
+        if depth > 3:
+            return {"status": "needs_confirmation", "reason": "Comando aninhado demais para ser analisado."}
+
+        compact = "".join(command.split())
+        raw_rule = self._match("raw", compact)
+        if raw_rule:
+            return self._danger(raw_rule)
+
+        # Substituições de comando rodam antes do comando externo
+        for match in _SUBSTITUTION.finditer(command):
+            verdict = self._analyze(match.group(1) or match.group(2) or "", deny, allow, depth + 1)
+            if verdict["status"] != "safe":
+                return verdict
+
+        try:
+            lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+            lexer.whitespace_split = True
+            tokens = list(lexer)
+        except ValueError as e:
+            return {"status": "needs_confirmation", "reason": f"Não foi possível analisar o comando ({e})."}
+
+        all_allowed = True
+        for segment, piped in self._segments(tokens):
+            program, args, inners = self._canonical(segment)
+            if program is None:
+                continue
+            line = f"{program} {args}".strip()
+            if any(pattern.search(line) for pattern in deny):
+                return {"status": "denied", "reason": f"Comando bloqueado pela política do projeto: '{line}'."}
+            for inner in inners:
+                verdict = self._analyze(inner, deny, allow, depth + 1)
+                if verdict["status"] != "safe":
+                    return verdict
+            if any(pattern.search(line) for pattern in allow):
+                continue
+            all_allowed = False
+            if piped and self._reads_script_from_stdin(program, args, inners):
+                return {"status": "needs_confirmation",
+                        "reason": f"O comando envia um script por pipe para '{program}', que não pode ser analisado."}
+            rule = self._match(program, args) or self._match(program.split(".")[0], args) or self._match("*", args)
+            if rule:
+                return self._danger(rule)
 
-        for pattern in self.confirmation_patterns:
-            if pattern in command_lower:
-                reason = f"Comando perigoso detectado (padrão: '{pattern}')."
-                self.logger.warning(f"Comando requer confirmação: '{command_string}'. Motivo: {reason}")
-                return {"status": "needs_confirmation", "reason": reason}
+        # Rede de segurança: a varredura original, salvo se a política permitiu cada comando
+        if not all_allowed:
+            match = _LEGACY.search(" ".join(command.lower().split()))
+            if match:
+                pattern = LEGACY_PATTERNS[int(match.lastgroup[1:])]
+                return {"status": "needs_confirmation", "reason": f"Comando perigoso detectado (padrão: '{pattern}')."}
+        return {"status": "safe", "reason": "Comando parece seguro."}
 
-        self.logger.debug("Comando aprovado como seguro.")
-        return {"status": "safe", "reason": "Comando parece seguro."}
\ No newline at end of file
+    @staticmethod
+    def _reads_script_from_stdin(program: str, args: str, inners: list[str]) -> bool:
+        """Um shell ou interpretador que recebe o script pela entrada padrão (sem '-c'/'-e' nem arquivo)."""
+        base = program.split(".")[0]
+        if base in _SHELLS:
+            return not inners and all(arg.startswith("-") for arg in args.split())
+        if re.sub(r"[\d.]+$", "", base) in _INTERPRETERS:
+            return not inners and all(arg.startswith("-") for arg in args.split())
+        return False
+
+    def _match(self, program: str, text: str) -> dict | None:
+        compiled = self._by_program.get(program)
+        if compiled is None:
+            return None
+        pattern, rules = compiled
+        match = pattern.match(text)
+        return rules[int(match.lastgroup[1:])] if match else None
+
+    @staticmethod
+    def _danger(rule: dict) -> dict:
+        return {"status": "needs_confirmation", "reason": f"Comando perigoso detectado (padrão: '{rule['name']}')."}
+
+    @staticmethod
+    def _segments(tokens: list[str]):
+        """
+        Divide os tokens em comandos simples nos operadores de controle (; && || | & ( )).
+        Cada comando vem com um indicador de que sua entrada é a saída de um pipe.
+        """
+        segment, piped = [], False
+        after_pipe = False
+        for token in tokens:
+            if token and set(token) <= _CONTROL_CHARS:
+                if segment:
+                    yield segment, piped
+                segment = []
+                after_pipe = token in ("|", "|&")
+            else:
+                if not segment:
+                    piped = after_pipe
+                segment.append(token)
+        if segment:
+            yield segment, piped
+
+    @staticmethod
+    def _canonical(segment: list[str]) -> tuple[str | None, str, list[str]]:
+        """
+        (executável, argumentos canônicos, comandos embutidos) de um comando simples.
+        Os comandos embutidos são os que ele executa indiretamente: o script de 'sh -c', os
+        argumentos de 'eval', as seções '-exec ... ;' do 'find' e os literais de texto do
+        código de 'python -c'. Redirecionamentos ficam no fim dos argumentos como '> alvo'.
+        """
+        words, redirects = [], []
+        i = 0
+        while i < len(segment):
+            token = segment[i]
+            if set(token) <= set("<>&") and token:
+                if i + 1 < len(segment):
+                    redirects.append(f"{token.rstrip('&') or '>'} {segment[i + 1]}")
+                i += 2
+                continue
+            words.append(token)
+            i += 1
+        # Atribuições de variáveis e wrappers antes do executável real
+        while words and (_ASSIGNMENT.match(words[0]) or os.path.basename(words[0]) in _WRAPPERS):
+            wrapper = os.path.basename(words.pop(0))
+            value_options = _WRAPPER_VALUE_OPTIONS.get(wrapper, set())
+            while words and (words[0].startswith("-") or _ASSIGNMENT.match(words[0])):
+                option = words.pop(0)
+                if option in value_options and words:
+                    words.pop(0)
+            if wrapper == "timeout" and words:
+                words.pop(0)  # duração
+        if not words:
+            return None, "", []
+        program = os.path.basename(words[0])
+        inners = []
+        if program == "eval":
+            inners.append(" ".join(words[1:]))
+        elif program == "find":
+            section = None
+            for word in words[1:]:
+                if section is None and word in _FIND_EXEC:
+                    section = []
+                elif section is not None and word in (";", "+"):
+                    inners.append(shlex.join(section))
+                    section = None
+                elif section is not None:
+                    section.append(word)
+            if section:
+                inners.append(shlex.join(section))
+        args = []
+        for word in words[1:]:
+            if word in _LONG_FLAGS:
+                args.append(_LONG_FLAGS[word])
+            elif _FLAG_CLUSTER.match(word) and not word.startswith("--"):
+                args.extend(f"-{_SHORT_FLAGS.get(flag, flag)}" for flag in word[1:])
+            else:
+                args.append(word)
+        if program in _SHELLS and "-c" in args[:-1]:
+            inners.append(args[args.index("-c") + 1])
+        elif re.sub(r"[\d.]+$", "", program) in _INTERPRETERS:
+            for flag in ("-c", "-e"):
+                if flag in args[:-1]:
+                    code = args[args.index(flag) + 1]
+                    inners.extend(a or b for a, b in _STRING_LITERAL.findall(code) if (a or b).strip())
+        return program, " ".join(args + redirects), inners
@@ -0,0 +1,73 @@
+# src/core/agent_registry.py
+
+import importlib
+import threading
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("AgentRegistry")
+
+
+class AgentRegistry:
+    """
+    Registro de agentes construídos sob demanda.
+
+    Cada agente é registrado como uma referência 'modulo:Classe' (ou uma função fábrica);
+    o módulo só é importado e o agente só é instanciado no primeiro 'get'. Assim a
+    inicialização do Orquestrador não paga pelos agentes que a sessão nunca usa.
+    """
+    def __init__(self, factories: dict | None = None):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+        for name, factory in (factories or {}).items():
+            self.register(name, factory)
+
+    def register(self, name: str, factory):
+        """Registra um agente: 'factory' é 'pacote.modulo:Classe' ou um callable sem argumentos."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str, default=None):
+        """Retorna o agente, construindo-o na primeira chamada. Nomes desconhecidos retornam 'default'."""
+        agent = self._instances.get(name)
+        if agent is not None:
+            return agent
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            factory = self._factories.get(name)
+            if factory is None:
+                return default
+            start = time.perf_counter()
+            agent = self._build(factory)
+            self._instances[name] = agent
+            logger.debug(f"Agente '{name}' construído em {(time.perf_counter() - start) * 1000:.1f} ms.")
+            return agent
+
+    @staticmethod
+    def _build(factory):
+        if callable(factory):
+            return factory()
+        module_name, _, class_name = factory.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)()
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def loaded(self) -> list[str]:
+        """Nomes dos agentes já construídos."""
+        return list(self._instances)
+
+    def keys(self):
+        return list(self._factories)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def __getitem__(self, name: str):
+        agent = self.get(name)
+        if agent is None:
+            raise KeyError(name)
+        return agent
@@ -0,0 +1,249 @@
+# src/core/artifact_store.py
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+import uuid
+from src.core.code_stream import write_file_atomic
+from src.core.logger import get_logger
+
+logger = get_logger("ArtifactStore")
+
+# Arquivos cujo nome (e não só a extensão) define o tipo
+NAMED_FILE_TYPES = {"requirements.txt", "dockerfile", ".gitignore", "readme.md", "package.json", ".env.example", "procfile"}
+FICLONE = 0x40049409  # ioctl de cópia copy-on-write (reflink) no Linux: btrfs, xfs, ...
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def _project_variants(project_id: str) -> set[str]:
+    """Formas em que o nome do projeto aparece em textos ('loja_virtual', 'loja virtual', ...), normalizadas."""
+    return {_fold(variant) for variant in (project_id, project_id.replace("_", " "), project_id.replace("-", " "),
+                                           project_id.replace("_", "-"), project_id.replace("-", "_"))}
+
+
+def canonical_task(agent: str, description: str, target_file: str, project_id: str | None = None) -> str:
+    """
+    Forma canônica de uma tarefa de codificação: agente, tipo do arquivo alvo e descrição
+    normalizada (minúsculas, sem acentos nem pontuação, com o nome do projeto substituído
+    por '{project}'). Tarefas iguais nessa forma geram artefatos intercambiáveis, exceto
+    quando o arquivo gerado cita o nome do projeto (ver ArtifactStore.lookup).
+    """
+    text = _fold(description)
+    if project_id:
+        for variant in _project_variants(project_id):
+            text = text.replace(variant, "{project}")
+    text = " ".join(re.sub(r"[^\w{}./+-]+", " ", text).split()).strip(" .")
+    name = os.path.basename(target_file).lower()
+    file_type = name if name in NAMED_FILE_TYPES else (os.path.splitext(name)[1] or name)
+    return f"{agent.lower()}|{file_type}|{text}"
+
+
+def mentions_project(path: str, project_id: str) -> bool:
+    """Se o arquivo de texto cita o nome do projeto (título, nome do pacote, ...)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = _fold(f.read())
+    except (OSError, UnicodeDecodeError):
+        return False
+    return any(variant in text for variant in _project_variants(project_id))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _clone(source: str, destination: str) -> bool:
+    """Cópia copy-on-write (reflink), quando o sistema de arquivos suporta."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(destination)
+        except OSError:
+            pass
+        return False
+
+
+def place(source: str, destination: str) -> str:
+    """
+    Coloca o conteúdo de 'source' em 'destination' sem duplicar dados quando possível:
+    reflink (copy-on-write), senão cópia comum. A troca é atômica. Hard links não são usados:
+    um arquivo de projeto editado no lugar alteraria o armazém e todos os outros projetos.
+
+    Returns:
+        O método usado: "reflink" ou "copy".
+    """
+    directory = os.path.dirname(destination) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(destination)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        if _clone(source, temp_path):
+            method = "reflink"
+        else:
+            shutil.copyfile(source, temp_path)
+            method = "copy"
+        os.replace(temp_path, destination)
+        return method
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class ArtifactStore:
+    """
+    Armazém de artefatos gerados, endereçado pelo conteúdo, para reaproveitar o resultado
+    de tarefas repetidas (o mesmo requirements.txt de Flask, o mesmo index.html básico)
+    dentro de um plano e entre planos, sem chamar o LLM de novo.
+
+    O conteúdo fica em '<root>/objects/<sha[:2]>/<sha>' e cada tarefa canônica aponta para
+    um objeto em '<root>/tasks/<chave[:2]>/<chave>.json'. Os arquivos dos projetos são
+    materializados por reflink quando o sistema de arquivos suporta (cópias idênticas não
+    ocupam disco), senão por cópia: cada projeto tem o seu arquivo, e editar um não altera
+    os demais. O hash do objeto é conferido antes de cada reuso; um objeto corrompido é
+    descartado. Um artefato que cita o nome do projeto de origem (o <title> de um index.html,
+    por exemplo) só é reaproveitado no mesmo projeto.
+
+    lookup, materialize e put leem e gravam arquivos: nas corrotinas, chame-os por
+    asyncio.to_thread (acquire já faz isso com lookup).
+    """
+    def __init__(self, root: str = "workspace/artifacts", enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.bytes_reused = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(canonical: str) -> str:
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _task_path(self, key: str) -> str:
+        return os.path.join(self.root, "tasks", key[:2], f"{key}.json")
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def lookup(self, key: str, project_id: str | None = None) -> dict | None:
+        """
+        O artefato armazenado para a tarefa, se existir e estiver íntegro e puder ser usado em
+        'project_id' (artefatos que citam o projeto de origem não servem para outro projeto).
+        """
+        if not self.enabled:
+            return None
+        try:
+            with open(self._task_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("project_specific") and entry.get("project") != project_id:
+                logger.debug(f"Artefato {entry['sha256'][:12]} cita o projeto '{entry.get('project')}'; não reaproveitado.")
+                return None
+            object_path = self._object_path(entry["sha256"])
+            intact = os.path.getsize(object_path) == entry["size"] and _sha256(object_path) == entry["sha256"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if not intact:
+            logger.warning(f"Artefato {entry['sha256'][:12]} está corrompido; descartando.")
+            with self._lock:
+                self._discard(key, entry["sha256"])
+            return None
+        return entry
+
+    def _discard(self, key: str, sha256: str):
+        for path in (self._task_path(key), self._object_path(sha256)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def acquire(self, key: str, project_id: str | None = None) -> dict | None:
+        """
+        O artefato da tarefa, esperando se outra geração da mesma tarefa está em andamento.
+        Retorna None quando cabe a quem chamou gerar o arquivo; nesse caso, 'release(key)'
+        deve ser chamado ao final (com sucesso ou não) para liberar quem estiver esperando.
+        """
+        while True:
+            entry = await asyncio.to_thread(self.lookup, key, project_id)
+            if entry is not None or not self.enabled:
+                return entry
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = asyncio.get_running_loop().create_future()
+                return None
+            await asyncio.shield(pending)
+
+    def release(self, key: str):
+        future = self._pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def materialize(self, entry: dict, destination: str) -> str | None:
+        """Coloca o artefato em 'destination'. Retorna o método usado, ou None se falhar."""
+        try:
+            method = place(self._object_path(entry["sha256"]), destination)
+        except OSError as e:
+            logger.error(f"Falha ao reutilizar o artefato {entry['sha256'][:12]} em '{destination}': {e}")
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_reused += entry["size"]
+        return method
+
+    def put(self, key: str, path: str, canonical: str, source: str, project_id: str | None = None):
+        """Armazena o arquivo gerado para a tarefa (o conteúdo idêntico é guardado uma única vez)."""
+        if not self.enabled:
+            return
+        try:
+            project_specific = bool(project_id) and mentions_project(path, project_id)
+            sha256 = _sha256(path)
+            size = os.path.getsize(path)
+            object_path = self._object_path(sha256)
+            with self._lock:
+                self.misses += 1
+                if not os.path.exists(object_path):
+                    place(path, object_path)
+                write_file_atomic(self._task_path(key), json.dumps({
+                    "sha256": sha256, "size": size, "task": canonical, "source": source, "created_at": time.time(),
+                    "project": project_id, "project_specific": project_specific,
+                }, ensure_ascii=False))
+            logger.debug(f"Artefato de '{source}' armazenado ({sha256[:12]}, {size} bytes).")
+        except OSError as e:
+            logger.error(f"Falha ao armazenar o artefato de '{source}': {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_reused": self.bytes_reused}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Retorna o armazém compartilhado do processo (ARTIFACT_REUSE=0 desliga o reuso)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore(enabled=os.environ.get("ARTIFACT_REUSE", "1") != "0")
+        return _default_store
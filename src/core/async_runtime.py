@@ -0,0 +1,48 @@
+# src/core/async_runtime.py
+
+import asyncio
+import threading
+from src.core.logger import get_logger
+
+logger = get_logger("AsyncRuntime")
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Retorna o event loop compartilhado do processo, iniciando-o sob demanda numa thread
+    daemon. Todas as chamadas assíncronas (LLM, planos) rodam neste único loop, então
+    dezenas de gerações podem ficar em andamento sem uma thread por chamada.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="async-runtime", daemon=True)
+            thread.start()
+            logger.debug("Event loop compartilhado iniciado.")
+        return _loop
+
+
+def run_sync(coro):
+    """
+    Executa uma corrotina no loop compartilhado e bloqueia até o resultado.
+    Ponte para o código síncrono (ex: BaseAgent.think). Não pode ser chamada de dentro do
+    próprio loop, pois isso causaria um deadlock; use 'await' nesse caso.
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync chamado de dentro do event loop compartilhado; use 'await'.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def submit(coro):
+    """Agenda uma corrotina no loop compartilhado sem bloquear. Retorna um concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
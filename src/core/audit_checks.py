@@ -0,0 +1,179 @@
+# src/core/audit_checks.py
+
+import os
+import time
+from src.core.audit_engine import AuditCheck, FileTracker, register_check, resolve_watch
+from src.core.manifest_store import get_manifest_store
+
+OUTPUT_DIR = "workspace/output"
+
+
+def _project_of(rel_path: str) -> str | None:
+    """Nome do projeto para um caminho sob workspace/output (ou None)."""
+    parts = rel_path.split("/")
+    return parts[2] if len(parts) >= 3 and "/".join(parts[:2]) == OUTPUT_DIR else None
+
+
+def _future(deadlines) -> float | None:
+    now = time.time()
+    pending = [deadline for deadline in deadlines if deadline > now]
+    return min(pending) if pending else None
+
+
+@register_check
+class StalePlanCheck(AuditCheck):
+    """O arquivo temporário workspace/plan.md não deveria sobreviver por mais de 'max_age' segundos."""
+    ticket_name = "stale_plan.md"
+    watches = ("workspace/plan.md",)
+
+    def __init__(self, max_age: float = 300):
+        self.max_age = max_age
+        self.mtime = None
+
+    def on_change(self, rel_path: str, full_path: str):
+        try:
+            self.mtime = os.path.getmtime(resolve_watch(rel_path, full_path, self.watches[0]))
+        except OSError:
+            self.mtime = None
+
+    def evaluate(self, now: float) -> str | None:
+        if self.mtime is not None and now - self.mtime > self.max_age:
+            return "O arquivo plan.md está obsoleto (mais de 5 minutos) e pode indicar que um processo falhou ou travou. Recomenda-se a remoção."
+        return None
+
+    def next_due(self) -> float | None:
+        return _future([self.mtime + self.max_age]) if self.mtime is not None else None
+
+
+@register_check
+class OrphanProjectsCheck(AuditCheck):
+    """
+    Diretórios em workspace/output sem entrada no manifesto. Um diretório só é considerado
+    órfão depois de 'grace' segundos sem atividade, para não acusar um projeto cujo plano
+    ainda está em execução (o registro no manifesto acontece no fim do plano).
+    """
+    ticket_name = "orphan_projects.md"
+    watches = (OUTPUT_DIR, "workspace/manifest.json")
+
+    def __init__(self, grace: float = 600):
+        self.grace = grace
+        self.projects: dict[str, float] = {}
+
+    def on_change(self, rel_path: str, full_path: str):
+        if rel_path == "workspace/manifest.json":
+            return
+        project = _project_of(rel_path)
+        if project is None:
+            # Evento no próprio workspace/output (ou acima): confere a lista de projetos
+            output_dir = resolve_watch(rel_path, full_path, OUTPUT_DIR)
+            current = {d for d in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir, d))} if os.path.isdir(output_dir) else set()
+            for name in set(self.projects) - current:
+                del self.projects[name]
+            for name in current - set(self.projects):
+                self._touch(name, os.path.join(output_dir, name))
+            return
+        project_dir = full_path
+        for _ in range(len(rel_path.split("/")) - 3):
+            project_dir = os.path.dirname(project_dir)
+        self._touch(project, project_dir, full_path)
+
+    def _touch(self, name: str, project_dir: str, changed_path: str | None = None):
+        """Registra a última atividade do projeto (mtime do diretório ou do arquivo alterado)."""
+        try:
+            activity = os.path.getmtime(project_dir)
+        except OSError:
+            self.projects.pop(name, None)
+            return
+        if changed_path and os.path.exists(changed_path):
+            activity = max(activity, os.path.getmtime(changed_path))
+        self.projects[name] = max(self.projects.get(name, 0.0), activity)
+
+    def _candidates(self) -> dict[str, float]:
+        registered = get_manifest_store().registered_dirs()
+        return {name: seen for name, seen in self.projects.items() if name not in registered}
+
+    def evaluate(self, now: float) -> str | None:
+        orphans = sorted(name for name, seen in self._candidates().items() if now - seen >= self.grace)
+        if not orphans:
+            return None
+        names = ", ".join(f"'{name}'" for name in orphans)
+        return (f"Os seguintes diretórios de projeto existem em workspace/output mas não estão registrados no manifesto: {names}. "
+                "Eles podem ser resquícios de builds falhos e devem ser investigados ou limpos.")
+
+    def next_due(self) -> float | None:
+        return _future(seen + self.grace for seen in self._candidates().values())
+
+
+@register_check
+class ProjectDiskUsageCheck(AuditCheck):
+    """Projetos em workspace/output que ocupam mais de 'max_mb' MB."""
+    ticket_name = "project_disk_usage.md"
+    watches = (OUTPUT_DIR,)
+
+    def __init__(self, max_mb: float = 500):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.tracker = FileTracker(OUTPUT_DIR, group=_project_of)
+
+    def on_change(self, rel_path: str, full_path: str):
+        self.tracker.apply(rel_path, full_path)
+
+    def evaluate(self, now: float) -> str | None:
+        oversized = sorted((name, size) for name, size in self.tracker.totals.items() if name and size > self.max_bytes)
+        if not oversized:
+            return None
+        details = ", ".join(f"'{name}' ({size / 1024 / 1024:.0f} MB)" for name, size in oversized)
+        return (f"Os seguintes projetos ultrapassaram o limite de {self.max_bytes / 1024 / 1024:.0f} MB em disco: {details}. "
+                "Verifique se há artefatos de build, ambientes virtuais ou dados gerados que possam ser removidos.")
+
+
+@register_check
+class OversizedLogsCheck(AuditCheck):
+    """Arquivos em logs/ maiores que 'max_mb' MB."""
+    ticket_name = "oversized_logs.md"
+    watches = ("logs",)
+
+    def __init__(self, max_mb: float = 50):
+        self.max_bytes = max_mb * 1024 * 1024
+        self.tracker = FileTracker("logs")
+
+    def on_change(self, rel_path: str, full_path: str):
+        self.tracker.apply(rel_path, full_path)
+
+    def evaluate(self, now: float) -> str | None:
+        oversized = sorted((path, size) for path, (size, _) in self.tracker.files.items() if size > self.max_bytes)
+        if not oversized:
+            return None
+        details = ", ".join(f"'{path}' ({size / 1024 / 1024:.0f} MB)" for path, size in oversized)
+        return (f"Os seguintes arquivos de log ultrapassaram {self.max_bytes / 1024 / 1024:.0f} MB: {details}. "
+                "Recomenda-se rotacioná-los ou arquivá-los.")
+
+
+@register_check
+class StalePlansQueueCheck(AuditCheck):
+    """
+    Planos .json deixados em workspace/plans_queue há mais de 'max_age' segundos. A pasta só
+    é importada para a fila na inicialização; arquivos que chegam depois ficam parados.
+    """
+    ticket_name = "stale_plans_queue.md"
+    watches = ("workspace/plans_queue",)
+
+    def __init__(self, max_age: float = 600):
+        self.max_age = max_age
+        self.tracker = FileTracker("workspace/plans_queue")
+
+    def on_change(self, rel_path: str, full_path: str):
+        self.tracker.apply(rel_path, full_path)
+
+    def _plans(self):
+        return {path: mtime for path, (_, mtime) in self.tracker.files.items() if path.endswith(".json")}
+
+    def evaluate(self, now: float) -> str | None:
+        stale = sorted(os.path.basename(path) for path, mtime in self._plans().items() if now - mtime > self.max_age)
+        if not stale:
+            return None
+        names = ", ".join(f"'{name}'" for name in stale)
+        return (f"Os seguintes planos estão parados em workspace/plans_queue há mais de {self.max_age / 60:.0f} minutos: {names}. "
+                "Eles só são importados para a fila de planos quando o sistema inicia.")
+
+    def next_due(self) -> float | None:
+        return _future(mtime + self.max_age for mtime in self._plans().values())
@@ -0,0 +1,221 @@
+# src/core/audit_engine.py
+
+import os
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("AuditEngine")
+
+_registered_checks = []
+
+
+def register_check(check_class):
+    """Decorador que adiciona uma classe de AuditCheck às verificações padrão do Auditor."""
+    _registered_checks.append(check_class)
+    return check_class
+
+
+class AuditCheck:
+    """
+    Uma verificação incremental do Auditor.
+
+    'watches' lista caminhos (relativos à raiz do sistema, com '/') de interesse; a
+    verificação recebe em 'on_change' cada arquivo ou diretório alterado dentro deles e
+    mantém o próprio estado, de modo que 'evaluate' seja barato. Verificações que dependem
+    do tempo (ex: "arquivo parado há mais de 5 minutos") informam em 'next_due' quando
+    precisam ser reavaliadas mesmo sem mudanças.
+    """
+    ticket_name = ""
+    watches: tuple[str, ...] = ()
+
+    def on_change(self, rel_path: str, full_path: str):
+        """Chamado para cada caminho alterado (criado, modificado ou removido) sob 'watches'."""
+        raise NotImplementedError
+
+    def evaluate(self, now: float) -> str | None:
+        """Retorna a descrição do problema encontrado, ou None se está tudo certo."""
+        raise NotImplementedError
+
+    def next_due(self) -> float | None:
+        """Instante (time.time()) da próxima reavaliação por tempo, se houver."""
+        return None
+
+
+def iter_files(full_path: str):
+    """Arquivos em 'full_path' (ele próprio, se for um arquivo), para tratar eventos de diretório."""
+    if os.path.isfile(full_path):
+        yield full_path
+        return
+    for dirpath, _, filenames in os.walk(full_path):
+        for filename in filenames:
+            yield os.path.join(dirpath, filename)
+
+
+def resolve_watch(rel_path: str, full_path: str, watch: str) -> str:
+    """Caminho absoluto de 'watch' a partir de um evento em 'rel_path' (ele próprio ou um ancestral)."""
+    if rel_path == watch:
+        return full_path
+    return os.path.join(full_path, os.path.relpath(watch, rel_path))
+
+
+class FileTracker:
+    """
+    Estado incremental (tamanho e mtime) dos arquivos sob 'prefix', com totais por grupo
+    (ex: por projeto). Diretórios já conhecidos não são varridos de novo: só diretórios
+    novos (criados ou movidos para dentro) custam uma varredura.
+    """
+    def __init__(self, prefix: str, group=None):
+        self.prefix = prefix
+        self.group = group or (lambda rel_path: rel_path)
+        self.files: dict[str, tuple[int, float]] = {}
+        self.dirs: set[str] = set()
+        self.totals: dict[str, int] = {}
+        self._counts: dict[str, int] = {}
+
+    def apply(self, rel_path: str, full_path: str):
+        if rel_path != self.prefix and not rel_path.startswith(self.prefix + "/"):
+            # Evento num diretório ancestral: trata como evento no próprio prefixo
+            full_path = resolve_watch(rel_path, full_path, self.prefix)
+            rel_path = self.prefix
+        if os.path.isfile(full_path):
+            self._set(rel_path, full_path)
+        elif os.path.isdir(full_path):
+            if rel_path in self.dirs:
+                return
+            for dirpath, dirnames, filenames in os.walk(full_path):
+                rel_dir = (rel_path + "/" + os.path.relpath(dirpath, full_path).replace(os.sep, "/")).removesuffix("/.")
+                self.dirs.add(rel_dir)
+                for filename in filenames:
+                    self._set(f"{rel_dir}/{filename}", os.path.join(dirpath, filename))
+        else:
+            prefix = rel_path + "/"
+            self.dirs = {d for d in self.dirs if d != rel_path and not d.startswith(prefix)}
+            for path in [p for p in self.files if p == rel_path or p.startswith(prefix)]:
+                self._remove(path)
+
+    def _set(self, rel_path: str, full_path: str):
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            self._remove(rel_path)
+            return
+        self._remove(rel_path)
+        self.files[rel_path] = (stat.st_size, stat.st_mtime)
+        group = self.group(rel_path)
+        self.totals[group] = self.totals.get(group, 0) + stat.st_size
+        self._counts[group] = self._counts.get(group, 0) + 1
+
+    def _remove(self, rel_path: str):
+        entry = self.files.pop(rel_path, None)
+        if entry is not None:
+            group = self.group(rel_path)
+            self.totals[group] -= entry[0]
+            self._counts[group] -= 1
+            if not self._counts[group]:
+                del self.totals[group], self._counts[group]
+
+
+class AuditEngine:
+    """
+    Distribui as mudanças do sistema de arquivos para as verificações interessadas e
+    avalia apenas as que foram afetadas (ou cujo prazo venceu). Cada problema gera um
+    ticket uma única vez enquanto persistir; ele volta a ser reportado se sumir e reaparecer.
+    """
+    def __init__(self, root: str = ".", checks=None):
+        self.root = os.path.abspath(root)
+        self.checks: list[AuditCheck] = []
+        self._active: dict[str, str] = {}
+        self._dirty: set[int] = set()
+        self._stats: dict[str, tuple] = {}
+        for check in checks or []:
+            self.register(check)
+
+    @classmethod
+    def with_default_checks(cls, root: str = "."):
+        """Engine com todas as verificações registradas via @register_check."""
+        import src.core.audit_checks  # noqa: F401 (registra as verificações padrão)
+        return cls(root, [check_class() for check_class in _registered_checks])
+
+    def register(self, check: AuditCheck):
+        self.checks.append(check)
+        self._dirty.add(len(self.checks) - 1)
+
+    def roots(self) -> list[str]:
+        """Diretórios a observar: o diretório existente mais próximo de cada caminho de interesse."""
+        roots = set()
+        for check in self.checks:
+            for watch in check.watches:
+                path = os.path.join(self.root, watch)
+                while not os.path.isdir(path) and path != self.root:
+                    path = os.path.dirname(path)
+                roots.add(path)
+        # Remove raízes já cobertas por outra
+        return sorted(r for r in roots if not any(r != o and r.startswith(o + os.sep) for o in roots))
+
+    def _relative(self, full_path: str) -> str:
+        return os.path.relpath(full_path, self.root).replace(os.sep, "/")
+
+    def dispatch(self, paths):
+        """Entrega caminhos alterados (absolutos) às verificações que os observam."""
+        for full_path in paths:
+            rel_path = self._relative(full_path)
+            for i, check in enumerate(self.checks):
+                if any(rel_path == w or rel_path.startswith(w + "/") or w.startswith(rel_path + "/") for w in check.watches):
+                    try:
+                        check.on_change(rel_path, full_path)
+                    except Exception as e:
+                        logger.error(f"Verificação '{type(check).__name__}' falhou ao processar '{rel_path}': {e}", exc_info=True)
+                    self._dirty.add(i)
+
+    def prime(self):
+        """Carga inicial: entrega às verificações tudo o que já existe sob os caminhos de interesse."""
+        self.rescan()
+
+    def rescan(self):
+        """
+        Varredura por stat (modo sem watchdog): despacha apenas os arquivos novos,
+        alterados ou removidos desde a última varredura.
+        """
+        current = {}
+        watched = {os.path.join(self.root, watch) for check in self.checks for watch in check.watches}
+        for path in watched:
+            for full_path in iter_files(path):
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                current[full_path] = (stat.st_size, stat.st_mtime_ns)
+        changed = [path for path, signature in current.items() if self._stats.get(path) != signature]
+        removed = [path for path in self._stats if path not in current]
+        self._stats = current
+        self.dispatch(changed + removed)
+
+    def seconds_until_due(self, now: float | None = None) -> float | None:
+        now = time.time() if now is None else now
+        deadlines = [due for check in self.checks if (due := check.next_due()) is not None and due > now]
+        return min(deadlines) - now if deadlines else None
+
+    def evaluate(self, now: float | None = None) -> list[tuple[str, str]]:
+        """
+        Avalia as verificações afetadas por mudanças ou com prazo vencido.
+
+        Returns:
+            Os problemas novos (ou com descrição alterada), como (nome_do_ticket, descrição).
+        """
+        now = time.time() if now is None else now
+        due = {i for i, check in enumerate(self.checks) if (d := check.next_due()) is not None and d <= now}
+        findings = []
+        for i in sorted(self._dirty | due):
+            check = self.checks[i]
+            try:
+                description = check.evaluate(now)
+            except Exception as e:
+                logger.error(f"Verificação '{type(check).__name__}' falhou: {e}", exc_info=True)
+                continue
+            if description is None:
+                self._active.pop(check.ticket_name, None)
+            elif self._active.get(check.ticket_name) != description:
+                self._active[check.ticket_name] = description
+                findings.append((check.ticket_name, description))
+        self._dirty.clear()
+        return findings
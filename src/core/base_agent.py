@@ -1,45 +1,199 @@
 # src/core/base_agent.py
 
+import asyncio
 import os
-import google.generativeai as genai
-from google.generativeai.types import GenerationConfig
+from src.core.async_runtime import run_sync
+from src.core.code_stream import FenceStripper, stream_to_file
+from src.core.history import SLIDING_WINDOW, ConversationHistory
+from src.core.logger import get_logger
+from src.core.llm_client import LLMBackend, LLMError, LLMRequest, estimate_tokens, get_backend, request_tokens
+from src.core.response_cache import ResponseCache, get_response_cache
+from src.core.tracing import get_tracer
 
 class BaseAgent:
     """
     Classe base para todos os agentes cognitivos (baseados em LLM).
+
+    O histórico da conversa é limitado por 'history_strategy' ("fresh", "sliding_window" ou
+    "summarize", ver src.core.history) e 'max_history_tokens'. A variável de ambiente
+    AGENT_HISTORY_STRATEGY, se definida, substitui a estratégia de todos os agentes.
     """
-    def __init__(self, agent_name: str, system_prompt: str, model_name="gemini-1.5-pro-latest"):
+    def __init__(self, agent_name: str, system_prompt: str, model_name="gemini-1.5-pro-latest",
+                 backend: LLMBackend | None = None, cache: ResponseCache | None = None,
+                 history_strategy: str = SLIDING_WINDOW, max_history_tokens: int = 8000):
         self.agent_name = agent_name
         self.system_prompt = system_prompt
+        self.model_name = model_name
+        self.generation_config = {"temperature": 0.5}
+        self.backend = backend or get_backend()
+        self.cache = cache or get_response_cache()
         
-        self._configure_api_key()
-        
-        self.generation_config = GenerationConfig(temperature=0.5)
-        
-        self.model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=self.generation_config,
-            system_instruction=self.system_prompt
+        # Histórico limitado da conversa do agente, com a contagem de tokens por chamada
+        self.history = ConversationHistory(
+            agent_name,
+            strategy=os.environ.get("AGENT_HISTORY_STRATEGY") or history_strategy,
+            max_tokens=max_history_tokens,
+            summarizer=self._summarize_history
         )
-        
-        self.chat = self.model.start_chat(history=[])
+        self._history_lock = None
 
-    def _configure_api_key(self):
-        api_key = os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError(f"[{self.agent_name}] A variável de ambiente GEMINI_API_KEY não foi encontrada.")
-        genai.configure(api_key=api_key)
-
-    def think(self, user_prompt: str) -> str:
+    async def think_async(self, user_prompt: str, use_history: bool = True, use_cache: bool = True) -> str:
         """
+        Envia um prompt para o modelo e retorna a resposta completa, sem bloquear o event loop.
+
+        Com use_history=False a geração é independente do histórico do agente, o que permite
+        várias chamadas simultâneas do mesmo agente (ex: arquivos gerados em paralelo).
+        Respostas idênticas já geradas vêm do cache de respostas, a menos que use_cache=False.
 
-        Envia um prompt para o modelo e retorna a resposta completa.
+        Raises:
+            LLMError: Se a geração falhar depois das retentativas do backend.
         """
         try:
-            response = self.chat.send_message(user_prompt)
-            return response.text
+            if not use_history:
+                request = self._build_request(user_prompt, history=[])
+                response_text = await self._generate(request, use_cache)
+                self.history.track(request_tokens(request), response_text)
+                return response_text
+
+            if self._history_lock is None:
+                self._history_lock = asyncio.Lock()
+            async with self._history_lock:
+                request = self._build_request(user_prompt, history=self.history.context())
+                response_text = await self._generate(request, use_cache)
+                self.history.track(request_tokens(request), response_text)
+                await self.history.record(user_prompt, response_text)
+            get_logger(self.agent_name).debug(
+                f"Prompt com ~{self.history.last_prompt_tokens} tokens; histórico com ~{self.history.context_tokens()}."
+            )
+            return response_text
+        except LLMError:
+            raise
         except Exception as e:
-            return f"Erro: Não consegui processar o pedido. Detalhes: {e}"
+            raise LLMError(f"[{self.agent_name}] Não consegui processar o pedido. Detalhes: {e}") from e
+
+    async def _generate(self, request: LLMRequest, use_cache: bool) -> str:
+        with get_tracer().span("llm.generate", "llm", agent=self.agent_name, model=self.model_name,
+                               prompt_tokens=request_tokens(request)) as span:
+            if use_cache:
+                cached_text = await asyncio.to_thread(self.cache.get, request)
+                if cached_text is not None:
+                    span.set(cached=True, response_tokens=estimate_tokens(cached_text))
+                    return cached_text
+            response_text = await self.backend.generate(request)
+            span.set(cached=False, response_tokens=estimate_tokens(response_text))
+            if use_cache:
+                await asyncio.to_thread(self.cache.put, request, response_text)
+            return response_text
+
+    async def think_stream(self, user_prompt: str, use_cache: bool = True, use_history: bool = False):
+        """
+        Gera a resposta em pedaços (async generator). Por padrão não usa o histórico do agente;
+        com use_history=True, o histórico entra no prompt e a resposta completa é registrada
+        nele (chamadas com histórico do mesmo agente são serializadas).
+        Um cache hit é entregue como um único pedaço; falhas do backend são propagadas.
+        """
+        if not use_history:
+            async for chunk in self._stream(user_prompt, [], use_cache):
+                yield chunk
+            return
+
+        if self._history_lock is None:
+            self._history_lock = asyncio.Lock()
+        async with self._history_lock:
+            chunks = []
+            async for chunk in self._stream(user_prompt, self.history.context(), use_cache):
+                chunks.append(chunk)
+                yield chunk
+            await self.history.record(user_prompt, "".join(chunks))
+
+    async def _stream(self, user_prompt: str, history: list[dict], use_cache: bool):
+        request = self._build_request(user_prompt, history=history)
+        with get_tracer().span("llm.stream", "llm", activate=False, agent=self.agent_name, model=self.model_name,
+                               prompt_tokens=request_tokens(request)) as span:
+            if use_cache:
+                cached_text = await asyncio.to_thread(self.cache.get, request)
+                if cached_text is not None:
+                    span.set(cached=True, response_tokens=estimate_tokens(cached_text))
+                    yield cached_text
+                    return
+
+            chunks = []
+            async for chunk in self.backend.stream(request):
+                chunks.append(chunk)
+                yield chunk
+            response_text = "".join(chunks)
+            span.set(cached=False, response_tokens=estimate_tokens(response_text), chunks=len(chunks))
+        self.history.track(request_tokens(request), response_text)
+        if use_cache and chunks:
+            await asyncio.to_thread(self.cache.put, request, response_text)
+
+    async def _summarize_history(self, previous_summary: str, turns: list[dict]) -> str:
+        """Resume turnos antigos do histórico com o próprio modelo do agente (estratégia "summarize")."""
+        transcript = "\n\n".join(
+            f"{'Usuário' if turn['role'] == 'user' else 'Agente'}: {turn['text']}" for turn in turns
+        )
+        prompt = (
+            "Resuma a conversa abaixo em no máximo 15 tópicos curtos, preservando decisões, nomes de "
+            "arquivos, projetos e requisitos que ainda possam ser relevantes. Responda apenas com o resumo.\n\n"
+            f"Resumo anterior:\n{previous_summary or '(nenhum)'}\n\nConversa:\n{transcript}"
+        )
+        request = LLMRequest(
+            model_name=self.model_name,
+            system_prompt="Você resume conversas de forma fiel e concisa.",
+            prompt=prompt,
+            generation_config={"temperature": 0.0},
+            history=[]
+        )
+        summary = await self._generate(request, use_cache=True)
+        self.history.track(request_tokens(request), summary)
+        return summary.strip()
+
+    async def stream_code_to_file(self, file_path: str, user_prompt: str, languages: tuple[str, ...] = (),
+                                  use_cache: bool = True) -> int:
+        """
+        Gera código em streaming direto para 'file_path', removendo a cerca ``` e a linha de
+        linguagem à medida que os pedaços chegam. Retorna o número de bytes gravados.
+        """
+        progress_step = 16 * 1024
+        next_report = [progress_step]
+
+        def on_progress(bytes_written):
+            if bytes_written >= next_report[0]:
+                get_logger(self.agent_name).info(f"'{os.path.basename(file_path)}': {bytes_written // 1024} KB gerados...")
+                next_report[0] = bytes_written + progress_step
+
+        with get_tracer().span("stream_to_file", "write", file=os.path.basename(file_path)) as span:
+            bytes_written = await stream_to_file(
+                self.think_stream(user_prompt, use_cache=use_cache),
+                file_path,
+                stripper=FenceStripper(languages),
+                on_progress=on_progress
+            )
+            span.set(bytes_written=bytes_written)
+            return bytes_written
+
+    def forget_response(self, user_prompt: str):
+        """
+        Remove do cache a resposta a 'user_prompt' gerada sem histórico (ex: um arquivo
+        reprovado na validação), para que o mesmo pedido não devolva o mesmo resultado.
+        Faz I/O de disco: nas corrotinas, chame-o via asyncio.to_thread.
+        """
+        self.cache.delete(self._build_request(user_prompt, history=[]))
+
+    def think(self, user_prompt: str, use_history: bool = True, use_cache: bool = True) -> str:
+        """
+        Versão síncrona de think_async, executada no event loop compartilhado.
+        """
+        return run_sync(self.think_async(user_prompt, use_history=use_history, use_cache=use_cache))
+
+    def _build_request(self, user_prompt: str, history: list[dict]) -> LLMRequest:
+        return LLMRequest(
+            model_name=self.model_name,
+            system_prompt=self.system_prompt,
+            prompt=user_prompt,
+            generation_config=self.generation_config,
+            history=history
+        )
 
     def write_to_workspace(self, filename: str, content: str):
         """Escreve/sobrescreve um arquivo no workspace."""
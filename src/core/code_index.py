@@ -0,0 +1,374 @@
+# src/core/code_index.py
+
+import ast
+import math
+import os
+import re
+import threading
+import unicodedata
+from src.core.llm_client import estimate_tokens
+from src.core.logger import get_logger
+from src.core.project_map import IGNORED_DIRS, IGNORED_FILES, LANGUAGES
+
+logger = get_logger("CodeIndex")
+
+MAX_FILE_BYTES = 256 * 1024
+WINDOW_LINES = 40
+WINDOW_STEP = 30
+MAX_CHUNK_LINES = 80
+
+# Palavras sem valor de busca (português, inglês e palavras reservadas frequentes)
+_STOPWORDS = {
+    "de", "do", "da", "dos", "das", "um", "uma", "para", "com", "que", "em", "no", "na", "os", "as",
+    "the", "and", "for", "to", "of", "in", "is", "self", "def", "return", "import", "from", "class",
+    "if", "else", "none", "true", "false", "var", "let", "const", "function", "div", "html",
+}
+_WORD = re.compile(r"\w+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_SYMBOL_PATTERNS = {
+    "javascript": re.compile(r"\bfunction\s+(\w+)|\b(?:const|let|var|class)\s+(\w+)"),
+    "typescript": re.compile(r"\bfunction\s+(\w+)|\b(?:const|let|var|class|interface|type)\s+(\w+)"),
+    "html": re.compile(r"\bid=[\"']([\w-]+)[\"']|<title>([^<]+)</title>|\{%\s*block\s+(\w+)"),
+    "css": re.compile(r"(?:^|[\s,}])[.#]([\w-]+)", re.MULTILINE),
+    "sql": re.compile(r"\bcreate\s+(?:table|view|index)\s+(?:if\s+not\s+exists\s+)?(\w+)", re.IGNORECASE),
+    "shell": re.compile(r"^\s*(?:function\s+)?(\w+)\s*\(\)", re.MULTILINE),
+}
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Termos de busca: cada palavra em minúsculas e sem acentos e, para identificadores
+    compostos, também as partes ('get_user_name' → get_user_name, get, user, name;
+    'UserProfile' → userprofile, user, profile).
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        parts = [p for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        for term in [word] + (parts if len(parts) > 1 else []):
+            term = _fold(term)
+            if len(term) > 1 and term not in _STOPWORDS:
+                terms.append(term)
+    return terms
+
+
+class Chunk:
+    """Um trecho indexado de um arquivo (linhas 'start'..'end', 1-based) e os símbolos que ele define."""
+    __slots__ = ("project", "path", "start", "end", "text", "symbols", "terms", "length")
+
+    def __init__(self, project: str, path: str, start: int, end: int, text: str, symbols: list[str]):
+        self.project = project
+        self.path = path
+        self.start = start
+        self.end = end
+        self.text = text
+        self.symbols = symbols
+        self.terms: dict[str, int] = {}
+        for term in tokenize(text) + tokenize(" ".join(symbols)):
+            self.terms[term] = self.terms.get(term, 0) + 1
+        self.length = sum(self.terms.values())
+
+    def __repr__(self):
+        return f"Chunk({self.project}/{self.path}:{self.start}-{self.end}, {self.symbols[:3]})"
+
+
+def _python_chunks(text: str) -> list[tuple[int, int, list[str]]] | None:
+    """Trechos de um módulo Python: cada def/class de nível superior (classes grandes por método) e o código solto entre eles."""
+    try:
+        tree = ast.parse(text)
+    except SyntaxError:
+        return None
+    chunks = []
+    loose_start, loose_symbols = None, []
+
+    def flush(end):
+        nonlocal loose_start, loose_symbols
+        if loose_start is not None:
+            chunks.append((loose_start, end, loose_symbols))
+        loose_start, loose_symbols = None, []
+
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        end = node.end_lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            flush(start - 1)
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))] if isinstance(node, ast.ClassDef) else []
+            if methods and end - start + 1 > MAX_CHUNK_LINES:
+                first = min([methods[0].lineno] + [d.lineno for d in methods[0].decorator_list])
+                chunks.append((start, first - 1, [node.name]))
+                for method in methods:
+                    method_start = min([method.lineno] + [d.lineno for d in method.decorator_list])
+                    chunks.append((method_start, method.end_lineno, [f"{node.name}.{method.name}", method.name]))
+            else:
+                chunks.append((start, end, [node.name] + [f"{node.name}.{m.name}" for m in methods] + [m.name for m in methods]))
+        else:
+            if loose_start is None:
+                loose_start = start
+            targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+            loose_symbols += [t.id for t in targets if isinstance(t, ast.Name)]
+            if end - loose_start + 1 >= MAX_CHUNK_LINES:
+                flush(end)
+    flush(len(text.splitlines()))
+    return chunks
+
+
+def _window_chunks(text: str, language: str) -> list[tuple[int, int, list[str]]]:
+    """Janelas de linhas sobrepostas, com os símbolos encontrados por expressões simples da linguagem."""
+    lines = text.splitlines()
+    pattern = _SYMBOL_PATTERNS.get(language)
+    chunks = []
+    for start in range(0, max(len(lines), 1), WINDOW_STEP):
+        window = "\n".join(lines[start:start + WINDOW_LINES])
+        symbols = []
+        if pattern:
+            symbols = [next(g for g in match.groups() if g).strip() for match in pattern.finditer(window)]
+        chunks.append((start + 1, min(start + WINDOW_LINES, len(lines)), list(dict.fromkeys(symbols))))
+        if start + WINDOW_LINES >= len(lines):
+            break
+    return chunks
+
+
+class _ProjectIndex:
+    """Índice invertido (BM25) de um projeto, atualizado arquivo a arquivo."""
+    def __init__(self):
+        self.files: dict[str, tuple[int, float, list[Chunk]]] = {}
+        self.postings: dict[str, dict[Chunk, int]] = {}
+        self.symbols: dict[str, set[Chunk]] = {}
+        self.chunk_count = 0
+        self.total_length = 0
+
+    def remove(self, path: str):
+        _, _, chunks = self.files.pop(path, (0, 0.0, []))
+        for chunk in chunks:
+            for term in chunk.terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk, None)
+                    if not postings:
+                        del self.postings[term]
+            for symbol in chunk.symbols:
+                holders = self.symbols.get(_fold(symbol))
+                if holders is not None:
+                    holders.discard(chunk)
+                    if not holders:
+                        del self.symbols[_fold(symbol)]
+            self.chunk_count -= 1
+            self.total_length -= chunk.length
+
+    def add(self, path: str, size: int, mtime: float, chunks: list[Chunk]):
+        self.remove(path)
+        self.files[path] = (size, mtime, chunks)
+        for chunk in chunks:
+            for term, frequency in chunk.terms.items():
+                self.postings.setdefault(term, {})[chunk] = frequency
+            for symbol in chunk.symbols:
+                self.symbols.setdefault(_fold(symbol), set()).add(chunk)
+            self.chunk_count += 1
+            self.total_length += chunk.length
+
+    def score(self, terms: list[str], k1: float = 1.2, b: float = 0.75, symbol_boost: float = 2.0) -> dict[Chunk, float]:
+        scores: dict[Chunk, float] = {}
+        if not self.chunk_count:
+            return scores
+        average = self.total_length / self.chunk_count
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (self.chunk_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk, frequency in postings.items():
+                norm = frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * chunk.length / average))
+                scores[chunk] = scores.get(chunk, 0.0) + idf * norm
+            # Um termo que é o nome de um símbolo definido no trecho pesa mais que uma menção
+            for chunk in self.symbols.get(term, ()):
+                scores[chunk] = scores.get(chunk, 0.0) + symbol_boost * idf
+        return scores
+
+
+class CodeIndex:
+    """
+    Índice de busca sobre os projetos gerados em 'root' (workspace/output): cada arquivo
+    de texto é dividido em trechos (funções e classes em Python, janelas de linhas nas
+    demais linguagens), indexados por termos (BM25) e pelos símbolos que definem.
+
+    Cada projeto tem seu próprio índice, atualizado incrementalmente: 'update' reindexa
+    só os arquivos indicados, e 'scan' só os que mudaram de tamanho ou mtime. O
+    LibrarianAgent repassa as mudanças do FileWatcher e o Orquestrador avisa cada arquivo
+    gravado, então as buscas não tocam no disco.
+    """
+    def __init__(self, root: str = "workspace/output"):
+        self.root = os.path.abspath(root)
+        self._projects: dict[str, _ProjectIndex] = {}
+        self._scanned = False
+        self._lock = threading.RLock()
+
+    # --- Atualização ---
+
+    def scan(self, project: str | None = None) -> int:
+        """Reindexa os arquivos alterados (de um projeto ou de todos). Retorna quantos foram reindexados."""
+        with self._lock:
+            if project is None:
+                names = [d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))] if os.path.isdir(self.root) else []
+                for gone in set(self._projects) - set(names):
+                    del self._projects[gone]
+                self._scanned = True
+            else:
+                names = [project]
+            return sum(self._scan_project(name) for name in names)
+
+    def _scan_project(self, project: str) -> int:
+        project_root = os.path.join(self.root, project)
+        index = self._projects.setdefault(project, _ProjectIndex())
+        seen, changed = set(), 0
+        for dirpath, dirnames, filenames in os.walk(project_root):
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(dirpath, filename), project_root).replace(os.sep, "/")
+                seen.add(path)
+                changed += self._index_file(project, path)
+        for path in set(index.files) - seen:
+            index.remove(path)
+            changed += 1
+        if not index.files:
+            del self._projects[project]
+        return changed
+
+    def update(self, paths) -> int:
+        """Reindexa caminhos absolutos alterados (arquivos ou diretórios); os de fora de 'root' são ignorados."""
+        changed = 0
+        with self._lock:
+            for path in paths:
+                rel_path = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+                if rel_path == "." or rel_path.startswith("../"):
+                    if rel_path == ".":
+                        changed += self.scan()
+                    continue
+                project, _, file_path = rel_path.partition("/")
+                if not file_path or os.path.isdir(path):
+                    changed += self._scan_project(project) if os.path.isdir(os.path.join(self.root, project)) else self._drop(project)
+                else:
+                    changed += self._index_file(project, file_path)
+        return changed
+
+    def _drop(self, project: str) -> int:
+        return 1 if self._projects.pop(project, None) is not None else 0
+
+    def _index_file(self, project: str, path: str) -> int:
+        index = self._projects.setdefault(project, _ProjectIndex())
+        full_path = os.path.join(self.root, project, path)
+        language = LANGUAGES.get(os.path.splitext(path)[1].lower())
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            if path in index.files:
+                index.remove(path)
+                return 1
+            return 0
+        name = os.path.basename(path)
+        # Arquivos ocultos incluem os temporários das gravações atômicas (src.core.code_stream)
+        if name.startswith(".") or name in IGNORED_FILES or language is None or stat.st_size > MAX_FILE_BYTES:
+            return 0
+        known = index.files.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+            return 0
+        try:
+            with open(full_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return 0
+        spans = (_python_chunks(text) if language == "python" else None) or _window_chunks(text, language)
+        lines = text.splitlines()
+        chunks = [
+            Chunk(project, path, start, end, "\n".join(lines[start - 1:end]), symbols)
+            for start, end, symbols in spans if any(line.strip() for line in lines[start - 1:end])
+        ]
+        index.add(path, stat.st_size, stat.st_mtime, chunks)
+        return 1
+
+    # --- Busca ---
+
+    def projects(self) -> list[str]:
+        with self._lock:
+            if not self._scanned:
+                self.scan()
+            return sorted(self._projects)
+
+    def projects_mentioned(self, text: str) -> list[str]:
+        """Projetos indexados citados no texto ('saas_platform' também casa com 'saas platform')."""
+        folded = _fold(text)
+        return [name for name in self.projects()
+                if re.search(rf"(?<!\w){re.escape(_fold(name))}(?!\w)", folded)
+                or re.search(rf"(?<!\w){re.escape(_fold(name).replace('_', ' ').replace('-', ' '))}(?!\w)", folded)]
+
+    def search(self, query: str, project: str | None = None, k: int = 5) -> list[tuple[float, Chunk]]:
+        """Os 'k' trechos mais relevantes para a consulta (num projeto ou em todos), com suas pontuações."""
+        terms = tokenize(query)
+        with self._lock:
+            if not self._scanned:
+                self.scan()
+            indexes = [self._projects[project]] if project in self._projects else ([] if project else list(self._projects.values()))
+            scored = [(score, chunk) for index in indexes for chunk, score in index.score(terms).items()]
+        scored.sort(key=lambda item: (-item[0], item[1].project, item[1].path, item[1].start))
+        return scored[:k]
+
+    def context(self, query: str, project: str | None = None, token_budget: int = 1500, k: int = 8) -> str:
+        """
+        Os trechos mais relevantes formatados para um prompt, sem passar de 'token_budget'
+        (tokens estimados). Trechos que não cabem, ou que se sobrepõem a um já escolhido,
+        são pulados em favor dos seguintes.
+        Retorna "" se nada relevante foi encontrado.
+        """
+        sections, used, taken = [], 0, []
+        for _, chunk in self.search(query, project, k):
+            # Janelas sobrepostas do mesmo arquivo repetiriam as mesmas linhas
+            if any(c.path == chunk.path and c.project == chunk.project and c.start <= chunk.end and chunk.start <= c.end for c in taken):
+                continue
+            section = f"--- {chunk.project}/{chunk.path} (linhas {chunk.start}-{chunk.end}) ---\n{chunk.text}"
+            cost = estimate_tokens(section)
+            if used + cost > token_budget:
+                continue
+            sections.append(section)
+            taken.append(chunk)
+            used += cost
+        return "\n".join(sections)
+
+    def outline(self, project: str, max_symbols: int = 12) -> str:
+        """Arquivos do projeto com os símbolos que cada um define, um por linha."""
+        with self._lock:
+            if not self._scanned:
+                self.scan()
+            index = self._projects.get(project)
+            if index is None:
+                return ""
+            lines = []
+            for path, (_, _, chunks) in sorted(index.files.items()):
+                symbols = list(dict.fromkeys(s for chunk in chunks for s in chunk.symbols if "." not in s))
+                suffix = ", ".join(symbols[:max_symbols]) + (", ..." if len(symbols) > max_symbols else "")
+                lines.append(f"- {path}" + (f": {suffix}" if suffix else ""))
+            return "\n".join(lines)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "projects": len(self._projects),
+                "files": sum(len(index.files) for index in self._projects.values()),
+                "chunks": sum(index.chunk_count for index in self._projects.values()),
+                "terms": sum(len(index.postings) for index in self._projects.values()),
+            }
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_code_index() -> CodeIndex:
+    """Retorna o índice de código compartilhado do processo."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = CodeIndex()
+        return _default_index
@@ -0,0 +1,160 @@
+# src/core/code_stream.py
+
+import os
+import uuid
+
+FENCE = "```"
+
+
+class FenceStripper:
+    """
+    Parser incremental que extrai o primeiro bloco de código (```) de uma resposta em
+    streaming, descartando a linha de linguagem ('python', 'html', ...) e os espaços
+    nas bordas, sem precisar da resposta inteira em memória.
+
+    Texto antes da abertura do bloco é retido até 'max_preamble' caracteres; se nenhuma
+    cerca aparecer até lá, a resposta é tratada como código puro e passa sem alterações.
+    """
+    def __init__(self, languages: tuple[str, ...] = (), max_preamble: int = 2048):
+        self.languages = tuple(lang.lower() for lang in languages)
+        self.max_preamble = max_preamble
+        self._state = "preamble"
+        self._buffer = ""
+        self._pending_ws = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        """Processa um pedaço da resposta e retorna o texto pronto para ser gravado."""
+        self._buffer += chunk
+        output = []
+        while self._buffer:
+            if self._state == "preamble":
+                index = self._buffer.find(FENCE)
+                if index >= 0:
+                    self._buffer = self._buffer[index + len(FENCE):]
+                    self._state = "header"
+                elif len(self._buffer) > self.max_preamble:
+                    self._state = "raw"
+                else:
+                    break
+            elif self._state == "header":
+                newline = self._buffer.find("\n")
+                if newline < 0:
+                    break
+                first_line = self._buffer[:newline]
+                self._buffer = self._buffer[newline + 1:]
+                self._state = "body"
+                if not self._is_language_tag(first_line):
+                    self._buffer = first_line + "\n" + self._buffer
+            elif self._state == "body":
+                index = self._buffer.find(FENCE)
+                if index >= 0:
+                    output.append(self._emit(self._buffer[:index]))
+                    self._buffer = ""
+                    self._pending_ws = ""
+                    self._state = "done"
+                    break
+                # Segura um possível início de cerca ('`' ou '``') no fim do buffer
+                keep = len(self._buffer) - len(self._buffer.rstrip("`"))
+                ready, self._buffer = self._buffer[:len(self._buffer) - keep], self._buffer[len(self._buffer) - keep:]
+                output.append(self._emit(ready))
+                break
+            elif self._state == "raw":
+                output.append(self._buffer)
+                self._buffer = ""
+            else:
+                self._buffer = ""
+        return "".join(output)
+
+    def finish(self) -> str:
+        """Finaliza o parsing e retorna o texto restante."""
+        remaining, self._buffer = self._buffer, ""
+        if self._state in ("preamble", "raw"):
+            # Resposta sem cerca: mantém o texto como veio
+            self._state = "done"
+            return remaining
+        if self._state == "header":
+            self._state = "done"
+            return "" if self._is_language_tag(remaining) else self._emit(remaining)
+        if self._state == "body":
+            self._state = "done"
+            return self._emit(remaining)
+        return ""
+
+    def _is_language_tag(self, line: str) -> bool:
+        tag = line.strip().lower()
+        if not tag:
+            return True
+        return bool(self.languages) and tag.startswith(self.languages)
+
+    def _emit(self, text: str) -> str:
+        """Grava o texto do corpo, removendo espaços iniciais e retendo os finais até saber se são do fim."""
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        text = self._pending_ws + text
+        stripped = text.rstrip()
+        self._pending_ws = text[len(stripped):]
+        return stripped
+
+
+def _temp_path_for(file_path: str) -> str:
+    """Caminho temporário oculto no mesmo diretório do destino, para que o rename seja atômico."""
+    parent_dir = os.path.dirname(file_path) or "."
+    os.makedirs(parent_dir, exist_ok=True)
+    return os.path.join(parent_dir, f".{os.path.basename(file_path)}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+async def stream_to_file(chunks, file_path: str, stripper: FenceStripper | None = None, on_progress=None) -> int:
+    """
+    Grava um async iterator de pedaços de texto em 'file_path' à medida que chegam.
+
+    O conteúdo vai para um arquivo temporário no mesmo diretório, renomeado atomicamente
+    para o destino no final; em caso de erro o destino original fica intacto.
+
+    Args:
+        chunks: Async iterator de str (ex: BaseAgent.think_stream).
+        file_path: Caminho final do arquivo.
+        stripper: Parser opcional aplicado a cada pedaço (ex: FenceStripper).
+        on_progress: Função opcional 'on_progress(bytes_escritos)' chamada a cada pedaço gravado.
+
+    Returns:
+        O número de bytes gravados.
+    """
+    tmp_path = _temp_path_for(file_path)
+    bytes_written = 0
+    try:
+        with open(tmp_path, "x", encoding="utf-8") as f:
+            async for chunk in chunks:
+                text = stripper.feed(chunk) if stripper else chunk
+                if text:
+                    f.write(text)
+                    f.flush()
+                    bytes_written += len(text.encode("utf-8"))
+                    if on_progress:
+                        on_progress(bytes_written)
+            if stripper:
+                text = stripper.finish()
+                f.write(text)
+                bytes_written += len(text.encode("utf-8"))
+        os.replace(tmp_path, file_path)
+        return bytes_written
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_file_atomic(file_path: str, content: str):
+    """Grava um arquivo de uma vez, via arquivo temporário + rename atômico."""
+    tmp_path = _temp_path_for(file_path)
+    try:
+        with open(tmp_path, "x", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,311 @@
+# src/core/env_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import glob
+import shlex
+import shutil
+import sys
+import threading
+import time
+from src.core.code_stream import write_file_atomic
+from src.core.logger import get_logger
+
+logger = get_logger("EnvCache")
+
+OUTPUT_DIR = "workspace/output"
+READY_MARKER = "env_ready.json"
+
+_INSTALL_REQUIREMENTS = re.compile(r"^\s*(?:pip3?|python3?\s+-m\s+pip)\s+install\s+(?:(?:-q|--quiet)\s+)?(?:-r|--requirement)\s+(?P<path>\S+)\s*$")
+_PROJECT_DIR = re.compile(r"^workspace/output/(?P<project>[^/]+)/")
+_PROJECT_IN_COMMAND = re.compile(r"workspace[/\\]output[/\\]([^/\\\s'\"]+)")
+_REQUIREMENT_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*")
+# Linhas que dependem de outros arquivos: o conteúdo do requirements.txt não basta como chave
+_UNHASHABLE = ("-r", "-c", "-e", "--requirement", "--constraint", "--editable", ".", "/", "file:")
+# Requisito com versão exata (após _normalize_requirement), com extras e marcador de ambiente opcionais
+_PINNED = re.compile(r"^[a-z0-9][a-z0-9-]*(?:\[[^\]]*\])?===?[^*,;=<>!~]+(?:;.*)?$")
+LOCK_FILE = "requirements.lock"
+
+
+def parse_requirements_install(command: str) -> tuple[str, str] | None:
+    """
+    Reconhece 'pip install -r workspace/output/<projeto>/requirements.txt' (o passo final dos
+    planos do Arquiteto). Retorna (projeto, caminho do requirements) ou None.
+    """
+    match = _INSTALL_REQUIREMENTS.match(command)
+    if not match:
+        return None
+    path = match["path"].strip("'\"").replace("\\", "/")
+    project = _PROJECT_DIR.match(path)
+    return (project["project"], path) if project else None
+
+
+def _normalize_requirement(line: str) -> str:
+    """'Flask_SQLAlchemy >= 3.0' -> 'flask-sqlalchemy>=3.0' (nome canônico, sem espaços)."""
+    line = "".join(line.split())
+    name = _REQUIREMENT_NAME.match(line)
+    if not name:
+        return line
+    return re.sub(r"[-_.]+", "-", name.group()).lower() + line[name.end():]
+
+
+def read_requirements(requirements_path: str) -> list[str] | None:
+    """
+    Requisitos normalizados e ordenados de um requirements.txt (ordem, comentários, caixa e
+    espaços não importam). Retorna None se o arquivo referencia outros arquivos ou caminhos locais.
+    """
+    requirements = set()
+    with open(requirements_path, "r", encoding="utf-8") as f:
+        for raw_line in f:
+            line = re.split(r"(^|\s)#", raw_line, maxsplit=1)[0].strip()
+            if not line:
+                continue
+            if line.startswith(_UNHASHABLE):
+                return None
+            requirements.add(_normalize_requirement(line))
+    return sorted(requirements)
+
+
+def is_pinned(requirements: list[str]) -> bool:
+    """True se cada requisito fixa uma versão exata ('flask==3.0.2'): a instalação não depende do índice."""
+    return all(_PINNED.match(line) for line in requirements)
+
+
+def environment_key(requirements: list[str]) -> str:
+    """Hash de uma lista de requisitos normalizados mais a versão do Python e a plataforma."""
+    payload = "\n".join(sorted(requirements))
+    payload += f"\npython={sys.version_info.major}.{sys.version_info.minor}\nplatform={sys.platform}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def requirements_key(requirements_path: str) -> str | None:
+    """
+    Chave dos requisitos pedidos num requirements.txt (ver read_requirements), ou None se o
+    arquivo não pode ser usado como chave. Só identifica o ambiente quando todas as versões
+    estão fixadas; do contrário, a chave do ambiente vem das versões resolvidas (ver
+    EnvironmentCache.ensure).
+    """
+    requirements = read_requirements(requirements_path)
+    return None if requirements is None else environment_key(requirements)
+
+
+class EnvironmentCache:
+    """
+    Ambientes virtuais compartilhados entre projetos gerados, um por conjunto de versões.
+
+    Cada ambiente fica em 'root/<chave>' e o projeto ganha um link '.venv' para ele. A chave
+    é a das versões que a instalação obteria: os próprios requisitos quando todos fixam a
+    versão ('=='), ou as versões resolvidas pelo pip ('pip install --dry-run --report') quando
+    algum não fixa. Assim um 'flask' sem versão não reaproveita um ambiente montado antes de
+    um novo lançamento. O ambiente é instalado a partir dessas versões ('requirements.lock'),
+    e projetos que resolvem para as mesmas versões o reutilizam sem nenhuma instalação. As instalações usam apenas a wheelhouse local ('pip install --no-index');
+    só quando falta alguma roda ela é completada com 'pip wheel' (exceto em modo offline,
+    ENV_CACHE_OFFLINE=1, em que a wheelhouse precisa já conter tudo).
+    """
+    def __init__(self, root: str = "workspace/envs", wheelhouse: str = "workspace/wheelhouse", offline: bool | None = None):
+        self.root = root
+        self.wheelhouse = wheelhouse
+        self.offline = os.environ.get("ENV_CACHE_OFFLINE", "0") == "1" if offline is None else offline
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def bin_dir(env_dir: str) -> str:
+        return os.path.join(env_dir, "Scripts" if os.name == "nt" else "bin")
+
+    @classmethod
+    def python_path(cls, env_dir: str) -> str:
+        return os.path.join(cls.bin_dir(env_dir), "python.exe" if os.name == "nt" else "python")
+
+    def env_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def is_ready(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.env_path(key), READY_MARKER))
+
+    def environment_for(self, project: str) -> str | None:
+        """Diretório '.venv' do ambiente vinculado ao projeto, se houver."""
+        env_dir = os.path.abspath(os.path.join(OUTPUT_DIR, project, ".venv"))
+        return env_dir if os.path.exists(self.python_path(env_dir)) else None
+
+    @staticmethod
+    def marker(env_dir: str) -> dict | None:
+        """Conteúdo do marcador do ambiente (requisitos e versões resolvidas), se houver."""
+        try:
+            with open(os.path.join(env_dir, READY_MARKER), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def site_packages(env_dir: str) -> str | None:
+        """Diretório site-packages do ambiente (para ferramentas globais como o PyInstaller)."""
+        pattern = os.path.join(env_dir, "Lib", "site-packages") if os.name == "nt" else os.path.join(env_dir, "lib", "python*", "site-packages")
+        matches = sorted(glob.glob(pattern))
+        return matches[-1] if matches else None
+
+    def project_environment(self, command: str) -> str | None:
+        """Ambiente do projeto que o comando referencia (só quando ele referencia um único projeto)."""
+        projects = set(_PROJECT_IN_COMMAND.findall(command))
+        return self.environment_for(projects.pop()) if len(projects) == 1 else None
+
+    def subprocess_env(self, command: str) -> dict | None:
+        """
+        Variáveis de ambiente para rodar um comando sobre um projeto com ambiente próprio,
+        como se o ambiente estivesse ativado: o 'bin/' do ambiente vem primeiro no PATH e
+        VIRTUAL_ENV aponta para ele. Assim 'python', 'python3.11', 'pytest', 'streamlit' e
+        'flask' usam as dependências do projeto. None se o comando não se refere a um projeto
+        com ambiente (o subprocesso herda o ambiente atual).
+        """
+        env_dir = self.project_environment(command)
+        if env_dir is None:
+            return None
+        env = dict(os.environ)
+        env.pop("PYTHONHOME", None)
+        env["VIRTUAL_ENV"] = env_dir
+        env["PATH"] = os.pathsep.join(filter(None, [self.bin_dir(env_dir), env.get("PATH", "")]))
+        return env
+
+    async def ensure(self, project: str, requirements_path: str, run) -> dict | None:
+        """
+        Garante o ambiente do requirements.txt do projeto e o vincula ao projeto.
+
+        Args:
+            project: Nome do projeto em workspace/output.
+            requirements_path: Caminho do requirements.txt.
+            run: Corrotina run(command) -> dict que executa um comando (no formato do ExecutionAgent).
+
+        Returns:
+            Um dicionário com 'success', 'reason', 'env' e 'reused', ou None se o arquivo
+            não pode ser usado como chave (o chamador deve instalar da forma tradicional).
+        """
+        requested = await asyncio.to_thread(read_requirements, requirements_path)
+        if requested is None:
+            return None
+        if is_pinned(requested):
+            pins = requested
+        else:
+            await asyncio.to_thread(os.makedirs, self.wheelhouse, exist_ok=True)
+            pins, error = await self._resolve(requirements_path)
+            if pins is None:
+                return {"success": False, "reason": f"Não foi possível resolver as versões dos requisitos: {error}",
+                        "env": None, "reused": False}
+        key = environment_key(pins)
+        env_dir = self.env_path(key)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            reused = self.is_ready(key)
+            if reused:
+                logger.info(f"Ambiente '{key}' já existe para estes requisitos; instalação pulada.")
+            else:
+                result = await self._build(key, env_dir, requirements_path, pins, run)
+                if not result["success"]:
+                    return {**result, "env": env_dir, "reused": False}
+            self._link(project, env_dir)
+        reason = "Ambiente reutilizado (requisitos idênticos)." if reused else "Ambiente criado e dependências instaladas."
+        return {"success": True, "reason": reason, "env": env_dir, "reused": reused}
+
+    async def _build(self, key: str, env_dir: str, requirements_path: str, pins: list[str], run) -> dict:
+        logger.info(f"Criando o ambiente '{key}' para '{requirements_path}'.")
+        # Restos de uma criação interrompida (sem o marcador) são descartados
+        await asyncio.to_thread(shutil.rmtree, env_dir, ignore_errors=True)
+        await asyncio.to_thread(os.makedirs, self.wheelhouse, exist_ok=True)
+        python = shlex.quote(self.python_path(env_dir))
+        wheelhouse = shlex.quote(self.wheelhouse)
+        lock_path = os.path.join(env_dir, LOCK_FILE)
+        lock = shlex.quote(lock_path)
+
+        result = await run(f"{shlex.quote(sys.executable)} -m venv {shlex.quote(env_dir)}")
+        if result["success"]:
+            await asyncio.to_thread(write_file_atomic, lock_path, "".join(f"{pin}\n" for pin in pins))
+            install = f"{python} -m pip install --no-index --find-links {wheelhouse} -r {lock}"
+            result = await run(install)
+            if not result["success"] and not self.offline:
+                # Wheelhouse incompleta: baixa (ou compila) as rodas que faltam e tenta de novo
+                logger.info("Rodas ausentes na wheelhouse local; completando com 'pip wheel'.")
+                result = await run(f"{python} -m pip wheel --find-links {wheelhouse} -w {wheelhouse} -r {lock}")
+                if result["success"]:
+                    result = await run(install)
+        if not result["success"]:
+            await asyncio.to_thread(shutil.rmtree, env_dir, ignore_errors=True)
+            return result
+
+        requested = await asyncio.to_thread(self._requested_lines, requirements_path)
+        marker = {
+            "key": key,
+            "requirements": requested,
+            "resolved": await self._freeze(self.python_path(env_dir)),
+            "python": sys.version.split()[0],
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        marker_path = os.path.join(env_dir, READY_MARKER)
+        await asyncio.to_thread(write_file_atomic, marker_path, json.dumps(marker, indent=2, ensure_ascii=False))
+        return result
+
+    @staticmethod
+    def _requested_lines(requirements_path: str) -> list[str]:
+        with open(requirements_path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+    async def _resolve(self, requirements_path: str) -> tuple[list[str] | None, str]:
+        """
+        Versões que uma instalação obteria agora, como 'nome==versão' normalizados, via
+        'pip install --dry-run --report' com o interpretador que cria os ambientes.
+        Em modo offline, só a wheelhouse é consultada. Retorna (versões, erro).
+        """
+        index = ["--no-index"] if self.offline else []
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet", "--report", "-",
+            *index, "--find-links", self.wheelhouse, "-r", requirements_path,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            error = stderr.decode("utf-8", errors="replace").strip().splitlines()
+            return None, error[-1] if error else f"pip terminou com código {process.returncode}"
+        try:
+            report = json.loads(stdout)
+            pins = [f"{item['metadata']['name']}=={item['metadata']['version']}" for item in report["install"]]
+        except (ValueError, KeyError, TypeError) as e:
+            return None, f"relatório do pip inválido ({e})"
+        return sorted(_normalize_requirement(pin) for pin in pins), ""
+
+    async def _freeze(self, python: str) -> list[str]:
+        """Versões efetivamente instaladas no ambiente (pip freeze)."""
+        process = await asyncio.create_subprocess_exec(
+            python, "-m", "pip", "freeze",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        return stdout.decode("utf-8", errors="replace").split()
+
+    def _link(self, project: str, env_dir: str):
+        """Cria (ou atualiza) o link workspace/output/<projeto>/.venv para o ambiente."""
+        project_dir = os.path.join(OUTPUT_DIR, project)
+        link = os.path.join(project_dir, ".venv")
+        target = os.path.relpath(env_dir, project_dir)
+        if os.path.islink(link):
+            if os.readlink(link) == target:
+                return
+            os.remove(link)
+        elif os.path.exists(link):
+            logger.warning(f"'{link}' já existe e não é um link; mantendo o ambiente do próprio projeto.")
+            return
+        try:
+            os.symlink(target, link, target_is_directory=True)
+        except OSError as e:
+            logger.warning(f"Não foi possível vincular '{link}' ao ambiente '{env_dir}': {e}")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_env_cache() -> EnvironmentCache:
+    """Retorna o cache de ambientes compartilhado do processo."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EnvironmentCache()
+        return _default_cache
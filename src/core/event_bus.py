@@ -0,0 +1,71 @@
+# src/core/event_bus.py
+
+import queue
+import threading
+from src.core.logger import get_logger
+
+logger = get_logger("EventBus")
+
+# Tópicos publicados pelo sistema
+USER_INPUT = "user_input"
+PLAN_ENQUEUED = "plan_enqueued"
+PLAN_FINISHED = "plan_finished"
+BUG_TICKET = "bug_ticket"
+SHUTDOWN = "shutdown"
+
+
+class Event:
+    """Um evento publicado no barramento."""
+    def __init__(self, topic: str, payload=None):
+        self.topic = topic
+        self.payload = payload
+
+    def __repr__(self):
+        return f"Event({self.topic!r}, {self.payload!r})"
+
+
+class EventBus:
+    """
+    Barramento de eventos em memória (publish/subscribe) entre threads.
+    Cada assinante recebe uma fila própria e bloqueia em 'get()' até chegar um evento,
+    sem polling. O tópico SHUTDOWN é entregue a todos os assinantes.
+    """
+    def __init__(self):
+        self._subscribers: dict[str, list[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *topics: str) -> queue.Queue:
+        """Cria uma fila que recebe os eventos dos tópicos informados."""
+        events = queue.Queue()
+        with self._lock:
+            for topic in set(topics) | {SHUTDOWN}:
+                self._subscribers.setdefault(topic, []).append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                if events in subscribers:
+                    subscribers.remove(events)
+
+    def publish(self, topic: str, payload=None):
+        """Entrega um evento a todos os assinantes do tópico."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, []))
+        logger.debug(f"Publicando {topic} para {len(subscribers)} assinante(s).")
+        event = Event(topic, payload)
+        for events in subscribers:
+            events.put(event)
+
+
+_default_bus = None
+_default_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Retorna o barramento de eventos compartilhado do processo."""
+    global _default_bus
+    with _default_bus_lock:
+        if _default_bus is None:
+            _default_bus = EventBus()
+        return _default_bus
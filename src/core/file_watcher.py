@@ -0,0 +1,101 @@
+# src/core/file_watcher.py
+
+import os
+import queue
+import threading
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("FileWatcher")
+
+
+class FileWatcher:
+    """
+    Observa uma ou mais árvores de diretórios e entrega os caminhos alterados em lotes.
+
+    Usa o pacote 'watchdog' (inotify/FSEvents/ReadDirectoryChangesW, em requirements.txt).
+    Se ele não estiver instalado, cai para varreduras periódicas: 'wait_for_changes' retorna
+    None a cada 'poll_interval' segundos, sinalizando que o chamador deve reescanear a árvore.
+    """
+    def __init__(self, *roots: str, poll_interval: float = 10.0, debounce: float = 0.3):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._events: queue.Queue = queue.Queue()
+        self._observer = None
+
+    @property
+    def native(self) -> bool:
+        """True se as mudanças vêm de eventos do sistema de arquivos (watchdog)."""
+        return self._observer is not None
+
+    def start(self):
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.warning(f"'watchdog' não instalado; observando {self.roots} por varredura a cada {self.poll_interval:g}s.")
+            return
+
+        events = self._events
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                events.put(event.src_path)
+                dest_path = getattr(event, "dest_path", None)
+                if dest_path:
+                    events.put(dest_path)
+
+        self._observer = Observer()
+        for root in self.roots:
+            os.makedirs(root, exist_ok=True)
+            self._observer.schedule(_Handler(), root, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        logger.info(f"Observando mudanças em {self.roots} via watchdog.")
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        self._events.put(None)
+
+    def wait_for_changes(self, stop_event: threading.Event, timeout: float | None = None) -> set[str] | None:
+        """
+        Bloqueia até haver mudanças (ou até 'timeout' segundos) e retorna os caminhos
+        (absolutos) afetados, agrupando eventos que chegam dentro da janela de 'debounce'.
+
+        Returns:
+            O conjunto de caminhos alterados (vazio se 'stop_event' foi sinalizado ou o
+            'timeout' expirou), ou None no modo de varredura, quando o chamador deve
+            reescanear as árvores.
+        """
+        if not self.native:
+            stop_event.wait(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+            return set() if stop_event.is_set() else None
+
+        paths = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not stop_event.is_set():
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                break
+            try:
+                path = self._events.get(timeout=wait)
+            except queue.Empty:
+                continue
+            if path is None:
+                break
+            paths.add(os.path.abspath(path))
+            break
+        # Agrupa a rajada de eventos de uma mesma gravação (temp + rename, vários arquivos)
+        while paths:
+            try:
+                path = self._events.get(timeout=self.debounce)
+            except queue.Empty:
+                break
+            if path is None:
+                break
+            paths.add(os.path.abspath(path))
+        return paths
@@ -0,0 +1,127 @@
+# src/core/history.py
+
+from src.core.llm_client import estimate_tokens
+from src.core.logger import get_logger
+
+logger = get_logger("History")
+
+FRESH = "fresh"
+SLIDING_WINDOW = "sliding_window"
+SUMMARIZE = "summarize"
+STRATEGIES = (FRESH, SLIDING_WINDOW, SUMMARIZE)
+
+
+class ConversationHistory:
+    """
+    Gerencia o histórico de conversa de um agente, mantendo o tamanho do prompt limitado.
+
+    Estratégias:
+    - "fresh": cada chamada é uma sessão nova; nada é guardado.
+    - "sliding_window": guarda apenas os turnos mais recentes que cabem em 'max_tokens'
+      (e no máximo 'max_turns' pares pergunta/resposta).
+    - "summarize": quando o histórico passa de 'max_tokens', os turnos mais antigos são
+      condensados num resumo por 'summarizer' e os recentes são mantidos.
+
+    Args:
+        summarizer: Corrotina 'summarizer(resumo_anterior, turnos) -> str' usada pela
+            estratégia "summarize". Sem ela (ou se falhar), um resumo local por truncamento é usado.
+    """
+    def __init__(self, agent_name: str, strategy: str = SLIDING_WINDOW, max_tokens: int = 8000,
+                 max_turns: int = 20, summarizer=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Estratégia de histórico desconhecida: '{strategy}'. Opções: {STRATEGIES}")
+        self.agent_name = agent_name
+        self.strategy = strategy
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.summarizer = summarizer
+        self.turns: list[dict] = []
+        self.summary = ""
+        # Contadores de tokens (estimados) enviados e recebidos por este agente
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.last_prompt_tokens = 0
+        self.summarizations = 0
+
+    def context(self) -> list[dict]:
+        """Turnos a enviar antes do próximo prompt (o resumo, se houver, vem primeiro)."""
+        if self.strategy == FRESH:
+            return []
+        context = []
+        if self.summary:
+            context.append({"role": "user", "text": f"Resumo da conversa anterior:\n{self.summary}"})
+            context.append({"role": "model", "text": "Entendido. Vou considerar esse contexto."})
+        return context + self.turns
+
+    def track(self, prompt_tokens: int, response_text: str):
+        """Contabiliza uma chamada ao modelo (com ou sem histórico)."""
+        self.calls += 1
+        self.last_prompt_tokens = prompt_tokens
+        self.prompt_tokens += prompt_tokens
+        self.response_tokens += estimate_tokens(response_text)
+
+    async def record(self, user_prompt: str, response_text: str):
+        """Registra um par pergunta/resposta e aplica a estratégia de limite."""
+        if self.strategy == FRESH:
+            return
+
+        self.turns.append({"role": "user", "text": user_prompt})
+        self.turns.append({"role": "model", "text": response_text})
+        if self.strategy == SLIDING_WINDOW:
+            self._trim_window()
+        elif self.context_tokens() > self.max_tokens:
+            await self._summarize_oldest()
+
+    def context_tokens(self) -> int:
+        return sum(estimate_tokens(turn["text"]) for turn in self.context())
+
+    def reset(self):
+        self.turns.clear()
+        self.summary = ""
+
+    def stats(self) -> dict:
+        return {
+            "agent": self.agent_name,
+            "strategy": self.strategy,
+            "calls": self.calls,
+            "turns": len(self.turns),
+            "context_tokens": self.context_tokens(),
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "summarizations": self.summarizations,
+        }
+
+    def _trim_window(self):
+        while self.turns and (len(self.turns) > 2 * self.max_turns or self.context_tokens() > self.max_tokens):
+            del self.turns[:2]
+
+    async def _summarize_oldest(self):
+        """Condensa os turnos mais antigos até o histórico ocupar no máximo metade do limite."""
+        old_turns = []
+        while len(self.turns) > 2 and self.context_tokens() > self.max_tokens // 2:
+            old_turns.extend(self.turns[:2])
+            del self.turns[:2]
+        if not old_turns:
+            return
+
+        summary = None
+        if self.summarizer:
+            try:
+                summary = await self.summarizer(self.summary, old_turns)
+            except Exception as e:
+                logger.warning(f"[{self.agent_name}] Falha ao resumir o histórico, usando resumo local: {e}")
+        self.summary = summary or self._local_summary(old_turns)
+        self.summarizations += 1
+        logger.debug(f"[{self.agent_name}] Histórico resumido: {len(old_turns)} turnos condensados.")
+
+    def _local_summary(self, old_turns: list[dict], chars_per_turn: int = 200) -> str:
+        lines = [self.summary] if self.summary else []
+        for turn in old_turns:
+            speaker = "Usuário" if turn["role"] == "user" else "Agente"
+            text = " ".join(turn["text"].split())
+            lines.append(f"- {speaker}: {text[:chars_per_turn]}{'...' if len(text) > chars_per_turn else ''}")
+        summary = "\n".join(lines)
+        # ~4 caracteres por token: o resumo local ocupa no máximo um quarto do orçamento
+        return summary[-self.max_tokens:]
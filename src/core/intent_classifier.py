@@ -0,0 +1,303 @@
+# src/core/intent_classifier.py
+
+import glob
+import math
+import os
+import re
+import threading
+import unicodedata
+from src.core.logger import get_logger
+
+logger = get_logger("IntentClassifier")
+
+INTENTS = ("BUILD", "SELF_MODIFY", "RUN", "COMMIT", "UNKNOWN")
+
+# Exemplos do prompt de análise de intenção (PromptEngineerAgent), também usados no treino
+# do modelo local e no benchmark de acurácia.
+INTENT_EXAMPLES = [
+    ("crie um app flask simples",
+     {"intent": "BUILD", "params": {"description": "um app flask simples"}}),
+    ("modifique o arquivo src/core/orchestrator.py para adicionar um log",
+     {"intent": "SELF_MODIFY", "params": {"file_path": "src/core/orchestrator.py", "description": "adicionar um log"}}),
+    ("altere o ExecutionAgent e o Orchestrator para pedir confirmação",
+     {"intent": "SELF_MODIFY", "params": {"file_path": ["src/agents/execution_agent.py", "src/core/orchestrator.py"], "description": "pedir confirmação ao usuário para comandos perigosos"}}),
+    ("execute o comando ls -l",
+     {"intent": "RUN", "params": {"command_to_execute": "ls -l"}}),
+    ("salve meu trabalho com a mensagem 'finalizei'",
+     {"intent": "COMMIT", "params": {"commit_message": "finalizei"}}),
+]
+
+# Frases de treino do modelo bayesiano (além de INTENT_EXAMPLES)
+TRAINING_PHRASES = {
+    "BUILD": [
+        "crie um site de receitas com html e css", "construa uma api rest em fastapi",
+        "quero um jogo da cobrinha em pygame", "faça uma calculadora com interface gráfica",
+        "desenvolva um sistema de login com django", "gere um script que baixa imagens",
+        "preciso de um bot do telegram", "monte uma landing page para minha empresa",
+        "um app de lista de tarefas", "implemente um crud de produtos com sqlite",
+        "criar uma plataforma saas com planos de assinatura", "uma ferramenta de linha de comando para renomear arquivos",
+        "build a todo app", "create a flask api",
+        "crie uma api que execute comandos no servidor", "faça um jogo que salve o placar em arquivo",
+    ],
+    "SELF_MODIFY": [
+        "altere o arquivo src/agents/backend_agent.py para usar streaming",
+        "corrija o bug no src/core/logger.py", "adicione um parâmetro de timeout no ExecutionAgent",
+        "refatore o Orchestrator para usar menos threads", "mude o prompt do ArchitectAgent",
+        "edite o código fonte do sistema para registrar mais logs", "remova o print de debug do orquestrador",
+        "atualize o agente de segurança para bloquear curl", "modifique o seu próprio código",
+        "ajuste o prompt do engenheiro de prompts",
+    ],
+    "RUN": [
+        "execute pip install requests", "rode o comando python main.py", "roda ls -la no workspace",
+        "execute o script de testes", "rodar o servidor", "liste os arquivos do diretório",
+        "mostre o conteúdo do arquivo com cat", "instale as dependências com pip",
+        "run git status", "execute npm install",
+    ],
+    "COMMIT": [
+        "faça commit das alterações", "commit com a mensagem 'ajustes finais'",
+        "salve o trabalho no git", "grave as mudanças no repositório", "commite tudo",
+        "salve meu progresso com a mensagem 'versão 1'", "faça um commit dizendo corrigi o login",
+        "versione as alterações", "git commit", "registre as mudanças no git",
+    ],
+    "UNKNOWN": [
+        "oi", "olá, tudo bem?", "quem é você", "obrigado", "o que você sabe fazer",
+        "qual a previsão do tempo", "me conte uma piada", "bom dia", "explique o que é python",
+        "hmm", "ajuda", "quanto é dois mais dois",
+    ],
+}
+
+_STOPWORDS = {
+    "o", "a", "os", "as", "um", "uma", "de", "do", "da", "dos", "das", "e", "em", "no", "na",
+    "para", "pra", "com", "que", "por", "favor", "meu", "minha", "me", "se", "ao", "the", "to",
+}
+_VERBS_BUILD = r"crie|criar|cria|construa|construir|gere|gerar|desenvolva|desenvolver|fa[cç]a|fazer|monte|montar|implemente|build|create|make|quero|preciso de"
+_VERBS_RUN = r"execute|executar|executa|rode|rodar|roda|run"
+_VERBS_MODIFY = r"modifique|modificar|altere|alterar|edite|editar|mude|mudar|corrija|corrigir|adicione|adicionar|refatore|refatorar|atualize|atualizar|remova|remover|ajuste|ajustar|troque|trocar"
+
+# As regras de RUN e COMMIT só valem para o verbo no início da frase: em "crie uma api que
+# execute o comando ls" o comando faz parte do projeto pedido, não é para rodar agora.
+_START = r"^\s*(?:por favor,?\s*)?"
+_RUN_COMMAND = re.compile(rf"{_START}(?:{_VERBS_RUN})\s+(?:o\s+)?comando\s*:?\s*(?P<command>.+)$", re.IGNORECASE | re.DOTALL)
+_RUN_QUOTED = re.compile(rf"{_START}(?:{_VERBS_RUN})\b[^`]*`(?P<command>[^`]+)`", re.IGNORECASE)
+_RUN_PROMPT = re.compile(r"^\s*\$\s+(?P<command>\S.*)$", re.DOTALL)
+# Aplicada ao texto normalizado (sem acentos)
+_COMMIT = re.compile(rf"{_START}(?:(?:faca|fazer|de)\s+(?:um\s+|o\s+)?commit\w*|commit\w*|comit\w*|salv[ea]\w*|grav[ea]\w*"
+                     r"|versione\w*|registre\w*|git\s+commit)\b", re.IGNORECASE)
+_COMMIT_MESSAGE = re.compile(
+    r"(?:\bmensagem|\bmsg|\bmessage|\s-m)\s*[:=]?\s*(?P<quote>['\"“‘])(?P<message>.+?)['\"”’]", re.IGNORECASE)
+_BUILD = re.compile(rf"^\s*(?:por favor,?\s*)?(?:{_VERBS_BUILD})\b\s+(?P<description>.+)$", re.IGNORECASE | re.DOTALL)
+_MODIFY = re.compile(rf"\b(?:{_VERBS_MODIFY})\b", re.IGNORECASE)
+_SOURCE_PATH = re.compile(r"(?<![\w/.])(?:\./)?(src/[\w/.-]+\.py)\b")
+_DESCRIPTION_AFTER = re.compile(r"^[\s,:;.-]*(?:para|pra|e|que|a fim de)?\s+", re.IGNORECASE)
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def features(text: str) -> list[str]:
+    """Palavras normalizadas (sem stopwords) e marcadores estruturais do texto."""
+    normalized = normalize(text)
+    words = [w for w in re.findall(r"[a-z0-9_]+", normalized) if w not in _STOPWORDS]
+    markers = []
+    if _SOURCE_PATH.search(text):
+        markers.append("<src_path>")
+    if re.search(r"\b[A-Z][a-z]+(?:Agent|Orchestrator)\b|\bOrchestrator\b", text):
+        markers.append("<agent_name>")
+    if "`" in text or re.search(r"\s-{1,2}[a-z]", text):
+        markers.append("<command_syntax>")
+    if re.search(r"['\"“‘].+['\"”’]", text):
+        markers.append("<quoted>")
+    return words + markers
+
+
+class IntentPrediction:
+    """Resultado da classificação local. 'source' é 'rules' ou 'model'."""
+    __slots__ = ("intent", "params", "confidence", "source")
+
+    def __init__(self, intent: str, params: dict, confidence: float, source: str):
+        self.intent = intent
+        self.params = params
+        self.confidence = confidence
+        self.source = source
+
+    def to_dict(self) -> dict:
+        return {"intent": self.intent, "params": self.params, "confidence": round(self.confidence, 3), "source": self.source}
+
+    def __repr__(self):
+        return f"IntentPrediction({self.intent}, {self.params}, {self.confidence:.2f}, {self.source})"
+
+
+class NaiveBayes:
+    """Naive Bayes multinomial com suavização de Laplace, treinado localmente em milissegundos."""
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.log_priors: dict[str, float] = {}
+        self.log_likelihoods: dict[str, dict[str, float]] = {}
+        self.log_unseen: dict[str, float] = {}
+
+    def fit(self, samples: list[tuple[list[str], str]]):
+        counts: dict[str, dict[str, int]] = {}
+        totals: dict[str, int] = {}
+        docs: dict[str, int] = {}
+        vocabulary = set()
+        for tokens, label in samples:
+            docs[label] = docs.get(label, 0) + 1
+            label_counts = counts.setdefault(label, {})
+            for token in tokens:
+                label_counts[token] = label_counts.get(token, 0) + 1
+                totals[label] = totals.get(label, 0) + 1
+                vocabulary.add(token)
+        size = len(vocabulary)
+        for label in docs:
+            denominator = totals.get(label, 0) + self.alpha * size
+            self.log_priors[label] = math.log(docs[label] / len(samples))
+            self.log_likelihoods[label] = {
+                token: math.log((count + self.alpha) / denominator) for token, count in counts[label].items()
+            }
+            self.log_unseen[label] = math.log(self.alpha / denominator)
+        self._vocabulary = vocabulary
+        return self
+
+    def predict(self, tokens: list[str]) -> dict[str, float]:
+        """Probabilidade a posteriori de cada rótulo (tokens fora do vocabulário são ignorados)."""
+        known = [token for token in tokens if token in self._vocabulary]
+        scores = {}
+        for label, prior in self.log_priors.items():
+            likelihoods, unseen = self.log_likelihoods[label], self.log_unseen[label]
+            scores[label] = prior + sum(likelihoods.get(token, unseen) for token in known)
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+
+class IntentClassifier:
+    """
+    Classificador local de intenções, consultado antes do LLM em analyze_user_intent.
+
+    Primeiro aplica regras determinísticas (comando explícito, mensagem de commit entre aspas,
+    caminho em 'src/' ou nome de classe do sistema com verbo de modificação, verbo de criação);
+    se nenhuma se aplica, usa um Naive Bayes sobre palavras e marcadores estruturais.
+    Um texto que começa com um verbo de criação só é classificado localmente como BUILD.
+    Uma regra só vale com confiança alta se o modelo concorda com ela; uma previsão que
+    discorda do modelo, ou cujos parâmetros obrigatórios não puderam ser extraídos, tem a
+    confiança limitada a 'UNSURE_CONFIDENCE', o que leva o chamador a consultar o LLM.
+    """
+    RULE_CONFIDENCE = 0.97
+    UNSURE_CONFIDENCE = 0.5
+
+    def __init__(self, source_root: str = "src"):
+        self.source_root = source_root
+        samples = [(features(text), expected["intent"]) for text, expected in INTENT_EXAMPLES]
+        samples += [(features(text), intent) for intent, phrases in TRAINING_PHRASES.items() for text in phrases]
+        self.model = NaiveBayes().fit(samples)
+        self._symbols = None
+
+    # --- Símbolos do próprio sistema ---
+
+    def symbols(self) -> tuple[dict[str, str], re.Pattern | None]:
+        """
+        Nomes de classes (e de módulos) em 'source_root' → caminho do arquivo, e uma única
+        expressão que encontra qualquer um deles no texto.
+        """
+        if self._symbols is None:
+            symbols = {}
+            for path in sorted(glob.glob(os.path.join(self.source_root, "**", "*.py"), recursive=True)):
+                path = path.replace(os.sep, "/")
+                module = os.path.splitext(os.path.basename(path))[0]
+                if module != "__init__":
+                    symbols.setdefault(f"{module}.py", path)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        for name in re.findall(r"^class\s+(\w+)", f.read(), re.MULTILINE):
+                            symbols.setdefault(name, path)
+                except OSError:
+                    continue
+            names = sorted(symbols, key=len, reverse=True)
+            pattern = re.compile(rf"(?<![\w/.])(?:{'|'.join(map(re.escape, names))})\b") if names else None
+            self._symbols = (symbols, pattern)
+        return self._symbols
+
+    def _referenced_files(self, text: str) -> tuple[list[str], int]:
+        """Arquivos do sistema citados no texto e a posição onde termina a última citação."""
+        found, end = [], 0
+        for match in _SOURCE_PATH.finditer(text):
+            found.append((match.start(), match.group(1)))
+            end = max(end, match.end())
+        symbols, pattern = self.symbols()
+        for match in pattern.finditer(text) if pattern else ():
+            found.append((match.start(), symbols[match.group(0)]))
+            end = max(end, match.end())
+        paths = []
+        for _, path in sorted(found):
+            if path not in paths:
+                paths.append(path)
+        return paths, end
+
+    # --- Classificação ---
+
+    def classify(self, text: str) -> IntentPrediction:
+        text = text.strip()
+        posteriors = self.model.predict(features(text))
+        best = max(posteriors, key=posteriors.get)
+        # "crie um jogo que salve o placar..." é um pedido de criação, mas "faça commit" não
+        starts_with_build = bool(_BUILD.match(text)) and not _COMMIT.match(normalize(text))
+        for intent in ("BUILD",) if starts_with_build else ("RUN", "COMMIT", "BUILD", "SELF_MODIFY"):
+            params = self._params(intent, text, strict=True)
+            if params is not None:
+                # Regra e modelo discordando (ex: "faça commit" casa com a regra de criação)
+                confidence = self.RULE_CONFIDENCE if best == intent else self.UNSURE_CONFIDENCE
+                return IntentPrediction(intent, params, confidence, "rules")
+
+        params = self._params(best, text)
+        confidence = posteriors[best]
+        if params is None or (starts_with_build and best != "BUILD"):
+            params, confidence = {}, min(confidence, self.UNSURE_CONFIDENCE)
+        return IntentPrediction(best, params, confidence, "model")
+
+    def _params(self, intent: str, text: str, strict: bool = False) -> dict | None:
+        """Parâmetros obrigatórios de 'intent' extraídos do texto, ou None se faltar algum."""
+        if intent == "RUN":
+            match = _RUN_COMMAND.search(text) or _RUN_QUOTED.search(text) or _RUN_PROMPT.match(text)
+            if not match:
+                return None
+            command = match.group("command").strip().strip("`'\"“”")
+            return {"command_to_execute": command} if command else None
+        if intent == "COMMIT":
+            match = _COMMIT_MESSAGE.search(text)
+            if not match or (strict and not _COMMIT.match(normalize(text))):
+                return None
+            return {"commit_message": match.group("message").strip()}
+        if intent == "SELF_MODIFY":
+            if strict and not _MODIFY.search(normalize(text)):
+                return None
+            paths, end = self._referenced_files(text)
+            if not paths:
+                return None
+            description = _DESCRIPTION_AFTER.sub("", text[end:], count=1).strip(" .") or text
+            return {"file_path": paths[0] if len(paths) == 1 else paths, "description": description}
+        if intent == "BUILD":
+            match = _BUILD.match(text)
+            # Pedidos que citam arquivos ou classes do próprio sistema ficam para o modelo
+            if strict and (not match or self._referenced_files(text)[0]):
+                return None
+            description = match.group("description").strip() if match else text
+            return {"description": description} if description else None
+        return {}
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Retorna o classificador compartilhado do processo (treinado no primeiro uso)."""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = IntentClassifier()
+            logger.debug(f"Classificador de intenções treinado ({len(_classifier.model.log_priors)} classes).")
+        return _classifier
@@ -0,0 +1,277 @@
+# src/core/llm_client.py
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+from src.core.logger import get_logger
+from src.core.model_pool import RETRYABLE_STATUS, LLMError, ModelClientPool, error_from_response, get_model_pool
+
+logger = get_logger("LLMClient")
+
+
+class LLMRequest:
+    """
+    Uma requisição de geração independente do provedor.
+    'history' é uma lista de turnos {"role": "user" | "model", "text": str}.
+    """
+    def __init__(self, model_name: str, system_prompt: str, prompt: str,
+                 generation_config: dict | None = None, history: list[dict] | None = None):
+        self.model_name = model_name
+        self.system_prompt = system_prompt
+        self.prompt = prompt
+        self.generation_config = dict(generation_config or {})
+        self.history = list(history or [])
+
+
+class LLMBackend:
+    """
+    Interface dos backends de LLM. Cada backend implementa 'generate' como corrotina,
+    e as chamadas síncronas passam pelo loop compartilhado de src.core.async_runtime.
+    """
+    name = "base"
+
+    async def generate(self, request: LLMRequest) -> str:
+        raise NotImplementedError(f"O método 'generate' deve ser implementado pela subclasse {self.__class__.__name__}.")
+
+    async def stream(self, request: LLMRequest):
+        """
+        Gera a resposta em pedaços (async generator de str). Backends sem streaming nativo
+        entregam a resposta inteira como um único pedaço.
+        """
+        yield await self.generate(request)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token), usada para a cota por minuto."""
+    return max(1, len(text) // 4)
+
+
+def request_tokens(request: LLMRequest) -> int:
+    """Tokens estimados de uma requisição completa (system prompt, histórico e prompt)."""
+    return estimate_tokens(request.system_prompt + request.prompt + "".join(turn["text"] for turn in request.history))
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Backend para a API REST do Google Gemini, sobre o cliente httpx compartilhado
+    (src.core.model_pool): conexões keep-alive reutilizadas por todos os agentes, proxies
+    do ambiente, limite de taxa por modelo e retentativas com backoff em 429/5xx.
+
+    A URL base pode ser trocada pela variável GEMINI_API_BASE_URL (ex: um servidor falso local).
+    """
+    name = "gemini"
+    default_base_url = "https://generativelanguage.googleapis.com"
+
+    def __init__(self, base_url: str | None = None, api_key: str | None = None, pool: ModelClientPool | None = None):
+        api_key = api_key or os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("[LLMClient] A variável de ambiente GEMINI_API_KEY não foi encontrada.")
+        self._api_key = api_key
+        self.base_url = base_url or os.environ.get("GEMINI_API_BASE_URL", self.default_base_url)
+        self.pool = pool or get_model_pool()
+
+    def _build_body(self, request: LLMRequest) -> bytes:
+        contents = [{"role": turn["role"], "parts": [{"text": turn["text"]}]} for turn in request.history]
+        contents.append({"role": "user", "parts": [{"text": request.prompt}]})
+        body = {"contents": contents, "generationConfig": request.generation_config}
+        if request.system_prompt:
+            body["systemInstruction"] = {"parts": [{"text": request.system_prompt}]}
+        return json.dumps(body).encode("utf-8")
+
+    def _headers(self) -> dict:
+        return {"Content-Type": "application/json", "x-goog-api-key": self._api_key}
+
+    @staticmethod
+    def _parse_response(payload: dict) -> tuple[str, int | None]:
+        candidates = payload.get("candidates") or []
+        parts = candidates[0].get("content", {}).get("parts", []) if candidates else []
+        text = "".join(part.get("text", "") for part in parts)
+        return text, payload.get("usageMetadata", {}).get("totalTokenCount")
+
+    async def generate(self, request: LLMRequest) -> str:
+        http = self.pool.http_pool(self.base_url)
+        path = f"/v1beta/models/{request.model_name}:generateContent"
+        body = self._build_body(request)
+
+        async def operation():
+            status, headers, response_body = await http.request("POST", path, self._headers(), body)
+            if status != 200:
+                raise error_from_response(status, headers, response_body)
+            return self._parse_response(json.loads(response_body))
+
+        return await self.pool.call(request.model_name, request_tokens(request), operation)
+
+    async def stream(self, request: LLMRequest):
+        """Streaming via Server-Sent Events. Só repete a chamada se a falha ocorrer antes do primeiro pedaço."""
+        http = self.pool.http_pool(self.base_url)
+        path = f"/v1beta/models/{request.model_name}:streamGenerateContent?alt=sse"
+        body = self._build_body(request)
+
+        async def open_stream():
+            response = http.stream("POST", path, self._headers(), body)
+            status, headers = await response.__anext__()
+            if status != 200:
+                error_body = b"".join([piece async for piece in response])
+                raise error_from_response(status, headers, error_body)
+            return response, None
+
+        response = await self.pool.call(request.model_name, request_tokens(request), open_stream)
+        buffer = b""
+        try:
+            async for piece in response:
+                buffer += piece
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    line = line.strip()
+                    if line.startswith(b"data:"):
+                        text, _ = self._parse_response(json.loads(line[5:]))
+                        if text:
+                            yield text
+        finally:
+            await response.aclose()
+
+
+class GeminiSDKBackend(LLMBackend):
+    """
+    Backend via biblioteca google-generativeai, com os mesmos limites de taxa e
+    retentativas do pool compartilhado. Os modelos são criados uma vez e reutilizados.
+    """
+    name = "gemini_sdk"
+
+    def __init__(self, pool: ModelClientPool | None = None):
+        api_key = os.environ.get("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("[LLMClient] A variável de ambiente GEMINI_API_KEY não foi encontrada.")
+        self._api_key = api_key
+        self._genai = None
+        self._models = {}
+        self.pool = pool or get_model_pool()
+
+    def _get_model(self, request: LLMRequest):
+        if self._genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self._api_key)
+            self._genai = genai
+
+        key = (request.model_name, request.system_prompt, tuple(sorted(request.generation_config.items())))
+        model = self._models.get(key)
+        if model is None:
+            from google.generativeai.types import GenerationConfig
+            model = self._genai.GenerativeModel(
+                model_name=request.model_name,
+                generation_config=GenerationConfig(**request.generation_config),
+                system_instruction=request.system_prompt
+            )
+            self._models[key] = model
+        return model
+
+    @staticmethod
+    def _build_contents(request: LLMRequest) -> list[dict]:
+        contents = [{"role": turn["role"], "parts": [turn["text"]]} for turn in request.history]
+        contents.append({"role": "user", "parts": [request.prompt]})
+        return contents
+
+    @staticmethod
+    def _as_llm_error(e: Exception) -> LLMError:
+        status = getattr(e, "code", None)
+        status = status if isinstance(status, int) else None
+        return LLMError(str(e), status=status, retryable=status in RETRYABLE_STATUS)
+
+    async def generate(self, request: LLMRequest) -> str:
+        model = self._get_model(request)
+
+        async def operation():
+            try:
+                response = await model.generate_content_async(self._build_contents(request))
+            except Exception as e:
+                raise self._as_llm_error(e) from e
+            return response.text, None
+
+        return await self.pool.call(request.model_name, request_tokens(request), operation)
+
+    async def stream(self, request: LLMRequest):
+        model = self._get_model(request)
+
+        async def operation():
+            try:
+                return await model.generate_content_async(self._build_contents(request), stream=True), None
+            except Exception as e:
+                raise self._as_llm_error(e) from e
+
+        response = await self.pool.call(request.model_name, request_tokens(request), operation)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Backend local e determinístico, para testes e execução offline.
+
+    Args:
+        responder: Função opcional 'responder(request) -> str'. Sem ela, a resposta é derivada
+            apenas do conteúdo da requisição, então o mesmo pedido sempre gera a mesma saída.
+        latency: Atraso simulado (segundos) por chamada, útil para medir concorrência.
+        chunk_size: Tamanho dos pedaços entregues por stream().
+    """
+    name = "fake"
+
+    def __init__(self, responder=None, latency: float = 0.0, chunk_size: int = 64):
+        self.responder = responder
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    async def generate(self, request: LLMRequest) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.responder:
+            return self.responder(request)
+        digest = hashlib.sha256(f"{request.model_name}\0{request.system_prompt}\0{request.prompt}".encode("utf-8")).hexdigest()
+        return f"```\n# fake-{request.model_name}-{digest[:12]}\n{request.prompt}\n```"
+
+    async def stream(self, request: LLMRequest):
+        text = await self.generate(request)
+        for start in range(0, len(text), self.chunk_size):
+            await asyncio.sleep(0)
+            yield text[start:start + self.chunk_size]
+
+
+_BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    GeminiSDKBackend.name: GeminiSDKBackend,
+    FakeBackend.name: FakeBackend,
+}
+_default_backend = None
+
+
+def _default_backend_name() -> str:
+    """'gemini' (REST via httpx) quando o httpx está instalado; senão, a biblioteca do Google."""
+    return GeminiBackend.name if importlib.util.find_spec("httpx") else GeminiSDKBackend.name
+
+
+def get_backend() -> LLMBackend:
+    """
+    Retorna o backend padrão do processo. É escolhido pela variável de ambiente LLM_BACKEND
+    ("gemini" por padrão, "gemini_sdk" para a biblioteca google-generativeai, "fake" para
+    execução offline) e pode ser trocado com set_backend(). Sem o pacote httpx, o padrão
+    passa a ser "gemini_sdk".
+    """
+    global _default_backend
+    if _default_backend is None:
+        backend_name = (os.environ.get("LLM_BACKEND") or _default_backend_name()).lower()
+        backend_class = _BACKENDS.get(backend_name)
+        if backend_class is None:
+            raise ValueError(f"Backend de LLM desconhecido: '{backend_name}'. Opções: {sorted(_BACKENDS)}")
+        _default_backend = backend_class()
+        logger.info(f"Backend de LLM '{backend_name}' inicializado.")
+    return _default_backend
+
+
+def set_backend(backend: LLMBackend | None):
+    """Define o backend padrão (ex: um FakeBackend em testes). None volta à escolha pelo ambiente."""
+    global _default_backend
+    _default_backend = backend
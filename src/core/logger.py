@@ -1,22 +1,216 @@
 # src/core/logger.py
 
+import atexit
+import contextlib
+import contextvars
+import copy
+import gzip
+import json
 import logging
-import sys
+import logging.handlers
 import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+# Identificadores do contexto de execução, anexados a cada registro de log
+plan_id_var = contextvars.ContextVar("plan_id", default=None)
+task_id_var = contextvars.ContextVar("task_id", default=None)
+agent_var = contextvars.ContextVar("agent", default=None)
+
+_listener = None
+
+
+@contextlib.contextmanager
+def log_context(plan_id=None, task_id=None, agent=None):
+    """
+    Define plan/task/agent para os logs emitidos dentro do bloco (e nas corrotinas e
+    threads criadas a partir dele que copiam o contexto). Valores None não alteram o atual.
+    """
+    tokens = []
+    for var, value in ((plan_id_var, plan_id), (task_id_var, task_id), (agent_var, agent)):
+        if value is not None:
+            tokens.append((var, var.set(value)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def bind_log_context(plan_id=None, task_id=None, agent=None):
+    """
+    Como log_context, mas sem restaurar os valores anteriores: para o início de uma corrotina
+    executada como Task própria (cada Task tem sua cópia do contexto).
+    """
+    for var, value in ((plan_id_var, plan_id), (task_id_var, task_id), (agent_var, agent)):
+        if value is not None:
+            var.set(value)
+
+
+class ContextFilter(logging.Filter):
+    """Copia os identificadores do contexto para o registro, ainda na thread de origem."""
+    def filter(self, record):
+        record.plan_id = plan_id_var.get()
+        record.task_id = task_id_var.get()
+        record.agent = agent_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostragem por logger para registros abaixo de WARNING: com taxa 0.1, apenas 1 a cada
+    10 registros de DEBUG/INFO daquele logger (ou de seus filhos) é mantido. WARNING e
+    acima nunca são descartados.
+    """
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counters: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> float | None:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate is None or rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self._lock:
+            credit = self._counters.get(record.name, 1.0) + rate
+            keep = credit >= 1.0
+            self._counters[record.name] = credit - 1.0 if keep else credit
+        return keep
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Um objeto JSON por linha, com os identificadores de plano/tarefa/agente quando houver."""
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key in ("plan_id", "task_id", "agent"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotação por tamanho ('max_bytes') ou por idade do arquivo ('max_age' segundos), com os
+    arquivos antigos comprimidos em .gz. Roda na thread do QueueListener, fora do caminho
+    de execução dos planos.
+    """
+    def __init__(self, filename: str, max_bytes: int, backup_count: int, max_age: float | None = None):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_age = max_age
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        try:
+            self._opened_at = os.path.getmtime(filename) if os.path.getsize(filename) else time.time()
+        except OSError:
+            self._opened_at = time.time()
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.max_age is not None and time.time() - self._opened_at >= self.max_age and os.path.exists(self.baseFilename):
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia por registros de baixa prioridade: com a fila cheia,
+    DEBUG/INFO são descartados (e contados); WARNING e acima aguardam espaço.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Mensagem e traceback já resolvidos aqui (os argumentos podem mudar depois), mas
+        # mantidos separados para que o formatador JSON grave o traceback no campo 'exc'
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+
+def _parse_mapping(value: str | None) -> dict[str, str]:
+    """Converte 'A=1,B.c=2' em {'A': '1', 'B.c': '2'}."""
+    mapping = {}
+    for item in (value or "").split(","):
+        name, sep, setting = item.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
 
 def setup_logger():
     """
     Configura o logger raiz para o projeto.
     - INFO e acima irão para o console.
-    - DEBUG e acima irão para um arquivo de log.
+    - DEBUG e acima irão para logs/system_debug.jsonl (JSON lines), com rotação por tamanho
+      (LOG_MAX_BYTES, padrão 10 MB) e por idade (LOG_MAX_AGE_HOURS, padrão 24 h), mantendo
+      LOG_BACKUP_COUNT (padrão 5) arquivos antigos comprimidos.
+
+    Os registros são enfileirados na thread de origem e gravados por uma thread de fundo
+    (QueueListener). Níveis por logger vêm de LOG_LEVELS (ex: "ModelPool=INFO,EventBus=WARNING")
+    e a amostragem de DEBUG/INFO de LOG_SAMPLING (ex: "Executor=0.1").
     """
+    global _listener
+
     # Garante que o diretório de logs exista
     os.makedirs("logs", exist_ok=True)
 
     # Pega o logger raiz
     root_logger = logging.getLogger()
-    
+
     # Evita adicionar manipuladores duplicados se a função for chamada novamente
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
 
@@ -25,22 +219,47 @@ def setup_logger():
     # Cria um manipulador para o console (stdout)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO) # Apenas INFO, WARNING, ERROR, CRITICAL irão para o console
-    
-    # Cria um manipulador para o arquivo de log
-    file_handler = logging.FileHandler("logs/system_debug.log", mode='a', encoding='utf-8')
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s'))
+
+    # Cria um manipulador para o arquivo de log estruturado
+    max_age_hours = float(os.environ.get("LOG_MAX_AGE_HOURS", 24))
+    file_handler = CompressingRotatingFileHandler(
+        "logs/system_debug.jsonl",
+        max_bytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+        backup_count=int(os.environ.get("LOG_BACKUP_COUNT", 5)),
+        max_age=max_age_hours * 3600 if max_age_hours > 0 else None
+    )
     file_handler.setLevel(logging.DEBUG) # Todos os níveis irão para o arquivo de log
+    file_handler.setFormatter(JSONLinesFormatter())
+
+    # Níveis por logger
+    for name, level in _parse_mapping(os.environ.get("LOG_LEVELS")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    # Fila entre as threads que logam e a thread que grava
+    log_queue = queue.Queue(maxsize=10000)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    sampling = {name: float(rate) for name, rate in _parse_mapping(os.environ.get("LOG_SAMPLING")).items()}
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    root_logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
 
-    # Define o formato do log
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(name)s] - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
+def shutdown_logging():
+    """Esvazia a fila de logs e encerra a thread de gravação."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-    # Adiciona os manipuladores ao logger raiz
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
 
 def get_logger(name: str) -> logging.Logger:
     """
     Retorna uma instância de um logger com o nome fornecido.
     """
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
@@ -0,0 +1,300 @@
+# src/core/manifest_store.py
+
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.core.code_stream import write_file_atomic
+from src.core.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas o lock entre threads
+    fcntl = None
+
+logger = get_logger("ManifestStore")
+
+STATUS_ACTIVE = "ACTIVE"
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+@contextlib.contextmanager
+def _file_lock(lock_path: str):
+    """Lock exclusivo entre processos (flock num arquivo '.lock' ao lado do manifesto)."""
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ManifestStore:
+    """
+    Interface do manifesto de projetos gerados. Cada entrada é um dict com 'path',
+    'description', 'status', 'created_at' e 'last_accessed' (ISO 8601, UTC).
+    """
+    def register(self, project_id: str, path: str, description: str):
+        """Adiciona ou atualiza um projeto, preservando o 'created_at' de uma entrada existente."""
+        raise NotImplementedError
+
+    def get(self, project_id: str) -> dict | None:
+        raise NotImplementedError
+
+    def all(self) -> dict[str, dict]:
+        """Visão completa do manifesto (project_id -> entrada). Não altere o dict retornado."""
+        raise NotImplementedError
+
+    def touch(self, project_id: str):
+        """Atualiza o 'last_accessed' de um projeto."""
+        raise NotImplementedError
+
+    def set_status(self, project_id: str, status: str):
+        raise NotImplementedError
+
+    def remove(self, project_id: str):
+        raise NotImplementedError
+
+    def query(self, status: str | None = None, accessed_before: str | None = None, limit: int | None = None) -> dict[str, dict]:
+        """Projetos filtrados por status e/ou 'last_accessed' anterior a um instante ISO 8601, do menos recente ao mais recente."""
+        entries = [
+            (project_id, entry) for project_id, entry in self.all().items()
+            if (status is None or entry.get("status") == status)
+            and (accessed_before is None or entry.get("last_accessed", "") < accessed_before)
+        ]
+        entries.sort(key=lambda item: item[1].get("last_accessed", ""))
+        return dict(entries[:limit] if limit is not None else entries)
+
+    def registered_dirs(self) -> set[str]:
+        """Nomes dos diretórios de projeto registrados (basename de cada 'path')."""
+        return {os.path.basename(entry["path"]) for entry in self.all().values()}
+
+
+class JSONManifestStore(ManifestStore):
+    """
+    Manifesto em 'workspace/manifest.json' (formato original, legível por humanos).
+
+    Toda alteração é uma transação: lock entre threads e processos, releitura do arquivo
+    se ele mudou, modificação e gravação atômica (temp + rename). As leituras usam uma
+    cópia em memória invalidada quando o mtime/tamanho do arquivo muda.
+    """
+    def __init__(self, path: str = "workspace/manifest.json"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._cache: dict | None = None
+        self._signature = None
+        if not os.path.exists(self.path):
+            with self.transaction():
+                pass
+            logger.info(f"Manifesto de projetos inicializado em '{self.path}'")
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> dict:
+        signature = self._file_signature()
+        if self._cache is None or signature != self._signature:
+            if signature is None:
+                self._cache = {}
+            else:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._cache = json.load(f)
+            self._signature = signature
+        return self._cache
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Entrega o manifesto (dict) para alteração; ao sair sem erro, grava de forma atômica."""
+        with self._lock, _file_lock(self.path + ".lock"):
+            manifest = dict(self._load())
+            yield manifest
+            write_file_atomic(self.path, json.dumps(manifest, indent=4))
+            self._cache = manifest
+            self._signature = self._file_signature()
+
+    def register(self, project_id: str, path: str, description: str):
+        now = _now()
+        with self.transaction() as manifest:
+            previous = manifest.get(project_id) or {}
+            manifest[project_id] = {
+                "path": path,
+                "description": description,
+                "status": STATUS_ACTIVE,
+                "created_at": previous.get("created_at", now),
+                "last_accessed": now
+            }
+
+    def get(self, project_id: str) -> dict | None:
+        return self.all().get(project_id)
+
+    def all(self) -> dict[str, dict]:
+        with self._lock:
+            return self._load()
+
+    def touch(self, project_id: str):
+        with self.transaction() as manifest:
+            if project_id in manifest:
+                manifest[project_id] = {**manifest[project_id], "last_accessed": _now()}
+
+    def set_status(self, project_id: str, status: str):
+        with self.transaction() as manifest:
+            if project_id in manifest:
+                manifest[project_id] = {**manifest[project_id], "status": status}
+
+    def remove(self, project_id: str):
+        with self.transaction() as manifest:
+            manifest.pop(project_id, None)
+
+
+class SQLiteManifestStore(ManifestStore):
+    """
+    Manifesto em SQLite (modo WAL), indexado por 'status' e 'last_accessed': registrar um
+    projeto é um UPSERT de uma linha e as consultas não carregam o manifesto inteiro.
+    O SQLite cuida do lock entre processos. Na criação, importa o manifest.json existente.
+    """
+    def __init__(self, path: str = "workspace/manifest.db", import_json: str | None = "workspace/manifest.json"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._cache: dict | None = None
+        self._data_version = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                " project_id TEXT PRIMARY KEY, path TEXT NOT NULL, description TEXT,"
+                " status TEXT NOT NULL, created_at TEXT NOT NULL, last_accessed TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_last_accessed ON projects(last_accessed)")
+            empty = self._conn.execute("SELECT 1 FROM projects LIMIT 1").fetchone() is None
+        if empty and import_json and os.path.exists(import_json):
+            self._import_json(import_json)
+
+    def _import_json(self, json_path: str):
+        with open(json_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        rows = [
+            (project_id, entry["path"], entry.get("description", ""), entry.get("status", STATUS_ACTIVE),
+             entry.get("created_at", _now()), entry.get("last_accessed", _now()))
+            for project_id, entry in manifest.items()
+        ]
+        with self._write() as conn:
+            conn.executemany("INSERT OR IGNORE INTO projects VALUES (?, ?, ?, ?, ?, ?)", rows)
+        logger.info(f"{len(rows)} projeto(s) importado(s) de '{json_path}' para '{self.path}'.")
+
+    @contextlib.contextmanager
+    def _write(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._cache = None
+
+    @staticmethod
+    def _entry(row) -> dict:
+        return {
+            "path": row["path"],
+            "description": row["description"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "last_accessed": row["last_accessed"]
+        }
+
+    def register(self, project_id: str, path: str, description: str):
+        now = _now()
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(project_id) DO UPDATE SET"
+                " path=excluded.path, description=excluded.description, status=excluded.status,"
+                " last_accessed=excluded.last_accessed",
+                (project_id, path, description, STATUS_ACTIVE, now, now)
+            )
+
+    def get(self, project_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def all(self) -> dict[str, dict]:
+        with self._lock:
+            # 'data_version' muda quando outra conexão (outro processo) altera o banco
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._cache is None or data_version != self._data_version:
+                rows = self._conn.execute("SELECT * FROM projects").fetchall()
+                self._cache = {row["project_id"]: self._entry(row) for row in rows}
+                self._data_version = data_version
+            return self._cache
+
+    def touch(self, project_id: str):
+        with self._write() as conn:
+            conn.execute("UPDATE projects SET last_accessed = ? WHERE project_id = ?", (_now(), project_id))
+
+    def set_status(self, project_id: str, status: str):
+        with self._write() as conn:
+            conn.execute("UPDATE projects SET status = ? WHERE project_id = ?", (status, project_id))
+
+    def remove(self, project_id: str):
+        with self._write() as conn:
+            conn.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
+
+    def query(self, status: str | None = None, accessed_before: str | None = None, limit: int | None = None) -> dict[str, dict]:
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if accessed_before is not None:
+            clauses.append("last_accessed < ?")
+            params.append(accessed_before)
+        sql = "SELECT * FROM projects"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_accessed"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return {row["project_id"]: self._entry(row) for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_manifest_store() -> ManifestStore:
+    """
+    Retorna o manifesto compartilhado do processo. MANIFEST_BACKEND=sqlite usa o
+    SQLiteManifestStore (workspace/manifest.db); o padrão é o manifest.json.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            if os.environ.get("MANIFEST_BACKEND", "json").lower() == "sqlite":
+                _default_store = SQLiteManifestStore()
+            else:
+                _default_store = JSONManifestStore()
+        return _default_store
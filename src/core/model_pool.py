@@ -0,0 +1,244 @@
+# src/core/model_pool.py
+
+import asyncio
+import json
+import os
+import random
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("ModelPool")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """
+    Falha numa chamada ao LLM depois de esgotadas as tentativas.
+    'status' é o código HTTP quando houver; 'retryable' indica se valia tentar de novo.
+    """
+    def __init__(self, message: str, status: int | None = None, retryable: bool = False, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket assíncrono: 'rate' unidades por segundo, acumulando até 'capacity'."""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Aguarda até haver 'amount' unidades disponíveis e as consome."""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            wait = self.blocked_until - time.monotonic()
+            if wait <= 0 and self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep(max(wait, (amount - self.tokens) / self.rate))
+
+    def debit(self, amount: float):
+        """Ajusta o saldo depois da chamada, com o consumo real (pode ficar negativo)."""
+        self._refill()
+        self.tokens -= amount
+
+    def block_for(self, seconds: float):
+        """Suspende o bucket (ex: após um 429 com Retry-After)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ModelRateLimiter:
+    """Limites por modelo: requisições por minuto e tokens por minuto."""
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 6.0))
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int | None):
+        if actual_tokens is not None:
+            self.tokens.debit(actual_tokens - estimated_tokens)
+
+    def block_for(self, seconds: float):
+        self.requests.block_for(seconds)
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter para erros temporários (429/5xx e falhas de conexão)."""
+    def __init__(self, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return backoff * (0.5 + random.random() / 2)
+
+
+class AsyncHTTPPool:
+    """
+    Cliente HTTP assíncrono de um endpoint, sobre httpx.AsyncClient: conexões keep-alive
+    reutilizadas por todos os agentes (até 'max_connections' por host), proxies das
+    variáveis HTTP_PROXY/HTTPS_PROXY/NO_PROXY e corpos em chunks tratados pela biblioteca.
+    Falhas de transporte chegam como ConnectionError, que o ModelClientPool repete.
+    """
+    def __init__(self, base_url: str, max_connections: int = 10, timeout: float = 300.0):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                import httpx
+            except ImportError as e:
+                raise LLMError("O backend 'gemini' requer o pacote 'httpx' (pip install httpx); "
+                               "alternativamente, use LLM_BACKEND=gemini_sdk.") from e
+            self._httpx = httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=min(30.0, self.timeout)),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                trust_env=True,
+            )
+        return self._client
+
+    async def stream(self, method: str, path: str, headers: dict, body: bytes = b""):
+        """
+        Envia uma requisição e entrega (status, headers) seguido dos pedaços do corpo.
+        Uso: 'async for item in pool.stream(...)': o primeiro item é a tupla (status, headers).
+        Os nomes dos headers vêm em minúsculas.
+        """
+        client = self._get_client()
+        try:
+            async with client.stream(method, path, headers=headers, content=body) as response:
+                yield response.status_code, {name.lower(): value for name, value in response.headers.items()}
+                async for piece in response.aiter_bytes():
+                    yield piece
+        except self._httpx.TransportError as e:
+            raise ConnectionError(f"{type(e).__name__}: {e}") from e
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"") -> tuple[int, dict, bytes]:
+        """Envia uma requisição e retorna (status, headers, corpo completo)."""
+        client = self._get_client()
+        try:
+            response = await client.request(method, path, headers=headers, content=body)
+        except self._httpx.TransportError as e:
+            raise ConnectionError(f"{type(e).__name__}: {e}") from e
+        return response.status_code, {name.lower(): value for name, value in response.headers.items()}, response.content
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ModelClientPool:
+    """
+    Registro compartilhado por todos os agentes cognitivos: um pool HTTP por endpoint e um
+    limitador de taxa por modelo, mais a política de retentativas.
+
+    Os limites vêm das variáveis de ambiente LLM_REQUESTS_PER_MINUTE e LLM_TOKENS_PER_MINUTE
+    (padrão 60 e 1.000.000), e podem ser definidos por modelo com set_limits().
+    """
+    def __init__(self, retry_policy: RetryPolicy | None = None, max_connections: int = 10):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_connections = max_connections
+        self.default_rpm = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 60))
+        self.default_tpm = float(os.environ.get("LLM_TOKENS_PER_MINUTE", 1_000_000))
+        self._pools: dict[str, AsyncHTTPPool] = {}
+        self._limiters: dict[str, ModelRateLimiter] = {}
+
+    def http_pool(self, base_url: str) -> AsyncHTTPPool:
+        pool = self._pools.get(base_url)
+        if pool is None:
+            pool = self._pools[base_url] = AsyncHTTPPool(base_url, self.max_connections)
+        return pool
+
+    def limiter(self, model_name: str) -> ModelRateLimiter:
+        limiter = self._limiters.get(model_name)
+        if limiter is None:
+            limiter = self._limiters[model_name] = ModelRateLimiter(self.default_rpm, self.default_tpm)
+        return limiter
+
+    def set_limits(self, model_name: str, requests_per_minute: float, tokens_per_minute: float):
+        self._limiters[model_name] = ModelRateLimiter(requests_per_minute, tokens_per_minute)
+
+    async def call(self, model_name: str, estimated_tokens: int, operation):
+        """
+        Executa 'operation()' (corrotina que retorna (resultado, tokens_usados)) respeitando
+        o limite do modelo e repetindo com backoff em erros temporários.
+
+        Raises:
+            LLMError: Erro não recuperável ou tentativas esgotadas.
+        """
+        limiter = self.limiter(model_name)
+        for attempt in range(self.retry_policy.max_retries + 1):
+            await limiter.acquire(estimated_tokens)
+            try:
+                result, used_tokens = await operation()
+                limiter.record_usage(estimated_tokens, used_tokens)
+                return result
+            except (LLMError, ConnectionError, asyncio.TimeoutError, OSError) as e:
+                retryable = e.retryable if isinstance(e, LLMError) else True
+                retry_after = e.retry_after if isinstance(e, LLMError) else None
+                if not retryable or attempt == self.retry_policy.max_retries:
+                    if isinstance(e, LLMError):
+                        raise
+                    raise LLMError(f"Falha de conexão com o LLM: {e}", retryable=True) from e
+                delay = self.retry_policy.delay(attempt, retry_after)
+                if isinstance(e, LLMError) and e.status == 429:
+                    limiter.block_for(delay)
+                logger.warning(f"Chamada ao modelo '{model_name}' falhou ({e}); nova tentativa em {delay:.1f}s "
+                               f"({attempt + 1}/{self.retry_policy.max_retries}).")
+                await asyncio.sleep(delay)
+
+
+def parse_retry_after(headers: dict) -> float | None:
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def error_from_response(status: int, headers: dict, body: bytes) -> LLMError:
+    """Converte uma resposta HTTP de erro em LLMError."""
+    try:
+        message = json.loads(body).get("error", {}).get("message", "")
+    except (ValueError, AttributeError):
+        message = body[:200].decode("utf-8", "replace")
+    return LLMError(
+        f"HTTP {status}: {message}",
+        status=status,
+        retryable=status in RETRYABLE_STATUS,
+        retry_after=parse_retry_after(headers)
+    )
+
+
+_default_pool = None
+
+
+def get_model_pool() -> ModelClientPool:
+    """Retorna o pool de clientes compartilhado do processo."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ModelClientPool()
+    return _default_pool
@@ -1,146 +1,476 @@
 # src/core/orchestrator.py
 
+import asyncio
 import os
 import shlex
 import threading
-import time
-import queue
-import json
-
-from src.agents.architect_agent import ArchitectAgent
-from src.agents.backend_agent import BackendAgent
-from src.agents.auditor_agent import AuditorAgent
-from src.agents.execution_agent import ExecutionAgent
-from src.agents.librarian_agent import LibrarianAgent
-from src.agents.prompt_engineer_agent import PromptEngineerAgent
-from src.agents.git_agent import GitAgent
-from src.agents.compiler_agent import CompilerAgent
-from src.agents.frontend_agent import FrontendAgent
-from src.agents.security_agent import SecurityAgent
-
-from src.core.logger import get_logger
+
+from src.core.agent_registry import AgentRegistry
+from src.core.artifact_store import canonical_task, get_artifact_store
+from src.core.async_runtime import run_sync, submit
+from src.core.code_index import get_code_index
+from src.core.event_bus import PLAN_ENQUEUED, PLAN_FINISHED, SHUTDOWN, USER_INPUT, get_event_bus
+from src.core.logger import bind_log_context, get_logger
+from src.core.plan_queue import get_plan_queue
+from src.core.plan_stream import PlanStream
+from src.core.response_cache import get_response_cache
+from src.core.task_scheduler import CODING_AGENTS, TaskNode, TaskScheduler, build_task_graph, early_dependencies
+from src.core.tracing import get_tracer
+from src.core.validation import ERROR, shutdown_validation_pool, validate_async
 
 logger = get_logger("Orchestrator")
 
+# Orçamento (tokens estimados) dos trechos do projeto incluídos em cada tarefa de codificação
+CODE_CONTEXT_TOKENS = int(os.environ.get("DEV_CONTEXT_TOKENS", "800"))
+# Regenerações de um arquivo reprovado na validação pós-escrita
+VALIDATION_RETRIES = int(os.environ.get("VALIDATION_RETRIES", "1"))
+
 class Orchestrator:
     """
     Orquestrador v3.3. Lógica de caminhos centralizada no LibrarianAgent.
     """
-    def __init__(self):
+    def __init__(self, max_parallel_tasks: int = 16, max_concurrent_plans: int = 3, stream_plans: bool | None = None):
         logger.info("Inicializando o Orquestrador v3.3...")
-        self.agents = {
-            "architect": ArchitectAgent(),
-            "backend_dev": BackendAgent(),
-            "auditor": AuditorAgent(),
-            "executor": ExecutionAgent(),
-            "librarian": LibrarianAgent(),
-            "prompt_engineer": PromptEngineerAgent(),
-            "git": GitAgent(),
-            "compiler": CompilerAgent(),
-            "frontend_dev": FrontendAgent(),
-        }
+        self.max_parallel_tasks = max_parallel_tasks
+        self.max_concurrent_plans = max(1, max_concurrent_plans)
+        # Planos em streaming: a geração de arquivos começa enquanto o Arquiteto ainda planeja
+        self.stream_plans = os.environ.get("ARCHITECT_STREAMING", "1") != "0" if stream_plans is None else stream_plans
+        # Cada arquivo gerado é validado (sintaxe, imports, HTML) antes de a tarefa ser concluída
+        self.validate_outputs = os.environ.get("OUTPUT_VALIDATION", "1") != "0"
+        # Os agentes são construídos no primeiro uso (imports e inicializações pesadas inclusos)
+        self.agents = AgentRegistry({
+            "architect": "src.agents.architect_agent:ArchitectAgent",
+            "backend_dev": "src.agents.backend_agent:BackendAgent",
+            "auditor": "src.agents.auditor_agent:AuditorAgent",
+            "executor": "src.agents.execution_agent:ExecutionAgent",
+            "librarian": "src.agents.librarian_agent:LibrarianAgent",
+            "prompt_engineer": "src.agents.prompt_engineer_agent:PromptEngineerAgent",
+            "git": "src.agents.git_agent:GitAgent",
+            "compiler": "src.agents.compiler_agent:CompilerAgent",
+            "frontend_dev": "src.agents.frontend_agent:FrontendAgent",
+        })
         self.stop_event = threading.Event()
         self.background_threads = []
-        self.user_input_queue = queue.Queue()
+        self.event_bus = get_event_bus()
+        self.plan_queue = get_plan_queue()
         self.project_in_progress = threading.Event()
+        self._plans_lock = threading.Lock()
+        self._running_plans = {}
+        self._active_projects = set()
+        # 'target_file's do plano em andamento em cada projeto (imports locais na validação)
+        self._planned_files: dict[str, set[str]] = {}
+        # Ação local (RUN/COMMIT/SELF_MODIFY) aguardando o "s/n" do usuário: (descrição, função)
+        self._pending_confirmation = None
         self.prompt_needed = threading.Event()
 
-        logger.info(f"Agentes carregados: {list(self.agents.keys())}")
+        logger.info(f"Agentes registrados: {self.agents.keys()}")
         print("Orquestrador pronto.")
 
-    def process_plan_queue(self):
-        plans_queue_dir = "workspace/plans_queue"
-        if not os.path.exists(plans_queue_dir): return
+    def process_plan_queue(self) -> int:
+        """
+        Inicia, no event loop compartilhado, tantos planos da fila quanto o limite de
+        'max_concurrent_plans' permitir. Planos para um mesmo projeto são serializados;
+        a fila entrega primeiro os planos de 'system_maintenance'.
 
-        plans = sorted([f for f in os.listdir(plans_queue_dir) if f.endswith(".json")])
-        if not plans: return
+        Returns:
+            O número de planos iniciados.
+        """
+        started = 0
+        with self._plans_lock:
+            while len(self._running_plans) < self.max_concurrent_plans:
+                queued = self.plan_queue.get_nowait(skip=lambda q: self._project_key(q.project_id) in self._active_projects)
+                if queued is None:
+                    break
+                self._active_projects.add(self._project_key(queued.project_id))
+                self._running_plans[queued.plan_id] = submit(self._execute_plan(queued))
+                self.project_in_progress.set()
+                started += 1
+        return started
 
-        self.project_in_progress.set()
-        plan_filename = plans[0]
-        plan_path = os.path.join(plans_queue_dir, plan_filename)
-        
-        logger.info(f"Plano '{plan_filename}' detectado na fila. Iniciando execução...")
-        print(f"\n[USER] 🤖 Plano de ação '{plan_filename}' detectado. Executando...")
+    @staticmethod
+    def _project_key(project_id: str) -> str:
+        """Diretório de trabalho do plano, usado para serializar planos do mesmo projeto."""
+        if project_id == "system_maintenance":
+            return "system_maintenance"
+        return os.path.normpath(os.path.join("workspace", "output", project_id))
 
-        plan_succeeded = True
-        project_id = "unknown_project"
-        project_description = "N/A"
+    async def _execute_plan(self, queued) -> bool:
+        """Executa um plano retirado da fila dentro de um trace próprio (workspace/traces)."""
+        bind_log_context(plan_id=queued.plan_id)
+        with get_tracer().trace(queued.plan_id, f"Plano {queued.plan_id}", project_id=queued.project_id) as span:
+            succeeded = await self._run_plan(queued)
+            span.set(success=succeeded, tasks=len(queued.plan.get("action_plan", [])))
+            return succeeded
 
+    async def _run_plan(self, queued) -> bool:
+        """Executa um plano retirado da fila e registra o resultado no journal."""
+        plan_id = queued.plan_id
+        
+        logger.info(f"Plano '{plan_id}' retirado da fila. Iniciando execução...")
+        print(f"\n[USER] 🤖 Plano de ação '{plan_id}' detectado. Executando...")
+
+        plan_succeeded = False
         try:
-            with open(plan_path, 'r', encoding='utf-8') as f:
-                plan = json.load(f)
+            plan_succeeded = await self._run_plan_tasks(queued)
+            return plan_succeeded
+
+        except Exception as e:
+            logger.error(f"Erro durante a execução do plano '{plan_id}': {e}", exc_info=True)
+            print(f"[USER] ❌ Erro crítico ao executar o plano de projeto '{plan_id}': {e}")
+            return False
+        finally:
+            await asyncio.to_thread(self.plan_queue.finish, plan_id, plan_succeeded)
+            self._release_plan(plan_id, self._project_key(queued.project_id))
+
+    def _release_plan(self, plan_id: str, project_key: str):
+        """Libera o projeto do plano encerrado e avisa o shell."""
+        with self._plans_lock:
+            self._running_plans.pop(plan_id, None)
+            self._active_projects.discard(project_key)
+            self._planned_files.pop(project_key, None)
+            if not self._running_plans:
+                self.project_in_progress.clear()
+        self.prompt_needed.set()
+        self.event_bus.publish(PLAN_FINISHED, plan_id)
 
-            project_id = plan.get("project_id", "unknown_project")
-            project_description = plan.get("description", "N/A")
-            tasks = plan.get("action_plan", [])
+    async def _run_plan_tasks(self, queued, early: dict | None = None, slots: asyncio.Semaphore | None = None,
+                              abort: asyncio.Event | None = None) -> bool:
+        """
+        Valida o plano completo (grafo de tarefas) e executa as tarefas restantes.
+        'early' mapeia índices de tarefas já iniciadas durante o streaming do plano para as
+        suas asyncio.Tasks, que são aguardadas em vez de executadas de novo; 'slots' e 'abort'
+        são o limite de tarefas simultâneas e o sinal de falha compartilhados com elas.
+        """
+        plan_id = queued.plan_id
+        plan = queued.plan
+        project_id = plan.get("project_id", "unknown_project")
+        project_description = plan.get("description", "N/A")
+        tasks = plan.get("action_plan", [])
             
-            if not tasks:
-                logger.warning(f"Plano '{plan_filename}' encontrado, mas sem tarefas.")
-                print(f"[USER] ⚠️ Plano '{plan_filename}' encontrado, mas não continha tarefas claras.")
-                return
-
-            total_tasks = len(tasks)
-            for i, task in enumerate(tasks, 1):
-                agent_name = task.get("agent", "").lower()
-                task_description = task.get("task", "")
-                
-                print(f"\n[USER] Executando Tarefa {i}/{total_tasks}: Atribuída a '{agent_name}'")
-                print(f"[USER] Descrição: {task_description}")
-                
-                agent = self.agents.get(agent_name)
-                if not agent:
-                    logger.error(f"Agente '{agent_name}' especificado no plano não encontrado.")
-                    print(f"[USER] ❌ Erro: Agente '{agent_name}' não existe no sistema.")
-                    plan_succeeded = False
+        if not tasks:
+            logger.warning(f"Plano '{plan_id}' encontrado, mas sem tarefas.")
+            print(f"[USER] ⚠️ Plano '{plan_id}' encontrado, mas não continha tarefas claras.")
+            return True
+
+        nodes = build_task_graph(tasks)
+        self._note_planned_files(project_id, tasks)
+        logger.debug(f"Grafo de tarefas do plano '{plan_id}': {nodes}")
+        if queued.completed_tasks:
+            print(f"[USER] ↪️ Retomando o plano: {len(queued.completed_tasks)}/{len(tasks)} tarefa(s) já concluída(s).")
+        plan_succeeded = await self._run_task_graph(nodes, project_id, queued, early, slots, abort)
+
+        if plan_succeeded:
+            print(f"\n[USER] ✅ Todas as tarefas do plano '{plan_id}' foram processadas com sucesso.")
+            if project_id != "system_maintenance":
+                librarian = self.agents.get("librarian")
+                project_path = os.path.join("workspace", "output", project_id)
+                with get_tracer().span("Registro no manifesto", "manifest"):
+                    await asyncio.to_thread(librarian.register_project_in_manifest, project_id, project_path, project_description)
+        else:
+            print(f"\n[USER] ❌ O plano '{plan_id}' foi processado com erros.")
+        return plan_succeeded
+
+    def _note_planned_files(self, project_id: str, tasks: list[dict]):
+        """Registra os arquivos que o plano vai gerar, para que a validação os trate como módulos locais."""
+        planned = self._planned_files.setdefault(self._project_key(project_id), set())
+        planned.update(task["target_file"] for task in tasks
+                       if task.get("agent", "").lower() in CODING_AGENTS and task.get("target_file"))
+
+    async def _stream_request(self, user_input: str):
+        """
+        Pede o plano ao Arquiteto em streaming. Assim que o cabeçalho chega, o plano passa a
+        executar: tarefas de codificação começam enquanto o Arquiteto ainda lista as demais.
+        Se o projeto já tem um plano em andamento (ou o limite de planos foi atingido), o
+        plano completo vai para a fila, como no modo sem streaming.
+        """
+        plan_stream = PlanStream()
+        producer = asyncio.create_task(self.agents.get("architect").stream_master_plan(user_input, plan_stream))
+        try:
+            header = await plan_stream.wait_header()
+            if header is not None:
+                plan_id = self.plan_queue.new_plan_id()
+                project_key = self._project_key(header.get("project_id", "unknown_project"))
+                with self._plans_lock:
+                    can_start = len(self._running_plans) < self.max_concurrent_plans and project_key not in self._active_projects
+                    if can_start:
+                        self._active_projects.add(project_key)
+                        self._running_plans[plan_id] = submit(self._execute_streamed_plan(plan_id, plan_stream, project_key))
+                        self.project_in_progress.set()
+                if not can_start:
+                    logger.info(f"Projeto '{header.get('project_id')}' ocupado; o plano recebido em streaming irá para a fila.")
+                    plan = await plan_stream.result()
+                    await asyncio.to_thread(self.plan_queue.put, plan)
+                    self.event_bus.publish(PLAN_ENQUEUED)
+        except BaseException:
+            # O erro do Arquiteto (ou o cancelamento) sobe daqui; o produtor é encerrado e recolhido
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            raise
+        await producer
+
+    async def _execute_streamed_plan(self, plan_id: str, plan_stream: PlanStream, project_key: str) -> bool:
+        """Como _execute_plan, para um plano que ainda está sendo recebido."""
+        bind_log_context(plan_id=plan_id)
+        with get_tracer().trace(plan_id, f"Plano {plan_id}", project_id=plan_stream.header.get("project_id"), streamed=True) as span:
+            succeeded = await self._run_streamed_plan(plan_id, plan_stream, project_key)
+            span.set(success=succeeded, tasks=len(plan_stream.tasks))
+            return succeeded
+
+    async def _run_streamed_plan(self, plan_id: str, plan_stream: PlanStream, project_key: str) -> bool:
+        """
+        Inicia cada tarefa de codificação assim que ela chega e suas dependências já foram
+        recebidas (ver early_dependencies). As demais, incluindo todo passo do 'executor',
+        só rodam depois que o plano completo é validado por build_task_graph. Um único limite
+        de max_parallel_tasks vale para as tarefas antecipadas e as do escalonador, e depois
+        da primeira falha nenhuma tarefa nova é iniciada. O plano vai para o journal tarefa a
+        tarefa; após um crash, só é retomado se tiver chegado por completo (as tarefas já
+        concluídas não são refeitas).
+        """
+        project_id = plan_stream.header.get("project_id", "unknown_project")
+        logger.info(f"Plano '{plan_id}' em streaming. Iniciando as primeiras tarefas...")
+        print(f"\n[USER] 🤖 Plano de ação '{plan_id}' em elaboração. As primeiras tarefas já começam...")
+
+        early: dict[int, asyncio.Task] = {}
+        slots = asyncio.Semaphore(self.max_parallel_tasks)
+        abort = asyncio.Event()
+        plan_succeeded = False
+        stream_failed = False
+        await asyncio.to_thread(self.plan_queue.begin_stream, plan_id, plan_stream.header)
+        try:
+            async for index, task in plan_stream.iter_tasks():
+                await asyncio.to_thread(self.plan_queue.add_streamed_task, plan_id, task)
+                self._note_planned_files(project_id, [task])
+                depends_on = early_dependencies(plan_stream.tasks[:index])
+                if abort.is_set() or depends_on is None or not depends_on <= early.keys():
                     continue
+                node = TaskNode(index, plan_stream.tasks[index - 1])
+                node.depends_on = depends_on
+                early[index] = asyncio.create_task(self._run_early_task(node, early, slots, abort, plan_id, project_id))
 
-                try:
-                    if agent_name in ["backend_dev", "frontend_dev"]:
-                        target_file = task.get("target_file")
-                        if not target_file:
-                            logger.warning(f"Tarefa para '{agent_name}' sem 'target_file', pulando: {task_description}")
-                            print(f"[USER] ⚠️ Tarefa informativa para '{agent_name}' ignorada.")
-                            continue
-                        
-                        # --- LÓGICA DE CAMINHO DELEGADA AO BIBLIOTECÁRIO ---
-                        librarian = self.agents.get("librarian")
-                        final_path = librarian.get_project_path(project_id, target_file)
-                        
-                        agent.write_code(file_path=final_path, task_description=task_description)
-                    
-                    elif agent_name == "executor":
-                        command = task.get("command")
-                        if not command: raise ValueError("A tarefa do executor precisa de um 'command'.")
-                        command = command.replace("{project_id}", project_id)
-                        agent.run(command_to_execute=command)
-                    
-                    else:
-                        logger.warning(f"Lógica de execução para o agente '{agent_name}' não implementada.")
-                        print(f"[USER] ⚠️ Lógica para o agente '{agent_name}' não implementada.")
-
-                except Exception as e:
-                    print(f"[USER] ❌ Erro ao executar a tarefa {i}: {e}")
-                    logger.error(f"Falha na tarefa '{task_description}': {e}", exc_info=True)
-                    plan_succeeded = False
-                    break
+            plan = await plan_stream.result()
+            queued = await asyncio.to_thread(self.plan_queue.complete_stream, plan_id, plan)
+            if early:
+                print(f"[USER] Plano completo com {len(plan['action_plan'])} tarefa(s); {len(early)} já iniciada(s) durante o planejamento.")
+            plan_succeeded = await self._run_plan_tasks(queued, early, slots, abort)
+            return plan_succeeded
 
-            if plan_succeeded:
-                print(f"\n[USER] ✅ Todas as tarefas do plano '{plan_filename}' foram processadas com sucesso.")
-                if project_id != "system_maintenance":
-                    librarian = self.agents.get("librarian")
-                    project_path = os.path.join("workspace", "output", project_id)
-                    librarian.register_project_in_manifest(project_id, project_path, project_description)
+        except Exception as e:
+            if e is plan_stream.error:
+                # Falha do Arquiteto: já reportada ao usuário por _handle_request
+                logger.error(f"Plano '{plan_id}' interrompido: o streaming do plano falhou ({e}).")
+                stream_failed = True
+                return False
+            logger.error(f"Erro durante a execução do plano '{plan_id}': {e}", exc_info=True)
+            print(f"[USER] ❌ Erro crítico ao executar o plano de projeto '{plan_id}': {e}")
+            if isinstance(e, ValueError) and early:
+                print("[USER] ⚠️ O plano completo é inválido; nenhum comando do executor foi executado.")
+            return False
+        finally:
+            # Tarefas já iniciadas terminam antes de o plano ser encerrado
+            if early:
+                await asyncio.gather(*early.values(), return_exceptions=True)
+            if stream_failed:
+                await asyncio.to_thread(self.plan_queue.discard, plan_id)
             else:
-                print(f"\n[USER] ❌ O plano '{plan_filename}' foi processado com erros.")
+                await asyncio.to_thread(self.plan_queue.finish, plan_id, plan_succeeded)
+            self._release_plan(plan_id, project_key)
+
+    async def _run_early_task(self, node, early: dict, slots: asyncio.Semaphore, abort: asyncio.Event,
+                              plan_id: str, project_id: str) -> bool:
+        """
+        Executa uma tarefa do plano em streaming depois das tarefas das quais ela depende.
+        Não começa se alguma tarefa do plano já falhou ('abort').
+        """
+        for dependency in sorted(node.depends_on):
+            if not await early[dependency]:
+                return False
+        async with slots:
+            if abort.is_set():
+                logger.warning(f"Tarefa {node.index} não iniciada devido a falha anterior no plano.")
+                return False
+            succeeded = await self._execute_task(node, "?", project_id)
+        if succeeded:
+            await asyncio.to_thread(self.plan_queue.mark_task_done, plan_id, node.index)
+        else:
+            abort.set()
+        return succeeded
+
+    async def _run_task_graph(self, nodes: list, project_id: str, queued, early: dict | None = None,
+                              slots: asyncio.Semaphore | None = None, abort: asyncio.Event | None = None) -> bool:
+        """
+        Executa o grafo de tarefas no event loop compartilhado. As gerações de código e os
+        comandos do executor (subprocessos assíncronos) são corrotinas.
+        Tarefas já concluídas numa tentativa anterior do plano são puladas; cada conclusão vai
+        para o journal da fila numa thread, fora do event loop.
+        """
+        scheduler = TaskScheduler(max_workers=self.max_parallel_tasks)
+        total_tasks = len(nodes)
+        early = early or {}
+        slots = slots or asyncio.Semaphore(self.max_parallel_tasks)
+
+        async def runner(node):
+            if node.index in early:
+                return await early[node.index]
+            async with slots:
+                succeeded = await self._execute_task(node, total_tasks, project_id)
+            if succeeded:
+                await asyncio.to_thread(self.plan_queue.mark_task_done, queued.plan_id, node.index)
+            elif abort is not None:
+                abort.set()
+            return succeeded
+        return await scheduler.run(nodes, runner, completed=queued.completed_tasks)
+
+    async def _execute_task(self, node, total_tasks: int | str, project_id: str) -> bool:
+        """Executa uma tarefa dentro de um span próprio. Retorna True em caso de sucesso."""
+        bind_log_context(task_id=node.index, agent=node.agent_name)
+        with get_tracer().span(f"Tarefa {node.index}", "task", lane=node.index, agent=node.agent_name,
+                               target_file=node.task.get("target_file")) as span:
+            succeeded = await self._run_task(node, total_tasks, project_id)
+            span.set(success=succeeded)
+            return succeeded
+
+    async def _run_task(self, node, total_tasks: int | str, project_id: str) -> bool:
+        """Executa uma única tarefa do plano. Retorna True em caso de sucesso."""
+        i, task = node.index, node.task
+        agent_name = node.agent_name
+        task_description = task.get("task", "")
+        
+        print(f"\n[USER] [{project_id}] Executando Tarefa {i}/{total_tasks}: Atribuída a '{agent_name}'")
+        print(f"[USER] [{project_id}] Descrição: {task_description}")
+        
+        agent = self.agents.get(agent_name)
+        if not agent:
+            logger.error(f"Agente '{agent_name}' especificado no plano não encontrado.")
+            print(f"[USER] ❌ Erro: Agente '{agent_name}' não existe no sistema.")
+            return False
+
+        try:
+            if agent_name in CODING_AGENTS:
+                target_file = task.get("target_file")
+                if not target_file:
+                    logger.warning(f"Tarefa para '{agent_name}' sem 'target_file', pulando: {task_description}")
+                    print(f"[USER] ⚠️ Tarefa informativa para '{agent_name}' ignorada.")
+                    return True
+                
+                # --- LÓGICA DE CAMINHO DELEGADA AO BIBLIOTECÁRIO ---
+                librarian = self.agents.get("librarian")
+                final_path = librarian.get_project_path(project_id, target_file)
+                
+                # O índice é compartilhado com o Bibliotecário (lock e leitura de disco): fora do event loop
+                snippets = await asyncio.to_thread(get_code_index().context, f"{target_file} {task_description}", project_id,
+                                                   token_budget=CODE_CONTEXT_TOKENS)
+                prompt = f"{task_description}\n\nTrechos relevantes do código já existente no projeto:\n{snippets}" if snippets else task_description
+                # Só arquivos novos (scaffolding) gerados sem o código do projeto no prompt são
+                # reaproveitáveis; alterar um arquivo existente, ou usar os trechos, depende do projeto
+                store = get_artifact_store()
+                reusable = not snippets and not os.path.exists(final_path)
+                canonical = canonical_task(agent_name, task_description, target_file, project_id) if reusable else None
+                key = store.make_key(canonical) if canonical else None
+                entry = await store.acquire(key, project_id) if key else None
+                try:
+                    if not await self._generate_file(node, agent, final_path, prompt, project_id, entry):
+                        return False
+                    if key and entry is None:
+                        await asyncio.to_thread(store.put, key, final_path, canonical,
+                                                source=f"{project_id}/{target_file}", project_id=project_id)
+                finally:
+                    if key and entry is None:
+                        store.release(key)
+            
+            elif agent_name == "executor":
+                command = task.get("command")
+                if not command: raise ValueError("A tarefa do executor precisa de um 'command'.")
+                command = command.replace("{project_id}", project_id)
+                with get_tracer().span(f"{agent.agent_name}.run", "agent", command=command[:200]) as span:
+                    result = await agent.run_async(command_to_execute=command, timeout=task.get("timeout"))
+                    span.set(success=result.get("success"))
+                if not result.get("success"):
+                    print(f"[USER] ❌ O comando da tarefa {i} não foi concluído: {result.get('reason')}")
+                    return False
+            
+            else:
+                logger.warning(f"Lógica de execução para o agente '{agent_name}' não implementada.")
+                print(f"[USER] ⚠️ Lógica para o agente '{agent_name}' não implementada.")
+
+            return True
 
         except Exception as e:
-            logger.error(f"Erro durante a execução do plano '{plan_filename}': {e}", exc_info=True)
-            print(f"[USER] ❌ Erro crítico ao executar o plano de projeto '{plan_filename}': {e}")
-        finally:
-            if os.path.exists(plan_path):
-                os.remove(plan_path)
-            self.project_in_progress.clear()
-            self.prompt_needed.set()
+            print(f"[USER] ❌ Erro ao executar a tarefa {i}: {e}")
+            logger.error(f"Falha na tarefa '{task_description}': {e}", exc_info=True)
+            return False
+
+    async def _generate_file(self, node, agent, final_path: str, prompt: str, project_id: str, entry: dict | None) -> bool:
+        """
+        Grava o arquivo da tarefa, reaproveitando o artefato 'entry' de uma tarefa idêntica
+        quando houver, ou gerando-o com o agente. Em seguida valida o resultado.
+        """
+        target_file = node.task.get("target_file")
+        method = await asyncio.to_thread(get_artifact_store().materialize, entry, final_path) if entry else None
+        if method:
+            print(f"[USER] [{project_id}] ♻️ Tarefa {node.index}: '{target_file}' reaproveitado de '{entry['source']}' ({method}), sem chamar o LLM.")
+            written = True
+        else:
+            with get_tracer().span(f"{agent.agent_name}.write_code", "agent", file=target_file) as span:
+                written = await agent.write_code_async(file_path=final_path, task_description=prompt)
+                span.set(success=written, bytes_written=os.path.getsize(final_path) if os.path.exists(final_path) else 0)
+        await asyncio.to_thread(get_code_index().update, [final_path])
+        if not written:
+            print(f"[USER] ❌ Falha ao gerar o arquivo '{target_file}' (tarefa {node.index}).")
+            return False
+        if self.validate_outputs and not await self._validate_output(node, agent, final_path, prompt, project_id):
+            return False
+        return True
+
+    async def _validate_output(self, node, agent, final_path: str, prompt: str, project_id: str) -> bool:
+        """
+        Valida o arquivo recém-gravado no pool de processos (as demais gerações seguem em
+        paralelo) e, se houver erros, regenera apenas esse arquivo com os erros no prompt, até
+        VALIDATION_RETRIES vezes. Retorna False se restarem erros. Avisos (um import ainda não
+        declarado no requirements.txt) são apenas informados: não pedem regeneração.
+        A resposta reprovada sai do cache do LLM, e as regenerações não passam por ele, para
+        que repetir a tarefa não devolva o mesmo arquivo inválido.
+        """
+        target_file = node.task.get("target_file")
+        project_root = self.agents.get("librarian").get_project_path(project_id, "")
+        planned_files = tuple(self._planned_files.get(self._project_key(project_id), ()))
+        for attempt in range(VALIDATION_RETRIES + 1):
+            with get_tracer().span("validate", "validation", lane=node.index, file=target_file, attempt=attempt) as span:
+                result = await validate_async(final_path, project_root, planned_files)
+                span.set(ok=result["ok"], problems=len(result["problems"]), checks=",".join(result["checks"]))
+            self._report_validation(node.index, project_id, target_file, result)
+            if result["ok"]:
+                return True
+            if attempt == 0:
+                await asyncio.to_thread(agent.forget_response, prompt)
+            if attempt == VALIDATION_RETRIES:
+                break
+
+            print(f"[USER] [{project_id}] 🔁 Regenerando '{target_file}' com os problemas apontados (tentativa {attempt + 1}/{VALIDATION_RETRIES}).")
+            issues = "\n".join(f"- [{p['check']}] {p['message']}" for p in result["problems"] if p["severity"] == ERROR)
+            feedback = (f"{prompt}\n\nUma versão anterior deste arquivo foi reprovada na validação automática:\n{issues}\n"
+                        "Gere novamente o arquivo completo, corrigindo esses problemas.")
+            with get_tracer().span(f"{agent.agent_name}.write_code", "agent", lane=node.index, file=target_file, regeneration=attempt + 1) as span:
+                written = await agent.write_code_async(file_path=final_path, task_description=feedback, use_cache=False)
+                span.set(success=written)
+            await asyncio.to_thread(get_code_index().update, [final_path])
+            if not written:
+                print(f"[USER] ❌ Falha ao regenerar o arquivo '{target_file}' (tarefa {node.index}).")
+                return False
+
+        print(f"[USER] ❌ '{target_file}' continua inválido após {VALIDATION_RETRIES} regeneração(ões) (tarefa {node.index}).")
+        return False
+
+    @staticmethod
+    def _report_validation(index: int, project_id: str, target_file: str, result: dict):
+        checks = ", ".join(result["checks"]) or "nenhuma verificação aplicável"
+        if not result["problems"]:
+            print(f"[USER] [{project_id}] 🔎 Tarefa {index}: '{target_file}' validado ({checks}; {result['duration'] * 1000:.0f} ms).")
+            return
+        print(f"[USER] [{project_id}] 🔎 Tarefa {index}: '{target_file}' com {len(result['problems'])} problema(s) ({checks}):")
+        for problem in result["problems"]:
+            icon = "❌" if problem["severity"] == ERROR else "⚠️"
+            print(f"[USER]     {icon} [{problem['check']}] {problem['message']}")
+        logger.warning(f"Validação de '{target_file}' (tarefa {index}): {result['problems']}")
 
     def start_background_agents(self):
         logger.info("Iniciando agentes de segundo plano...")
@@ -158,12 +488,97 @@ class Orchestrator:
             try:
                 user_input = input()
                 if self.stop_event.is_set(): break
-                self.user_input_queue.put(user_input)
+                self.event_bus.publish(USER_INPUT, user_input)
             except (EOFError, RuntimeError):
-                self.logger.info("Input stream fechado ou interrompido. Sinalizando encerramento.")
-                self.stop_event.set(); break
+                logger.info("Input stream fechado ou interrompido. Sinalizando encerramento.")
+                self.shutdown(); break
+
+    def shutdown(self):
+        """Sinaliza o encerramento e acorda todas as threads que aguardam eventos."""
+        if not self.stop_event.is_set():
+            self.stop_event.set()
+            self.event_bus.publish(SHUTDOWN)
+
+    def _cancel_running_plans(self):
+        """Interrompe os planos em andamento; o journal permite retomá-los no próximo início."""
+        with self._plans_lock:
+            running = list(self._running_plans.items())
+        for plan_id, future in running:
+            logger.warning(f"Plano '{plan_id}' interrompido pelo encerramento; será retomado no próximo início.")
+            future.cancel()
+
+    def _route_request(self, user_input: str):
+        """
+        Encaminha a entrada conforme a intenção (classificada localmente sempre que possível):
+        comandos, commits e modificações do próprio sistema são atendidos direto, depois de
+        confirmados pelo usuário; pedidos de criação e entradas não reconhecidas seguem para
+        o Arquiteto, como antes.
+        """
+        analysis = self.agents.get("prompt_engineer").analyze_user_intent(user_input)
+        intent, params = analysis.get("intent"), analysis.get("params") or {}
+        logger.info(f"Intenção '{intent}' (origem: {analysis.get('source')}, confiança: {analysis.get('confidence', '-')})")
+
+        if intent == "RUN" and params.get("command_to_execute"):
+            command = params["command_to_execute"]
+            self._ask_confirmation(f"executar o comando `{command}`", lambda: self._run_command(command))
+        elif intent == "COMMIT" and params.get("commit_message"):
+            message = params["commit_message"]
+            self._ask_confirmation(f"fazer um commit com a mensagem '{message}'", lambda: self.agents.get("git").run(message))
+        elif intent == "SELF_MODIFY" and params.get("file_path"):
+            paths, description = params["file_path"], params.get("description") or user_input
+            files = paths if isinstance(paths, str) else ", ".join(paths)
+            self._ask_confirmation(f"modificar o código do próprio sistema ({files}): {description}",
+                                   lambda: self.self_modify(paths, description))
+        else:
+            self._handle_request(user_input)
+            return
+        self.prompt_needed.set()
+
+    def _ask_confirmation(self, description: str, action):
+        """Guarda a ação até a próxima entrada do usuário, que a confirma ('s') ou cancela."""
+        self._pending_confirmation = (description, action)
+        print(f"[USER] ❓ Entendi que você quer {description}. Confirma? (s/n)")
+
+    def _resolve_confirmation(self, answer: str):
+        """Executa a ação pendente se a resposta for afirmativa; qualquer outra resposta a cancela."""
+        description, action = self._pending_confirmation
+        self._pending_confirmation = None
+        if answer.strip().lower() in ("s", "sim", "y", "yes"):
+            action()
+        else:
+            logger.info(f"Ação cancelada pelo usuário: {description}")
+            print("[USER] Ação cancelada. Para criar um projeto, descreva-o novamente.")
+
+    def _run_command(self, command: str):
+        result = self.agents.get("executor").run(command_to_execute=command)
+        if result.get("status") == "needs_confirmation":
+            print(f"[USER] ⚠️ Comando não executado: {result['reason']}")
+
+    def _handle_request(self, user_input: str):
+        self.project_in_progress.set()
+        self._cleanup_workspace()
+
+        print(f"\n[USER] Solicitação recebida. Acionando o Arquiteto...")
+        try:
+            if self.stream_plans:
+                run_sync(self._stream_request(user_input))
+            else:
+                self.agents.get("architect").create_master_plan(user_input)
+        except Exception as e:
+            logger.error(f"Falha ao criar o plano para a solicitação: {e}", exc_info=True)
+            print(f"[USER] ❌ {e}")
+            self.prompt_needed.set()
+        finally:
+            with self._plans_lock:
+                if not self._running_plans:
+                    self.project_in_progress.clear()
 
     def interactive_shell(self):
+        """
+        Loop principal orientado a eventos: bloqueia no barramento até chegar uma entrada
+        do usuário, um novo plano ou o sinal de encerramento, sem polling.
+        """
+        events = self.event_bus.subscribe(USER_INPUT, PLAN_ENQUEUED, PLAN_FINISHED)
         self.start_background_agents()
         print("\n--- Shell de Orquestração v3.3 (Estável) Ativado ---")
         print("Descreva o projeto que você quer construir.")
@@ -171,53 +586,101 @@ class Orchestrator:
         input_thread = threading.Thread(target=self._handle_user_input, daemon=True)
         input_thread.start()
 
-        architect = self.agents.get("architect")
-        
+        # Planos que ficaram na fila de uma execução anterior
+        self.process_plan_queue()
         self.prompt_needed.set()
 
         try:
             while not self.stop_event.is_set():
-                self.process_plan_queue()
-                
                 if self.prompt_needed.is_set():
                     print("\nVocê> ", end="", flush=True)
                     self.prompt_needed.clear()
 
-                try:
-                    user_input = self.user_input_queue.get_nowait()
-                    
-                    if not user_input.strip():
-                        self.prompt_needed.set()
-                        continue
-                    
-                    if user_input.lower() in ["exit", "quit"]:
-                        print("Encerrando..."); self.stop_event.set(); break
-                    
-                    self.project_in_progress.set()
-                    self._cleanup_workspace()
-
-                    print(f"\n[USER] Solicitação recebida. Acionando o Arquiteto...")
-                    architect.create_master_plan(user_input)
-                    
-                except queue.Empty:
-                    pass
+                event = events.get()
+                if event.topic == SHUTDOWN:
+                    break
+
+                if event.topic in (PLAN_ENQUEUED, PLAN_FINISHED):
+                    self.process_plan_queue()
+                    continue
+
+                user_input = event.payload
+                if not user_input.strip():
+                    self.prompt_needed.set()
+                    continue
                 
-                time.sleep(0.5)
+                if user_input.lower() in ["exit", "quit"]:
+                    print("Encerrando..."); self.shutdown(); break
+
+                if self._pending_confirmation is not None:
+                    self._resolve_confirmation(user_input)
+                    self.prompt_needed.set()
+                    continue
+
+                if user_input.strip().startswith("/traces"):
+                    self._show_traces(user_input)
+                    self.prompt_needed.set()
+                    continue
+
+                if user_input.strip().startswith("/modify"):
+                    self._self_modify_command(user_input)
+                    self.prompt_needed.set()
+                    continue
+                
+                self._route_request(user_input)
                 
         except KeyboardInterrupt:
-            print("\nEncerrando..."); self.stop_event.set()
+            print("\nEncerrando..."); self.shutdown()
         
+        self.shutdown()
+        self._cancel_running_plans()
+        shutdown_validation_pool()
+        logger.info(f"Estatísticas do cache de respostas do LLM: {get_response_cache().stats()}")
+        logger.info(f"Estatísticas do reuso de artefatos: {get_artifact_store().stats()}")
+        for name in self.agents.loaded():
+            history = getattr(self.agents[name], "history", None)
+            if history is not None:
+                logger.info(f"Uso de tokens do agente '{name}': {history.stats()}")
         logger.info("Aguardando threads de segundo plano finalizem...")
         for thread in self.background_threads: thread.join(timeout=2)
         print("Sistema encerrado.")
 
+    def _show_traces(self, command: str):
+        """Comando '/traces [N]': resume as tarefas e agentes mais lentos dos últimos N planos."""
+        args = command.split()
+        try:
+            last_plans = int(args[1]) if len(args) > 1 else 10
+        except ValueError:
+            print("[USER] Uso: /traces [N]  (N = número de planos recentes, padrão 10)")
+            return
+        print(get_tracer().summarize(last_plans))
+
+    def _self_modify_command(self, command: str):
+        """Comando '/modify arquivo[,arquivo...] descrição': edita arquivos do sistema em modo patch."""
+        args = command.strip().split(maxsplit=2)
+        if len(args) < 3:
+            print("[USER] Uso: /modify src/caminho.py[,src/outro.py] descrição da modificação")
+            return
+        self.self_modify([path for path in args[1].split(",") if path], args[2])
+
+    def self_modify(self, file_paths: str | list[str], description: str) -> bool:
+        """
+        Executa uma intenção SELF_MODIFY: o Engenheiro de Prompts monta um prompt de patch e o
+        BackendDev aplica as edições devolvidas, sem reescrever os arquivos inteiros.
+        """
+        paths = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+        print(f"\n[USER] Modificando {', '.join(paths)}...")
+        result = self.agents.get("backend_dev").modify_files(paths, description, self.agents.get("prompt_engineer"))
+        for path, status in result["files"].items():
+            print(f"[USER]   {path}: {status['applied']} edição(ões) aplicada(s)"
+                  + (f", {len(status['failed'])} não aplicada(s)" if status["failed"] else ""))
+        if result["success"]:
+            print("[USER] ✅ Modificação aplicada.")
+        else:
+            print("[USER] ❌ A modificação não pôde ser aplicada; nenhum arquivo foi alterado.")
+        return result["success"]
+
     def _cleanup_workspace(self):
-        """Limpa arquivos temporários de planejamento de execuções anteriores."""
+        """Limpa artefatos de planejamento de execuções anteriores que falharam."""
         logger.info("Limpando artefatos de planejamento do workspace...")
-        plans_queue_dir = "workspace/plans_queue"
-        if os.path.exists(plans_queue_dir):
-            for f in os.listdir(plans_queue_dir):
-                try:
-                    os.remove(os.path.join(plans_queue_dir, f))
-                except OSError as e:
-                    logger.error(f"Erro ao limpar a fila de planos: {e}")
\ No newline at end of file
+        self.plan_queue.discard_failed()
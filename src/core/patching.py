@@ -0,0 +1,232 @@
+# src/core/patching.py
+
+import difflib
+import re
+
+_SEARCH = re.compile(r"^\s*<{5,9}\s*SEARCH\s*$")
+_DIVIDER = re.compile(r"^\s*={5,9}\s*$")
+_REPLACE = re.compile(r"^\s*>{5,9}\s*REPLACE\s*$")
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+_PATH_PREFIXES = ("arquivo:", "file:", "caminho:", "path:")
+_PATH_LIKE = re.compile(r"^[\w.\-/\\]*[\w-]\.[A-Za-z]\w*$|^[\w.\-\\]*/[\w.\-/\\]+$")
+
+
+class Hunk:
+    """Uma alteração local: o trecho atual ('search') e o que o substitui ('replace')."""
+    __slots__ = ("search", "replace")
+
+    def __init__(self, search: list[str], replace: list[str]):
+        self.search = search
+        self.replace = replace
+
+    def to_block(self, path: str) -> str:
+        """O hunk no formato SEARCH/REPLACE, para reenviar ao modelo."""
+        return "\n".join([path, "<<<<<<< SEARCH", *self.search, "=======", *self.replace, ">>>>>>> REPLACE"])
+
+    def __repr__(self):
+        return f"Hunk(-{len(self.search)} +{len(self.replace)})"
+
+
+class FileEdit:
+    """As alterações de um arquivo, na ordem em que devem ser aplicadas."""
+    def __init__(self, path: str):
+        self.path = path
+        self.hunks: list[Hunk] = []
+
+    def __repr__(self):
+        return f"FileEdit({self.path!r}, {self.hunks})"
+
+
+def _clean_path(line: str) -> str:
+    path = line.strip(" \t`*#")
+    for prefix in _PATH_PREFIXES:
+        if path.lower().startswith(prefix):
+            path = path[len(prefix):].strip(" \t`*")
+    return path.rstrip(":").strip(" \t`*")
+
+
+def _is_path(path: str, known_paths) -> bool:
+    """Se a linha é um caminho ('app.py', 'src/x', um dos 'known_paths'), e não texto explicativo."""
+    if not path:
+        return False
+    normalized = path.replace("\\", "/")
+    if any(normalized == known or known.endswith("/" + normalized) for known in known_paths):
+        return True
+    return bool(_PATH_LIKE.match(path))
+
+
+def _is_file_header(lines: list[str], i: int) -> bool:
+    return lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ ")
+
+
+def _diff_path(line: str) -> str:
+    path = line[4:].split("\t")[0].strip()
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def parse_edits(text: str, default_path: str | None = None, known_paths=()) -> list[FileEdit]:
+    """
+    Extrai as alterações de uma resposta do modelo, em blocos SEARCH/REPLACE:
+
+        caminho/do/arquivo.py
+        <<<<<<< SEARCH
+        (linhas atuais)
+        =======
+        (novas linhas)
+        >>>>>>> REPLACE
+
+    ou em diffs unificados ('--- a/arquivo', '+++ b/arquivo', '@@ ... @@'). O caminho de um
+    bloco é a última linha anterior com cara de caminho (ou igual a um dos 'known_paths');
+    texto explicativo ("Aqui está a alteração:") é ignorado. Blocos sem caminho usam
+    'default_path'. As alterações de um mesmo arquivo são agrupadas.
+    """
+    edits: dict[str, FileEdit] = {}
+    known_paths = [path.replace("\\", "/") for path in known_paths]
+
+    def add(path, hunk):
+        path = path or default_path
+        if path:
+            edits.setdefault(path, FileEdit(path)).hunks.append(hunk)
+
+    lines = text.replace("\r\n", "\n").split("\n")
+    last_path = None
+    diff_path = None
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if _SEARCH.match(line):
+            search, replace = [], []
+            i += 1
+            while i < len(lines) and not _DIVIDER.match(lines[i]):
+                search.append(lines[i])
+                i += 1
+            i += 1
+            while i < len(lines) and not _REPLACE.match(lines[i]):
+                replace.append(lines[i])
+                i += 1
+            add(last_path, Hunk(search, replace))
+        elif _is_file_header(lines, i):
+            diff_path = _diff_path(lines[i + 1])
+            if diff_path == "/dev/null":
+                diff_path = _diff_path(line)
+            i += 1
+        elif _HUNK_HEADER.match(line) and (diff_path or default_path):
+            search, replace = [], []
+            i += 1
+            # Uma linha removida que começa com '-- ' (comentário SQL/Lua) vira '--- ': só um
+            # cabeçalho de arquivo completo ('--- ' seguido de '+++ ') encerra o hunk
+            while i < len(lines) and not _HUNK_HEADER.match(lines[i]) and not lines[i].startswith("```") \
+                    and not _is_file_header(lines, i):
+                body = lines[i]
+                if body.startswith("\\"):  # "\ No newline at end of file"
+                    pass
+                elif body.startswith("-"):
+                    search.append(body[1:])
+                elif body.startswith("+"):
+                    replace.append(body[1:])
+                else:
+                    # Contexto (modelos às vezes omitem o espaço inicial de linhas vazias)
+                    search.append(body[1:] if body.startswith(" ") else body)
+                    replace.append(body[1:] if body.startswith(" ") else body)
+                i += 1
+            # Linhas vazias de contexto no fim do hunk costumam ser apenas separadores
+            while search and replace and not search[-1].strip() and not replace[-1].strip():
+                search.pop()
+                replace.pop()
+            add(diff_path, Hunk(search, replace))
+            continue
+        elif line.strip() and not line.strip().startswith("```") and _is_path(_clean_path(line), known_paths):
+            last_path = _clean_path(line)
+        i += 1
+    return list(edits.values())
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _reindent(lines: list[str], found: list[str], expected: list[str]) -> list[str]:
+    """Ajusta a indentação de 'lines' pela diferença entre o trecho encontrado e o esperado."""
+    found_first = next((line for line in found if line.strip()), "")
+    expected_first = next((line for line in expected if line.strip()), "")
+    actual, wanted = _indent(found_first), _indent(expected_first)
+    if actual == wanted:
+        return lines
+    adjusted = []
+    for line in lines:
+        if not line.strip():
+            adjusted.append(line)
+        elif line.startswith(wanted):
+            adjusted.append(actual + line[len(wanted):])
+        else:
+            adjusted.append(actual + line.lstrip())
+    return adjusted
+
+
+def locate(lines: list[str], search: list[str], start: int = 0, threshold: float = 0.85) -> tuple[int, str] | tuple[None, str]:
+    """
+    Posição de 'search' em 'lines': exata; ignorando espaços nas bordas; ou aproximada
+    (similaridade >= 'threshold', sem empate). Entre ocorrências iguais, prefere a primeira
+    a partir de 'start' (o fim do hunk anterior).
+
+    Returns:
+        (índice da linha, modo) ou (None, motivo da falha).
+    """
+    n = len(search)
+    candidates = range(len(lines) - n + 1)
+
+    exact = [i for i in candidates if lines[i:i + n] == search]
+    if exact:
+        return next((i for i in exact if i >= start), exact[0]), "exact"
+
+    stripped_search = [line.strip() for line in search]
+    stripped_lines = [line.strip() for line in lines]
+    loose = [i for i in candidates if stripped_lines[i:i + n] == stripped_search]
+    if loose:
+        return next((i for i in loose if i >= start), loose[0]), "whitespace"
+
+    target = "\n".join(stripped_search)
+    scored = []
+    for i in candidates:
+        matcher = difflib.SequenceMatcher(None, "\n".join(stripped_lines[i:i + n]), target, autojunk=False)
+        if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold:
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                scored.append((ratio, i))
+    if not scored:
+        return None, "o trecho SEARCH não foi encontrado no arquivo atual"
+    scored.sort(reverse=True)
+    if len(scored) > 1 and scored[1][0] == scored[0][0] and abs(scored[1][1] - scored[0][1]) >= n:
+        return None, "o trecho SEARCH corresponde a mais de um lugar do arquivo"
+    return scored[0][1], f"fuzzy ({scored[0][0]:.2f})"
+
+
+def apply_hunks(content: str, hunks: list[Hunk], threshold: float = 0.85) -> tuple[str, list[tuple[Hunk, str]]]:
+    """
+    Aplica os hunks em sequência sobre 'content'. Hunks que não casam com o arquivo são
+    pulados e devolvidos com o motivo, para serem refeitos; os demais são aplicados.
+    Um hunk com SEARCH vazio acrescenta as linhas ao fim do arquivo (ou cria o conteúdo).
+
+    Returns:
+        (novo conteúdo, lista de (hunk, motivo) das falhas).
+    """
+    trailing_newline = content.endswith("\n") or not content
+    lines = content.replace("\r\n", "\n").split("\n")
+    if content.endswith("\n") or not content:
+        lines.pop()
+    failures = []
+    cursor = 0
+    for hunk in hunks:
+        if not any(line.strip() for line in hunk.search):
+            lines.extend(hunk.replace)
+            cursor = len(lines)
+            continue
+        index, mode = locate(lines, hunk.search, cursor, threshold)
+        if index is None:
+            failures.append((hunk, mode))
+            continue
+        found = lines[index:index + len(hunk.search)]
+        replacement = hunk.replace if mode == "exact" else _reindent(hunk.replace, found, hunk.search)
+        lines[index:index + len(hunk.search)] = replacement
+        cursor = index + len(replacement)
+    return "\n".join(lines) + ("\n" if trailing_newline else ""), failures
@@ -0,0 +1,279 @@
+# src/core/plan_queue.py
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from src.core.code_stream import write_file_atomic
+from src.core.logger import get_logger
+
+logger = get_logger("PlanQueue")
+
+# Prioridades (menor = executa antes)
+PRIORITY_MAINTENANCE = 0
+PRIORITY_DEFAULT = 10
+
+
+class QueuedPlan:
+    """
+    Um plano na fila, com o progresso das tarefas já concluídas (índices 1-based).
+    'partial' indica um plano recebido em streaming que ainda não chegou por completo.
+    """
+    def __init__(self, plan_id: str, plan: dict, priority: int, completed_tasks=None, attempts: int = 0,
+                 partial: bool = False):
+        self.plan_id = plan_id
+        self.plan = plan
+        self.priority = priority
+        self.completed_tasks: set[int] = set(completed_tasks or [])
+        self.attempts = attempts
+        self.partial = partial
+
+    @property
+    def project_id(self) -> str:
+        return self.plan.get("project_id", "unknown_project")
+
+
+class PlanQueue:
+    """
+    Fila de prioridade de planos em memória, com um journal append-only (write-ahead)
+    para recuperação após falhas.
+
+    Cada operação é registrada em 'journal_path' (JSON lines) antes de ter efeito:
+    'enqueue', 'start', 'task_done' e 'finish', além de 'plan_task' e 'plan_complete' para
+    planos recebidos em streaming. Ao iniciar, o journal é reproduzido: planos interrompidos
+    no meio (crash) ou que falharam voltam para a fila e retomam a partir da primeira tarefa
+    não concluída, até 'max_attempts' tentativas. Planos cujo streaming não terminou são
+    descartados.
+
+    Cada registro faz um fsync; no event loop, os métodos devem ser chamados via
+    asyncio.to_thread para não bloquear as demais tarefas.
+
+    Arquivos .json colocados em 'inbox_dir' (formato antigo da fila) são importados ao iniciar.
+    """
+    def __init__(self, journal_path: str = "workspace/plans_journal.jsonl",
+                 inbox_dir: str = "workspace/plans_queue", max_attempts: int = 3):
+        self.journal_path = journal_path
+        self.inbox_dir = inbox_dir
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._plans: dict[str, QueuedPlan] = {}
+        self._failed: set[str] = set()
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self._recover()
+        self.import_inbox()
+
+    @staticmethod
+    def new_plan_id() -> str:
+        return f"plan_{int(time.time() * 1000)}_{uuid.uuid4().hex[:6]}"
+
+    @staticmethod
+    def _default_priority(plan: dict) -> int:
+        return PRIORITY_MAINTENANCE if plan.get("project_id") == "system_maintenance" else PRIORITY_DEFAULT
+
+    def put(self, plan: dict, priority: int | None = None) -> str:
+        """Enfileira um plano e retorna o seu plan_id."""
+        if priority is None:
+            priority = self._default_priority(plan)
+        plan_id = self.new_plan_id()
+        with self._lock:
+            self._append({"op": "enqueue", "plan_id": plan_id, "priority": priority, "plan": plan})
+            self._push(QueuedPlan(plan_id, plan, priority))
+        logger.info(f"Plano '{plan_id}' enfileirado (prioridade {priority}).")
+        return plan_id
+
+    def get_nowait(self, skip=None) -> QueuedPlan | None:
+        """
+        Retira o plano de maior prioridade (FIFO entre iguais), ou None se a fila estiver vazia.
+
+        Args:
+            skip: Função opcional 'skip(queued_plan) -> bool'; planos recusados continuam na fila.
+        """
+        with self._lock:
+            skipped = []
+            queued = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                candidate = self._plans.get(entry[2])
+                if candidate is None:
+                    continue
+                if skip and skip(candidate):
+                    skipped.append(entry)
+                    continue
+                queued = candidate
+                break
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+            if queued is None:
+                return None
+            queued.attempts += 1
+            self._append({"op": "start", "plan_id": queued.plan_id, "attempt": queued.attempts})
+            return queued
+
+    def begin_stream(self, plan_id: str, header: dict, priority: int | None = None) -> QueuedPlan:
+        """
+        Registra no journal um plano recebido em streaming, que começa a executar fora da fila
+        assim que o cabeçalho chega. As tarefas são registradas à medida que chegam
+        (add_streamed_task). Só um plano recebido por completo (complete_stream) é retomado
+        após um crash; um plano truncado é descartado, pois nunca foi validado por inteiro.
+        """
+        plan = {**header, "action_plan": []}
+        if priority is None:
+            priority = self._default_priority(plan)
+        queued = QueuedPlan(plan_id, plan, priority, attempts=1, partial=True)
+        with self._lock:
+            self._append({"op": "enqueue", "plan_id": plan_id, "priority": priority, "plan": plan, "partial": True})
+            self._append({"op": "start", "plan_id": plan_id, "attempt": queued.attempts})
+            self._plans[plan_id] = queued
+        logger.info(f"Plano '{plan_id}' registrado no início do streaming.")
+        return queued
+
+    def add_streamed_task(self, plan_id: str, task: dict):
+        """Acrescenta ao plano em streaming a próxima tarefa recebida."""
+        with self._lock:
+            self._append({"op": "plan_task", "plan_id": plan_id, "task": task})
+            self._plans[plan_id].plan["action_plan"].append(task)
+
+    def complete_stream(self, plan_id: str, plan: dict) -> QueuedPlan:
+        """Registra o plano completo ao fim do streaming e retorna a sua entrada."""
+        with self._lock:
+            self._append({"op": "plan_complete", "plan_id": plan_id, "plan": plan})
+            queued = self._plans[plan_id]
+            queued.plan, queued.partial = plan, False
+        logger.info(f"Plano '{plan_id}' recebido por completo ({len(plan.get('action_plan', []))} tarefa(s)).")
+        return queued
+
+    def mark_task_done(self, plan_id: str, task_index: int):
+        """Registra a conclusão de uma tarefa, para que não seja refeita numa retomada."""
+        with self._lock:
+            queued = self._plans.get(plan_id)
+            if queued is not None:
+                queued.completed_tasks.add(task_index)
+            self._append({"op": "task_done", "plan_id": plan_id, "task": task_index})
+
+    def finish(self, plan_id: str, succeeded: bool):
+        """Encerra um plano. Planos com falha ficam no journal para serem retomados no próximo início."""
+        with self._lock:
+            self._append({"op": "finish", "plan_id": plan_id, "status": "succeeded" if succeeded else "failed"})
+            if succeeded:
+                self._plans.pop(plan_id, None)
+            else:
+                self._failed.add(plan_id)
+
+    def discard(self, plan_id: str):
+        """Encerra um plano sem que ele seja retomado (ex: o streaming do plano falhou)."""
+        with self._lock:
+            if self._plans.pop(plan_id, None) is not None:
+                self._append({"op": "finish", "plan_id": plan_id, "status": "discarded"})
+            self._failed.discard(plan_id)
+
+    def discard_failed(self):
+        """Descarta os planos que falharam nesta sessão, que seriam retomados no próximo início."""
+        with self._lock:
+            for plan_id in list(self._failed):
+                self.discard(plan_id)
+
+    def import_inbox(self):
+        """Importa planos deixados como arquivos .json em 'inbox_dir'."""
+        if not os.path.isdir(self.inbox_dir):
+            return
+        for filename in sorted(f for f in os.listdir(self.inbox_dir) if f.endswith(".json")):
+            path = os.path.join(self.inbox_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    plan = json.load(f)
+                self.put(plan)
+                logger.info(f"Plano '{filename}' importado da pasta '{self.inbox_dir}'.")
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Plano inválido na pasta '{self.inbox_dir}' ignorado ({filename}): {e}")
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+    def _push(self, queued: QueuedPlan):
+        self._plans[queued.plan_id] = queued
+        heapq.heappush(self._heap, (queued.priority, next(self._counter), queued.plan_id))
+
+    def _append(self, record: dict):
+        record["ts"] = time.time()
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _recover(self):
+        """Reproduz o journal, re-enfileira os planos pendentes e compacta o arquivo."""
+        if not os.path.exists(self.journal_path):
+            return
+        states = {}
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Uma última linha truncada é esperada após um crash durante a escrita
+                    logger.warning(f"Registro corrompido no journal (linha {line_number}) ignorado.")
+                    continue
+                plan_id = record.get("plan_id")
+                if record["op"] == "enqueue":
+                    states[plan_id] = QueuedPlan(plan_id, record["plan"], record["priority"], partial=record.get("partial", False))
+                elif plan_id not in states:
+                    continue
+                elif record["op"] == "plan_task":
+                    states[plan_id].plan.setdefault("action_plan", []).append(record["task"])
+                elif record["op"] == "plan_complete":
+                    states[plan_id].plan, states[plan_id].partial = record["plan"], False
+                elif record["op"] == "start":
+                    states[plan_id].attempts = record.get("attempt", states[plan_id].attempts + 1)
+                elif record["op"] == "task_done":
+                    states[plan_id].completed_tasks.add(record["task"])
+                elif record["op"] == "finish" and record["status"] != "failed":
+                    del states[plan_id]
+
+        for queued in states.values():
+            if queued.attempts >= self.max_attempts:
+                logger.error(f"Plano '{queued.plan_id}' descartado após {queued.attempts} tentativas.")
+                continue
+            if queued.partial:
+                # Um plano truncado nunca foi validado por inteiro: nenhum passo do executor pode
+                # rodar nem o projeto ser registrado. Os arquivos já gerados ficam no projeto.
+                tasks = queued.plan.get("action_plan", [])
+                done = [tasks[i - 1].get("target_file") for i in sorted(queued.completed_tasks) if 0 < i <= len(tasks)]
+                logger.warning(f"Plano '{queued.plan_id}' interrompido durante o streaming descartado; "
+                               f"arquivos já gerados: {', '.join(filter(None, done)) or 'nenhum'}.")
+                continue
+            if queued.attempts:
+                logger.info(f"Retomando plano '{queued.plan_id}' ({len(queued.completed_tasks)} tarefa(s) já concluída(s)).")
+            self._push(queued)
+        self._compact()
+
+    def _compact(self):
+        """Reescreve o journal apenas com o estado dos planos ainda pendentes."""
+        lines = []
+        for queued in self._plans.values():
+            lines.append({"op": "enqueue", "plan_id": queued.plan_id, "priority": queued.priority, "plan": queued.plan})
+            if queued.attempts:
+                lines.append({"op": "start", "plan_id": queued.plan_id, "attempt": queued.attempts})
+            lines.extend({"op": "task_done", "plan_id": queued.plan_id, "task": i} for i in sorted(queued.completed_tasks))
+        write_file_atomic(self.journal_path, "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_plan_queue() -> PlanQueue:
+    """Retorna a fila de planos compartilhada do processo (recuperada do journal na primeira chamada)."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = PlanQueue()
+        return _default_queue
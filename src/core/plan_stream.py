@@ -0,0 +1,108 @@
+# src/core/plan_stream.py
+
+import asyncio
+import json
+from src.core.logger import get_logger
+
+logger = get_logger("PlanStream")
+
+
+class JSONLinesParser:
+    """
+    Extrai objetos JSON, um por linha, de um texto recebido em pedaços. Cercas de código
+    (```) e linhas em branco são ignoradas; linhas que não são JSON válido são registradas
+    no log e descartadas.
+    """
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> list[dict]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._parse(lines)
+
+    def close(self) -> list[dict]:
+        lines, self._buffer = [self._buffer], ""
+        return self._parse(lines)
+
+    @staticmethod
+    def _parse(lines: list[str]) -> list[dict]:
+        items = []
+        for line in lines:
+            line = line.strip().rstrip(",")
+            if not line or line.startswith("```"):
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logger.debug(f"Linha ignorada no streaming do plano: {line[:200]}")
+                continue
+            if isinstance(item, dict):
+                items.append(item)
+        return items
+
+
+class PlanStream:
+    """
+    Um plano recebido aos poucos: primeiro o cabeçalho ('project_id', 'description'),
+    depois as tarefas, uma a uma, e por fim o término (ou o erro). O produtor (Arquiteto)
+    e os consumidores (Orquestrador) rodam no mesmo event loop.
+    """
+    def __init__(self):
+        self.header: dict | None = None
+        self.tasks: list[dict] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._condition = asyncio.Condition()
+
+    async def set_header(self, header: dict):
+        async with self._condition:
+            self.header = header
+            self._condition.notify_all()
+
+    async def add_task(self, task: dict):
+        async with self._condition:
+            self.tasks.append(task)
+            self._condition.notify_all()
+
+    async def finish(self, error: BaseException | None = None):
+        async with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    async def wait_header(self) -> dict | None:
+        """O cabeçalho, assim que chegar (None se o streaming terminou sem ele)."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.header is not None or self.done)
+            return self.header
+
+    async def iter_tasks(self):
+        """Entrega (índice 1-based, tarefa) à medida que as tarefas chegam, até o fim do streaming."""
+        delivered = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: len(self.tasks) > delivered or self.done)
+                pending = self.tasks[delivered:]
+                finished = self.done
+            for task in pending:
+                delivered += 1
+                yield delivered, task
+            if finished and delivered == len(self.tasks):
+                return
+
+    async def result(self) -> dict:
+        """
+        O plano completo, no mesmo formato de um plano da fila.
+
+        Raises:
+            O erro do produtor, se o streaming falhou.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.done)
+        if self.error is not None:
+            raise self.error
+        return self.plan()
+
+    def plan(self) -> dict:
+        return {**(self.header or {}), "action_plan": list(self.tasks)}
@@ -0,0 +1,246 @@
+# src/core/project_map.py
+
+import hashlib
+import os
+import threading
+from src.core.logger import get_logger
+
+logger = get_logger("ProjectMap")
+
+LANGUAGES = {
+    ".py": "python", ".html": "html", ".htm": "html", ".css": "css", ".js": "javascript",
+    ".ts": "typescript", ".json": "json", ".md": "markdown", ".txt": "text", ".sh": "shell",
+    ".yml": "yaml", ".yaml": "yaml", ".toml": "toml", ".sql": "sql", ".jsonl": "jsonl",
+}
+
+# Diretórios de cache/ambiente e arquivos internos que não fazem parte do mapa
+IGNORED_DIRS = {"__pycache__", ".git", "llm_cache", "node_modules", "venv", ".venv", "build", "dist"}
+IGNORED_FILES = {"project_map.md", "plans_journal.jsonl"}
+# Subdiretórios do workspace mantidos pelo próprio sistema (ambientes virtuais, rodas, artefatos
+# reaproveitados, traces, caches e builds): ignorados só no primeiro nível da raiz do índice,
+# para não esconder pastas de mesmo nome dentro dos projetos gerados
+IGNORED_WORKSPACE_DIRS = {"envs", "wheelhouse", "artifacts", "traces", "llm_cache", "build", "dist"}
+
+DIR_RULES = {
+    "src/core": "Contém os componentes centrais e a lógica de arquitetura do sistema (Orchestrator, BaseAgent). Regra: Apenas código de infraestrutura crítica.",
+    "src/agents": "Contém a implementação de cada agente individual. Regra: Cada novo agente deve ter seu próprio arquivo aqui.",
+    "workspace": "Diretório de trabalho para operações. Contém subpastas para artefatos gerados.",
+    "workspace/output": "Diretório padrão para a saída de projetos gerados. Regra: Todos os novos projetos devem ser criados aqui.",
+    "logs": "Contém todos os logs do sistema.",
+}
+ENVIRONMENT_RULE = "O sistema operacional é Linux (WSL). Use comandos de shell compatíveis (ex: `xdg-open`, `rm -r`). O comando `open` (macOS) não funcionará."
+
+
+class FileEntry:
+    """Metadados de um arquivo indexado. 'path' é relativo à raiz do índice, com '/'."""
+    __slots__ = ("path", "size", "mtime", "sha256", "language")
+
+    def __init__(self, path: str, size: int, mtime: float, sha256: str, language: str):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.sha256 = sha256
+        self.language = language
+
+    def __repr__(self):
+        return f"FileEntry({self.path!r}, {self.size}, {self.language!r})"
+
+
+def _is_ignored(rel_path: str) -> bool:
+    parts = rel_path.split("/")
+    name = parts[-1]
+    if len(parts) > 1 and parts[0] in IGNORED_WORKSPACE_DIRS:
+        return True
+    if any(part in IGNORED_DIRS for part in parts[:-1]) or name in IGNORED_FILES:
+        return True
+    # Temporários das gravações atômicas (src.core.code_stream)
+    return name.startswith(".") and name.endswith(".tmp")
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ProjectMap:
+    """
+    Índice em memória da árvore do workspace (tamanho, mtime, hash e linguagem de cada
+    arquivo), atualizado incrementalmente, e o mapa do projeto renderizado a partir dele.
+
+    O LibrarianAgent mantém o índice atualizado; os demais agentes leem 'render()', que
+    devolve o texto já montado sem tocar no disco. Arquivos cujo tamanho e mtime não
+    mudaram não são relidos para calcular o hash.
+    """
+    def __init__(self, root: str = "workspace", project_root: str = "."):
+        self.root = os.path.abspath(root)
+        self.project_root = project_root
+        self.version = 0
+        self._entries: dict[str, FileEntry] = {}
+        self._dir_status: dict[str, bool] = {}
+        self._scanned = False
+        self._rendered = None
+        self._lock = threading.RLock()
+
+    def scan(self) -> bool:
+        """Varre a árvore inteira. Retorna True se algo mudou desde a última atualização."""
+        seen = set()
+        changed = False
+        with self._lock:
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                self._prune(dirpath, dirnames)
+                for filename in filenames:
+                    rel_path = self._relative(os.path.join(dirpath, filename))
+                    if _is_ignored(rel_path):
+                        continue
+                    seen.add(rel_path)
+                    changed |= self._update_file(rel_path)
+            for rel_path in set(self._entries) - seen:
+                del self._entries[rel_path]
+                changed = True
+            changed |= self._refresh_dir_status()
+            self._scanned = True
+            return self._bump(changed)
+
+    def update(self, paths) -> bool:
+        """
+        Aplica mudanças pontuais (caminhos absolutos vindos do FileWatcher): arquivos novos
+        ou alterados são reindexados, e caminhos removidos saem do índice junto com o que
+        houver abaixo deles. Retorna True se algo mudou.
+        """
+        changed = False
+        with self._lock:
+            for path in paths:
+                rel_path = self._relative(path)
+                if rel_path == ".." or rel_path.startswith("../"):
+                    continue
+                if rel_path == ".":
+                    return self.scan()
+                if os.path.isdir(path):
+                    changed |= self._update_tree(path)
+                elif os.path.isfile(path):
+                    if not _is_ignored(rel_path):
+                        changed |= self._update_file(rel_path)
+                else:
+                    prefix = rel_path + "/"
+                    removed = [p for p in self._entries if p == rel_path or p.startswith(prefix)]
+                    for p in removed:
+                        del self._entries[p]
+                    changed |= bool(removed)
+            changed |= self._refresh_dir_status()
+            return self._bump(changed)
+
+    def _prune(self, dirpath: str, dirnames: list[str]):
+        """Remove de 'dirnames' (in place, para o os.walk) os diretórios que não entram no índice."""
+        at_root = os.path.abspath(dirpath) == self.root
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not (at_root and d in IGNORED_WORKSPACE_DIRS)]
+
+    def _update_tree(self, directory: str) -> bool:
+        changed = False
+        prefix = self._relative(directory) + "/"
+        if _is_ignored(prefix + "_"):
+            return False
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(directory):
+            self._prune(dirpath, dirnames)
+            for filename in filenames:
+                rel_path = self._relative(os.path.join(dirpath, filename))
+                if not _is_ignored(rel_path):
+                    seen.add(rel_path)
+                    changed |= self._update_file(rel_path)
+        for rel_path in [p for p in self._entries if p.startswith(prefix) and p not in seen]:
+            del self._entries[rel_path]
+            changed = True
+        return changed
+
+    def _update_file(self, rel_path: str) -> bool:
+        full_path = os.path.join(self.root, rel_path)
+        try:
+            stat = os.stat(full_path)
+            entry = self._entries.get(rel_path)
+            if entry and entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+                return False
+            sha256 = _hash_file(full_path)
+        except OSError:
+            return self._entries.pop(rel_path, None) is not None
+        language = LANGUAGES.get(os.path.splitext(rel_path)[1].lower(), "other")
+        self._entries[rel_path] = FileEntry(rel_path, stat.st_size, stat.st_mtime, sha256, language)
+        # Um 'touch' sem mudança de conteúdo não altera o mapa
+        return entry is None or entry.sha256 != sha256
+
+    def _refresh_dir_status(self) -> bool:
+        status = {path: os.path.isdir(os.path.join(self.project_root, path)) for path in DIR_RULES}
+        changed = status != self._dir_status
+        self._dir_status = status
+        return changed
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def _bump(self, changed: bool) -> bool:
+        if changed:
+            self.version += 1
+            self._rendered = None
+        return changed
+
+    def snapshot(self) -> dict[str, FileEntry]:
+        """Cópia do índice atual, indexada pelo caminho relativo."""
+        with self._lock:
+            if not self._scanned:
+                self.scan()
+            return dict(self._entries)
+
+    def render(self) -> str:
+        """Mapa do projeto em markdown, montado a partir do índice em memória."""
+        with self._lock:
+            if not self._scanned:
+                self.scan()
+            if self._rendered is None:
+                self._rendered = self._render()
+            return self._rendered
+
+    def _render(self, max_files_per_project: int = 40) -> str:
+        lines = [
+            "# Mapa do Projeto e Regras de Arquitetura\n",
+            "Este documento é a fonte da verdade sobre a estrutura do projeto. É mantido pelo LibrarianAgent.\n",
+        ]
+        for path, description in DIR_RULES.items():
+            status = "✅ Encontrado" if self._dir_status.get(path) else "❌ Não Encontrado"
+            lines.append(f"### Diretório: `{path}` ({status})")
+            lines.append(f"- **Descrição/Regra:** {description}\n")
+        lines.append("### Ambiente")
+        lines.append(f"- **Descrição/Regra:** {ENVIRONMENT_RULE}\n")
+
+        projects: dict[str, list[FileEntry]] = {}
+        for entry in self._entries.values():
+            parts = entry.path.split("/")
+            if len(parts) >= 3 and parts[0] == "output":
+                projects.setdefault(parts[1], []).append(entry)
+        if projects:
+            lines.append("## Projetos em `workspace/output`\n")
+        for project_id in sorted(projects):
+            entries = sorted(projects[project_id], key=lambda e: e.path)
+            total_kb = sum(e.size for e in entries) / 1024
+            lines.append(f"### Projeto: `{project_id}` ({len(entries)} arquivo(s), {total_kb:.1f} KB)")
+            prefix_len = len(f"output/{project_id}/")
+            for entry in entries[:max_files_per_project]:
+                lines.append(f"- `{entry.path[prefix_len:]}` ({entry.language}, {entry.size} bytes)")
+            if len(entries) > max_files_per_project:
+                lines.append(f"- ... mais {len(entries) - max_files_per_project} arquivo(s)")
+            lines.append("")
+        return "\n".join(lines)
+
+
+_default_map = None
+_default_map_lock = threading.Lock()
+
+
+def get_project_map() -> ProjectMap:
+    """Retorna o mapa do projeto compartilhado do processo."""
+    global _default_map
+    with _default_map_lock:
+        if _default_map is None:
+            _default_map = ProjectMap()
+        return _default_map
@@ -0,0 +1,183 @@
+# src/core/response_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("ResponseCache")
+
+
+class ResponseCache:
+    """
+    Cache em disco das respostas do LLM, endereçado pelo conteúdo da requisição
+    (modelo, system prompt, configuração de geração, histórico e prompt).
+
+    Cada resposta fica em '<cache_dir>/<hash[:2]>/<hash>.json'. Entradas mais antigas que
+    'ttl_seconds' são descartadas na leitura, e quando o total passa de 'max_bytes' as
+    entradas usadas há mais tempo são removidas.
+
+    Todos os métodos fazem I/O de disco; no event loop, devem ser chamados via
+    asyncio.to_thread para não bloquear as demais tarefas.
+    """
+    def __init__(self, cache_dir: str = "workspace/llm_cache", max_bytes: int = 100 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(request) -> str:
+        """Gera a chave (sha256) de uma LLMRequest."""
+        payload = json.dumps({
+            "model": request.model_name,
+            "system_prompt": request.system_prompt,
+            "generation_config": request.generation_config,
+            "history": request.history,
+            "prompt": request.prompt,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, request) -> str | None:
+        """Retorna a resposta em cache para a requisição, ou None."""
+        if not self.enabled:
+            return None
+        key = self.make_key(request)
+        path = self._entry_path(key)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+
+            if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                self._remove(path)
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            # O mtime marca o último uso, usado como critério de remoção por tamanho
+            os.utime(path)
+            self.hits += 1
+        logger.debug(f"Cache hit para a requisição {key[:12]}.")
+        return entry["response"]
+
+    def put(self, request, response_text: str):
+        """Armazena uma resposta bem-sucedida."""
+        if not self.enabled:
+            return
+        key = self.make_key(request)
+        path = self._entry_path(key)
+        data = json.dumps({"created_at": time.time(), "model": request.model_name, "response": response_text},
+                          ensure_ascii=False)
+        with self._lock:
+            try:
+                total_before = self._current_size()
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self.writes += 1
+                self._total_bytes = total_before - previous_size + os.path.getsize(path)
+                if self._total_bytes > self.max_bytes:
+                    self._evict_to_fit()
+            except OSError as e:
+                logger.error(f"Falha ao gravar no cache de respostas: {e}")
+
+    def delete(self, request):
+        """Remove a resposta em cache para a requisição, se houver."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._remove(self._entry_path(self.make_key(request)))
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Estatísticas de uso do cache desde o início do processo."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size_bytes": self._current_size(),
+        }
+
+    def _entries(self):
+        """Lista (caminho, tamanho, mtime) de todas as entradas em disco."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _current_size(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        return self._total_bytes
+
+    def _evict_to_fit(self):
+        """Remove as entradas menos usadas até o cache caber em 'max_bytes'."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+        logger.debug(f"Cache de respostas reduzido para {total} bytes.")
+
+    def _remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Retorna o cache compartilhado pelos agentes. A variável de ambiente LLM_CACHE_BYPASS=1
+    desativa o cache (leituras e escritas) para o processo inteiro.
+    """
+    global _default_cache
+    if _default_cache is None:
+        bypass = os.environ.get("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+        _default_cache = ResponseCache(enabled=not bypass)
+    return _default_cache
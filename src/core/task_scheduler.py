@@ -0,0 +1,211 @@
+# src/core/task_scheduler.py
+
+import asyncio
+import posixpath
+import re
+import shlex
+from src.core.logger import get_logger
+
+logger = get_logger("TaskScheduler")
+
+CODING_AGENTS = ("backend_dev", "frontend_dev")
+
+
+class TaskNode:
+    """
+    Uma tarefa do 'action_plan' com suas dependências já resolvidas.
+    O índice é 1-based, o mesmo exibido ao usuário ("Tarefa i/N").
+    """
+    def __init__(self, index: int, task: dict):
+        self.index = index
+        self.task = task
+        self.agent_name = task.get("agent", "").lower()
+        self.depends_on: set[int] = set()
+
+    def __repr__(self):
+        return f"TaskNode({self.index}, {self.agent_name!r}, depends_on={sorted(self.depends_on)})"
+
+
+def _normalize_path(path: str) -> str:
+    """Caminho em forma comparável: barras normais, sem './' nem '/' inicial ('.env' continua '.env')."""
+    path = posixpath.normpath(path.replace("\\", "/"))
+    return "" if path == "." else path.lstrip("/")
+
+
+def _references_file(command: str, target_file: str) -> bool:
+    """
+    Verifica se um comando de shell menciona o arquivo alvo de uma tarefa. Compara tokens de
+    caminho inteiros: 'workspace/output/p/app.py' referencia 'app.py', 'webapp.py' não.
+    """
+    target = _normalize_path(target_file)
+    if not target:
+        return False
+    try:
+        words = shlex.split(command.replace("\\", "/"))
+    except ValueError:
+        words = command.replace("\\", "/").split()
+    for word in words:
+        for token in re.split(r"[=,:]", word):
+            token = _normalize_path(token) if token else ""
+            if token == target or token.endswith("/" + target):
+                return True
+    return False
+
+
+def build_task_graph(tasks: list[dict]) -> list[TaskNode]:
+    """
+    Constrói o grafo de dependências (DAG) de um action_plan.
+
+    Dependências explícitas vêm do campo opcional 'depends_on' de cada tarefa, que aceita
+    números de tarefa (1-based), 'id's de tarefa ou nomes de 'target_file'.
+    As demais são inferidas:
+    - Tarefas de codificação para o mesmo 'target_file' são executadas na ordem do plano, e
+      só reescrevem um arquivo depois dos 'executor's anteriores que o referenciam.
+    - Cada 'executor' espera o 'executor' anterior e todas as tarefas de codificação anteriores:
+      o comando pode usar arquivos que ele não cita (os módulos importados pelo main.py).
+    - Tarefas de outros agentes também esperam todas as tarefas anteriores.
+
+    Raises:
+        ValueError: Se uma dependência não existir ou se o grafo tiver ciclos.
+    """
+    nodes = [TaskNode(i, task) for i, task in enumerate(tasks, 1)]
+    ids = {str(node.task["id"]): node.index for node in nodes if node.task.get("id") is not None}
+    files = {}
+    for node in nodes:
+        target_file = node.task.get("target_file")
+        if node.agent_name in CODING_AGENTS and target_file:
+            files.setdefault(target_file, []).append(node.index)
+
+    last_executor = None
+    executors = []
+    for node in nodes:
+        for ref in node.task.get("depends_on", []) or []:
+            if isinstance(ref, int) and 1 <= ref <= len(nodes):
+                node.depends_on.add(ref)
+            elif str(ref) in ids:
+                node.depends_on.add(ids[str(ref)])
+            elif str(ref) in files:
+                node.depends_on.update(i for i in files[str(ref)] if i < node.index)
+            else:
+                raise ValueError(f"Tarefa {node.index} depende de '{ref}', que não existe no plano.")
+
+        previous = range(1, node.index)
+        if node.agent_name in CODING_AGENTS:
+            target_file = node.task.get("target_file")
+            if target_file:
+                node.depends_on.update(i for i in files[target_file] if i < node.index)
+                node.depends_on.update(i for i, command in executors if _references_file(command, target_file))
+        elif node.agent_name == "executor":
+            if last_executor:
+                node.depends_on.add(last_executor)
+            # Os executores anteriores já estão cobertos pela cadeia até 'last_executor'
+            node.depends_on.update(i for i in previous if nodes[i - 1].agent_name != "executor")
+            last_executor = node.index
+            executors.append((node.index, node.task.get("command") or ""))
+        else:
+            node.depends_on.update(previous)
+        node.depends_on.discard(node.index)
+
+    _check_acyclic(nodes)
+    return nodes
+
+
+def early_dependencies(tasks: list[dict]) -> set[int] | None:
+    """
+    Dependências da última tarefa de um plano ainda incompleto (recebido em streaming), ou
+    None se ela precisa esperar o plano completo. Só tarefas de codificação com 'target_file'
+    cujas dependências apontam para tarefas já recebidas podem começar antes; o resultado é
+    o mesmo que build_task_graph calcularia com o plano inteiro.
+    """
+    index, task = len(tasks), tasks[-1]
+    target_file = task.get("target_file")
+    if task.get("agent", "").lower() not in CODING_AGENTS or not target_file:
+        return None
+
+    earlier = list(enumerate(tasks[:-1], 1))
+    if any(t.get("agent", "").lower() == "executor" and _references_file(t.get("command") or "", target_file)
+           for _, t in earlier):
+        return None
+    ids = {str(t["id"]): i for i, t in earlier if t.get("id") is not None}
+    files = {}
+    for i, t in earlier:
+        if t.get("agent", "").lower() in CODING_AGENTS and t.get("target_file"):
+            files.setdefault(t["target_file"], []).append(i)
+
+    depends_on = set(files.get(target_file, []))
+    for ref in task.get("depends_on", []) or []:
+        if isinstance(ref, int) and 1 <= ref < index:
+            depends_on.add(ref)
+        elif str(ref) in ids:
+            depends_on.add(ids[str(ref)])
+        elif str(ref) in files:
+            depends_on.update(files[str(ref)])
+        else:
+            # Referência a uma tarefa que ainda não chegou (ou inválida): decide com o plano completo
+            return None
+    return depends_on
+
+
+def _check_acyclic(nodes: list[TaskNode]):
+    """Ordenação topológica (Kahn) apenas para rejeitar planos com ciclos."""
+    pending = {node.index: set(node.depends_on) for node in nodes}
+    while pending:
+        ready = [index for index, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"O plano contém dependências circulares entre as tarefas {sorted(pending)}.")
+        for index in ready:
+            del pending[index]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+class TaskScheduler:
+    """
+    Executa um grafo de tarefas respeitando as dependências, rodando em paralelo
+    todas as tarefas prontas até o limite de 'max_workers'.
+    Na primeira falha nenhuma tarefa nova é iniciada; as que já estão em andamento
+    terminam normalmente antes do retorno.
+    """
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+
+    async def run(self, nodes: list[TaskNode], runner, completed=()) -> bool:
+        """
+        Args:
+            nodes: O grafo produzido por build_task_graph.
+            runner: Corrotina 'runner(node) -> bool' que executa uma tarefa.
+            completed: Índices de tarefas já concluídas (ex: numa retomada), que não são executadas.
+
+        Returns:
+            True se todas as tarefas terminaram com sucesso.
+        """
+        done: set[int] = {node.index for node in nodes if node.index in set(completed)}
+        waiting = {node.index: node for node in nodes if node.index not in done}
+        running: dict[asyncio.Task, TaskNode] = {}
+        failed = False
+
+        while waiting or running:
+            if not failed:
+                ready = [node for node in waiting.values() if node.depends_on <= done]
+                for node in ready[: self.max_workers - len(running)]:
+                    del waiting[node.index]
+                    running[asyncio.create_task(runner(node))] = node
+            if not running:
+                break
+
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                try:
+                    succeeded = future.result()
+                except Exception as e:
+                    logger.error(f"Tarefa {node.index} lançou uma exceção: {e}", exc_info=True)
+                    succeeded = False
+                if succeeded:
+                    done.add(node.index)
+                else:
+                    failed = True
+
+        if failed and waiting:
+            logger.warning(f"Tarefas não executadas devido a falha anterior: {sorted(waiting)}")
+        return not failed and not waiting
@@ -0,0 +1,215 @@
+# src/core/tracing.py
+
+import contextlib
+import contextvars
+import glob
+import itertools
+import json
+import os
+import threading
+import time
+from src.core.logger import get_logger
+
+logger = get_logger("Tracing")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    Um intervalo de tempo medido (plano, tarefa, chamada de agente, requisição ao LLM,
+    subprocesso...). 'attrs' guarda dados como tokens, bytes gravados e códigos de saída.
+    """
+    __slots__ = ("trace", "name", "category", "span_id", "parent_id", "lane", "start_ns", "end_ns", "attrs")
+
+    def __init__(self, trace, name: str, category: str, parent, lane: int | None, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.lane = lane if lane is not None else (parent.lane if parent else 0)
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """Os spans de um plano, exportados juntos quando o span raiz termina."""
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+        self.wall_start = time.time()
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome(self) -> dict:
+        """Formato Trace Event do Chrome (chrome://tracing, Perfetto): eventos completos 'X' em µs."""
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            end_ns = span.end_ns if span.end_ns is not None else time.perf_counter_ns()
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start_ns - self.origin_ns) / 1000,
+                "dur": (end_ns - span.start_ns) / 1000,
+                "pid": 1,
+                "tid": span.lane,
+                "args": {"span_id": span.span_id, "parent_id": span.parent_id, **span.attrs},
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.wall_start))},
+        }
+
+
+class Tracer:
+    """
+    Rastreamento por spans: plano → tarefa → chamada de agente → requisição ao LLM / subprocesso.
+    O span atual é propagado por contextvars, então corrotinas e threads que copiam o contexto
+    (asyncio.create_task, asyncio.to_thread, contextvars.copy_context().run) herdam o pai.
+    Fora de um plano (sem trace ativo), 'span' não registra nada.
+    Cada plano concluído é gravado em 'trace_dir/<plan_id>.json'.
+    """
+    def __init__(self, trace_dir: str = "workspace/traces", keep: int = 200):
+        self.trace_dir = trace_dir
+        self.keep = keep
+
+    @contextlib.contextmanager
+    def trace(self, trace_id: str, name: str, **attrs):
+        """Abre o span raiz de um plano; ao sair, exporta o trace."""
+        trace = Trace(trace_id)
+        span = Span(trace, name, "plan", None, 0, attrs)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            self.export(trace)
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, lane: int | None = None, activate: bool = True, **attrs):
+        """
+        Mede um trecho dentro do trace atual. 'lane' separa tarefas paralelas na visualização.
+        Use activate=False dentro de async generators: o span não vira o pai dos seguintes,
+        já que o contexto do generator é o de quem o consome.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield Span(None, name, category, None, lane, attrs)
+            return
+        span = Span(parent.trace, name, category, parent, lane, attrs)
+        parent.trace.add(span)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            if token is not None:
+                _current_span.reset(token)
+
+    def export(self, trace: Trace):
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            safe_id = "".join(c if c.isalnum() or c in "-_." else "_" for c in trace.trace_id)
+            path = os.path.join(self.trace_dir, f"{safe_id}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(trace.to_chrome(), f, ensure_ascii=False, default=str)
+            self._prune()
+            logger.debug(f"Trace do plano '{trace.trace_id}' exportado para '{path}'.")
+        except Exception as e:
+            logger.error(f"Falha ao exportar o trace '{trace.trace_id}': {e}", exc_info=True)
+
+    def _prune(self):
+        files = sorted(glob.glob(os.path.join(self.trace_dir, "*.json")), key=os.path.getmtime)
+        for path in files[:-self.keep] if self.keep else []:
+            os.remove(path)
+
+    def recent_traces(self, limit: int) -> list[dict]:
+        """Os 'limit' traces mais recentes, do mais novo ao mais antigo."""
+        files = sorted(glob.glob(os.path.join(self.trace_dir, "*.json")), key=os.path.getmtime, reverse=True)
+        traces = []
+        for path in files[:limit]:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    traces.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Trace ilegível '{path}': {e}")
+        return traces
+
+    def summarize(self, last_plans: int = 10, top: int = 5) -> str:
+        """Resumo textual das tarefas mais lentas e do tempo por agente/categoria nos últimos planos."""
+        traces = self.recent_traces(last_plans)
+        if not traces:
+            return "Nenhum trace registrado ainda."
+
+        tasks, per_agent, per_category = [], {}, {}
+        plan_total_ms = 0.0
+        for trace in traces:
+            trace_id = trace.get("otherData", {}).get("trace_id", "?")
+            for event in trace.get("traceEvents", []):
+                dur_ms = event["dur"] / 1000
+                args = event.get("args", {})
+                category = event.get("cat", "")
+                if category == "plan":
+                    plan_total_ms += dur_ms
+                elif category == "task":
+                    tasks.append((dur_ms, trace_id, event["name"], args.get("agent", "?")))
+                    agent_stats = per_agent.setdefault(args.get("agent", "?"), [0, 0.0])
+                    agent_stats[0] += 1
+                    agent_stats[1] += dur_ms
+                else:
+                    category_stats = per_category.setdefault(category, [0, 0.0])
+                    category_stats[0] += 1
+                    category_stats[1] += dur_ms
+
+        lines = [f"Traces dos últimos {len(traces)} plano(s): {plan_total_ms / 1000:.1f}s no total."]
+        lines.append(f"Tarefas mais lentas (top {top}):")
+        for dur_ms, trace_id, name, agent in sorted(tasks, reverse=True)[:top]:
+            lines.append(f"  {dur_ms / 1000:8.2f}s  {trace_id}  {name} ({agent})")
+        lines.append("Tempo por agente (tarefas):")
+        for agent, (count, total_ms) in sorted(per_agent.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {agent:<16} {count:4d} tarefa(s)  total {total_ms / 1000:8.2f}s  média {total_ms / count / 1000:6.2f}s")
+        if per_category:
+            lines.append("Tempo por tipo de operação:")
+            for category, (count, total_ms) in sorted(per_category.items(), key=lambda item: -item[1][1]):
+                lines.append(f"  {category:<16} {count:4d} span(s)   total {total_ms / 1000:8.2f}s  média {total_ms / count / 1000:6.2f}s")
+        return "\n".join(lines)
+
+
+_default_tracer = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Retorna o tracer compartilhado do processo."""
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
@@ -0,0 +1,327 @@
+# src/core/validation.py
+
+import ast
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from src.core.logger import get_logger
+from src.core.project_map import IGNORED_DIRS
+
+logger = get_logger("Validation")
+
+ERROR = "error"      # o arquivo não pode ser usado: a tarefa falha se a regeneração não corrigir
+WARNING = "warning"  # provável defeito: é informado, mas não pede regeneração nem derruba a tarefa
+
+# Distribuições cujo nome de import difere do nome no requirements.txt
+IMPORT_NAMES = {
+    "pillow": {"pil"}, "beautifulsoup4": {"bs4"}, "python-dotenv": {"dotenv"}, "pyyaml": {"yaml"},
+    "scikit-learn": {"sklearn"}, "opencv-python": {"cv2"}, "opencv-python-headless": {"cv2"},
+    "pyjwt": {"jwt"}, "python-dateutil": {"dateutil"}, "psycopg2-binary": {"psycopg2"},
+    "mysql-connector-python": {"mysql"}, "python-telegram-bot": {"telegram"}, "discord.py": {"discord"},
+    "google-generativeai": {"google"}, "protobuf": {"google"}, "attrs": {"attr", "attrs"},
+    "pyserial": {"serial"}, "pygithub": {"github"}, "python-multipart": {"multipart"},
+    "djangorestframework": {"rest_framework"}, "pymupdf": {"fitz"}, "python-docx": {"docx"},
+    "email-validator": {"email_validator"}, "werkzeug": {"werkzeug"}, "pycryptodome": {"crypto"},
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+# Tags cujo fechamento é opcional em HTML
+OPTIONAL_CLOSE_TAGS = {"p", "li", "td", "th", "tr", "option", "optgroup", "dt", "dd", "thead", "tbody", "tfoot",
+                       "colgroup", "rp", "rt", "head", "body", "html"}
+_REQUIREMENT = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*((?:[<>=!~]=?|===)\s*[^\s;,]+(?:\s*,\s*(?:[<>=!~]=?)\s*[^\s;,]+)*)?\s*(;.*)?$")
+
+
+def _problem(check: str, severity: str, message: str) -> dict:
+    return {"check": check, "severity": severity, "message": message}
+
+
+# --- Python ---
+
+def _optional_imports(tree: ast.AST) -> set[int]:
+    """Linhas de imports protegidos por 'try/except ImportError' ou 'if TYPE_CHECKING' (dependências opcionais)."""
+    lines = set()
+    for node in ast.walk(tree):
+        guarded = []
+        if isinstance(node, ast.Try):
+            names = set()
+            for handler in node.handlers:
+                types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+                names.update(getattr(t, "id", getattr(t, "attr", None)) for t in types if t is not None)
+                if handler.type is None:
+                    names.add("ImportError")
+            if names & {"ImportError", "ModuleNotFoundError", "Exception"}:
+                guarded = node.body
+        elif isinstance(node, ast.If) and "TYPE_CHECKING" in ast.unparse(node.test):
+            guarded = node.body
+        for statement in guarded:
+            lines.update(n.lineno for n in ast.walk(statement) if isinstance(n, (ast.Import, ast.ImportFrom)))
+    return lines
+
+
+def _local_module_exists(directory: str, dotted: str, project_root: str, planned: frozenset = frozenset()) -> bool:
+    """
+    O módulo existe no disco ou está entre os arquivos planejados para o projeto ('planned',
+    caminhos relativos à raiz), que podem ainda estar sendo gerados em paralelo.
+    """
+    base = os.path.join(directory, *dotted.split("."))
+    if os.path.isfile(base + ".py") or os.path.isdir(base):
+        return True
+    relative = os.path.relpath(base, project_root).replace(os.sep, "/")
+    return f"{relative}.py" in planned or any(path.startswith(f"{relative}/") for path in planned)
+
+
+def _normalize_planned(planned_files) -> frozenset:
+    return frozenset(os.path.normpath(path).replace(os.sep, "/") for path in planned_files or ())
+
+
+def python_imports(tree: ast.AST, path: str, project_root: str, planned: frozenset = frozenset()) -> tuple[set[str], list[str]]:
+    """
+    (módulos de terceiros importados, imports relativos que não existem) de um módulo.
+    Módulos da biblioteca padrão, do próprio projeto (gravados ou planejados) e imports
+    opcionais não entram.
+    """
+    optional = _optional_imports(tree)
+    directory = os.path.dirname(path)
+    third_party, missing_relative = set(), []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Import, ast.ImportFrom)) or node.lineno in optional:
+            continue
+        if isinstance(node, ast.ImportFrom) and node.level:
+            base = directory
+            for _ in range(node.level - 1):
+                base = os.path.dirname(base)
+            if node.module and not _local_module_exists(base, node.module, project_root, planned):
+                missing_relative.append(f"{'.' * node.level}{node.module} (linha {node.lineno})")
+            continue
+        modules = [alias.name for alias in node.names] if isinstance(node, ast.Import) else [node.module or ""]
+        for module in modules:
+            root = module.split(".")[0]
+            if not root or root in sys.stdlib_module_names or root == "__future__":
+                continue
+            if _local_module_exists(project_root, root, project_root, planned) or _local_module_exists(directory, root, project_root, planned):
+                continue
+            third_party.add(root)
+    return third_party, missing_relative
+
+
+def declared_imports(requirements_path: str) -> tuple[set[str], list[str]]:
+    """(nomes de import cobertos pelas dependências declaradas, linhas inválidas) de um requirements.txt."""
+    names, invalid = set(), []
+    with open(requirements_path, "r", encoding="utf-8") as f:
+        for number, raw in enumerate(f, 1):
+            line = raw.split(" #")[0].strip()
+            if not line or line.startswith(("#", "-", "--")) or "://" in line:
+                continue
+            match = _REQUIREMENT.match(line)
+            if not match:
+                invalid.append(f"linha {number}: '{line}'")
+                continue
+            dist = match.group(1).lower()
+            normalized = dist.replace("-", "_").replace(".", "_")
+            names.update(IMPORT_NAMES.get(dist, set()))
+            names.add(normalized)
+            if normalized.startswith("python_"):
+                names.add(normalized[len("python_"):])
+    return names, invalid
+
+
+def _check_python(path: str, source: str, project_root: str, planned: frozenset, checks: list, problems: list):
+    checks.append("sintaxe")
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        problems.append(_problem("sintaxe", ERROR, f"{e.msg} (linha {e.lineno})"))
+        return
+    checks.append("compilação")
+    try:
+        compile(tree, path, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        problems.append(_problem("compilação", ERROR, f"{getattr(e, 'msg', e)} (linha {getattr(e, 'lineno', '?')})"))
+        return
+
+    third_party, missing_relative = python_imports(tree, path, project_root, planned)
+    checks.append("imports")
+    for module in missing_relative:
+        problems.append(_problem("imports", ERROR, f"Import relativo de um módulo inexistente: {module}."))
+    requirements_path = os.path.join(project_root, "requirements.txt")
+    if third_party and os.path.isfile(requirements_path):
+        declared, _ = declared_imports(requirements_path)
+        undeclared = sorted(m for m in third_party if m.lower() not in declared)
+        if undeclared:
+            problems.append(_problem("imports", WARNING,
+                                     f"Módulos importados que não estão no requirements.txt do projeto: {', '.join(undeclared)}. "
+                                     "Use apenas as dependências declaradas ou módulos do próprio projeto."))
+
+
+def _check_requirements(path: str, project_root: str, planned: frozenset, checks: list, problems: list):
+    """Sintaxe das linhas e cobertura dos imports de terceiros de todos os módulos Python do projeto."""
+    checks.append("sintaxe")
+    declared, invalid = declared_imports(path)
+    for line in invalid:
+        problems.append(_problem("sintaxe", ERROR, f"Dependência inválida na {line}."))
+    checks.append("imports")
+    missing: dict[str, list[str]] = {}
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            module_path = os.path.join(dirpath, filename)
+            try:
+                with open(module_path, "r", encoding="utf-8") as f:
+                    tree = ast.parse(f.read(), filename=module_path)
+            except (OSError, UnicodeDecodeError, SyntaxError):
+                continue  # o próprio módulo é validado quando gravado
+            for module in python_imports(tree, module_path, project_root, planned)[0]:
+                if module.lower() not in declared:
+                    missing.setdefault(module, []).append(os.path.relpath(module_path, project_root))
+    if missing:
+        details = "; ".join(f"{module} (usado em {', '.join(sorted(files))})" for module, files in sorted(missing.items()))
+        problems.append(_problem("imports", WARNING, f"Dependências importadas pelo projeto e ausentes do requirements.txt: {details}."))
+
+
+# --- HTML ---
+
+class _TagBalance(HTMLParser):
+    """Confere se cada tag aberta é fechada na ordem certa (tags vazias e de fechamento opcional à parte)."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: list[tuple[str, int]] = []
+        self.problems: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, self.getpos()[0]))
+
+    def handle_endtag(self, tag):
+        line = self.getpos()[0]
+        if tag in VOID_TAGS:
+            return
+        if not any(open_tag == tag for open_tag, _ in self.stack):
+            self.problems.append(f"</{tag}> na linha {line} não tem tag de abertura correspondente")
+            return
+        while self.stack:
+            open_tag, opened_at = self.stack.pop()
+            if open_tag == tag:
+                break
+            if open_tag not in OPTIONAL_CLOSE_TAGS:
+                self.problems.append(f"<{open_tag}> aberta na linha {opened_at} não foi fechada antes de </{tag}> (linha {line})")
+
+    def unclosed(self) -> list[str]:
+        return [f"<{tag}> aberta na linha {line} não foi fechada" for tag, line in self.stack if tag not in OPTIONAL_CLOSE_TAGS]
+
+
+def _check_html(source: str, checks: list, problems: list, max_reported: int = 10):
+    checks.append("estrutura")
+    parser = _TagBalance()
+    try:
+        parser.feed(source)
+        parser.close()
+    except Exception as e:  # HTMLParser é tolerante, mas não deve derrubar a validação
+        problems.append(_problem("estrutura", WARNING, f"Não foi possível analisar o HTML: {e}"))
+        return
+    issues = parser.problems + parser.unclosed()
+    if issues:
+        more = f" (e mais {len(issues) - max_reported})" if len(issues) > max_reported else ""
+        problems.append(_problem("estrutura", ERROR, "HTML mal formado: " + "; ".join(issues[:max_reported]) + more + "."))
+
+
+# --- Entrada ---
+
+def _requires_content(name: str, extension: str) -> bool:
+    """Tipos em que um arquivo vazio não serve ('__init__.py' e um requirements.txt vazio são válidos)."""
+    return (extension == ".py" and name != "__init__.py") or extension in (".html", ".htm", ".json")
+
+
+def validate_file(path: str, project_root: str, planned_files: tuple = ()) -> dict:
+    """
+    Valida um arquivo gerado. Roda num processo do pool de validação, então só recebe e
+    devolve tipos simples. 'planned_files' são os 'target_file' do plano (relativos à raiz
+    do projeto): imports desses módulos contam como locais mesmo antes de eles existirem.
+
+    Returns:
+        {"path", "checks": [nomes das verificações feitas], "problems": [{"check", "severity",
+        "message"}], "ok": sem erros, "duration": segundos}
+    """
+    start = time.perf_counter()
+    planned = _normalize_planned(planned_files)
+    checks, problems = [], []
+    name = os.path.basename(path)
+    extension = os.path.splitext(name)[1].lower()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        source = None
+        checks.append("leitura")
+        problems.append(_problem("leitura", ERROR, f"Não foi possível ler o arquivo: {e}"))
+
+    if source is not None:
+        if not source.strip() and _requires_content(name, extension):
+            checks.append("conteúdo")
+            problems.append(_problem("conteúdo", ERROR, "O arquivo foi gravado vazio."))
+        elif extension == ".py":
+            _check_python(path, source, project_root, planned, checks, problems)
+        elif extension in (".html", ".htm"):
+            _check_html(source, checks, problems)
+        elif extension == ".json":
+            checks.append("sintaxe")
+            try:
+                json.loads(source)
+            except json.JSONDecodeError as e:
+                problems.append(_problem("sintaxe", ERROR, f"JSON inválido: {e.msg} (linha {e.lineno})"))
+        elif name == "requirements.txt":
+            _check_requirements(path, project_root, planned, checks, problems)
+
+    return {
+        "path": path,
+        "checks": checks,
+        "problems": problems,
+        "ok": not any(problem["severity"] == ERROR for problem in problems),
+        "duration": time.perf_counter() - start,
+    }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_validation_pool() -> ProcessPoolExecutor:
+    """
+    Pool de processos compartilhado das validações (VALIDATION_WORKERS processos, padrão
+    até 4). Os processos nascem de um forkserver, não de um fork do processo com threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.environ.get("VALIDATION_WORKERS", min(4, os.cpu_count() or 1)))
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def shutdown_validation_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def validate_async(path: str, project_root: str, planned_files: tuple = ()) -> dict:
+    """Valida um arquivo no pool de processos, sem ocupar o event loop das gerações."""
+    loop = asyncio.get_running_loop()
+    planned_files = tuple(planned_files)
+    try:
+        return await loop.run_in_executor(get_validation_pool(), validate_file, path, project_root, planned_files)
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"Pool de validação indisponível ({e}); validando '{path}' numa thread.")
+        shutdown_validation_pool()
+        return await asyncio.to_thread(validate_file, path, project_root, planned_files)
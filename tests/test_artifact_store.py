@@ -0,0 +1,118 @@
+# tests/test_artifact_store.py
+
+import asyncio
+import os
+
+from src.core.artifact_store import ArtifactStore, canonical_task, place
+
+
+def test_canonical_task_ignores_project_name_and_formatting():
+    a = canonical_task("backend_dev", "Crie o requirements.txt do loja_virtual com Flask.", "requirements.txt", "loja_virtual")
+    b = canonical_task("backend_dev", "crie o REQUIREMENTS.txt do Loja Virtual com flask", "requirements.txt", "outro")
+    c = canonical_task("backend_dev", "crie o REQUIREMENTS.txt do outro com flask", "requirements.txt", "outro")
+    assert b != a and c == a
+    assert canonical_task("frontend_dev", "Crie o index", "templates/index.html") != canonical_task("frontend_dev", "Crie o index", "index.py")
+
+
+def test_place_never_shares_the_inode(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("conteúdo")
+    assert place(str(source), str(tmp_path / "out" / "b.txt")) in ("reflink", "copy")
+    assert os.stat(source).st_ino != os.stat(tmp_path / "out" / "b.txt").st_ino
+    assert os.stat(source).st_nlink == 1
+
+
+def test_reused_files_are_isolated_between_projects(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+    key = store.make_key("backend_dev|requirements.txt|crie o requirements")
+    project_a = tmp_path / "projA" / "requirements.txt"
+    project_a.parent.mkdir()
+    project_a.write_text("flask\n")
+    store.put(key, str(project_a), "backend_dev|requirements.txt|crie o requirements", source="projA/requirements.txt")
+
+    entry = store.lookup(key)
+    project_b = tmp_path / "projB" / "requirements.txt"
+    assert store.materialize(entry, str(project_b)) in ("reflink", "copy")
+    assert project_b.read_text() == "flask\n"
+
+    # Editar o arquivo reaproveitado no lugar não afeta o outro projeto nem o armazém
+    with open(project_b, "a") as f:
+        f.write("requests\n")
+    assert project_a.read_text() == "flask\n"
+    assert os.stat(project_b).st_nlink == 1
+    assert store.lookup(key) is not None
+    with open(project_a, "a") as f:
+        f.write("numpy\n")
+    assert store.lookup(key)["sha256"] == entry["sha256"]
+    assert store.stats() == {"hits": 1, "misses": 1, "bytes_reused": len("flask\n")}
+
+
+def test_corrupted_object_is_discarded(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+    source = tmp_path / "a.py"
+    source.write_text("print('a')\n")
+    store.put("k" * 64, str(source), "t", source="p/a.py")
+    entry = store.lookup("k" * 64)
+    with open(store._object_path(entry["sha256"]), "w") as f:
+        f.write("print('b')\n")
+    assert store.lookup("k" * 64) is None
+
+
+def test_concurrent_acquire_produces_once(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+    produced = []
+
+    async def task(name):
+        entry = await store.acquire("k" * 64)
+        try:
+            if entry is None:
+                produced.append(name)
+                await asyncio.sleep(0.05)
+                path = tmp_path / f"{name}.txt"
+                path.write_text("x")
+                store.put("k" * 64, str(path), "t", source=name)
+                return name
+            return entry["source"]
+        finally:
+            if entry is None:
+                store.release("k" * 64)
+
+    async def main():
+        return await asyncio.gather(*(task(f"p{i}") for i in range(4)))
+
+    # A consulta ao disco roda em threads: qualquer uma das tarefas pode ser a que gera
+    results = asyncio.run(main())
+    assert len(produced) == 1 and results == produced * 4
+
+
+def test_disabled_store(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"), enabled=False)
+    source = tmp_path / "a.txt"
+    source.write_text("x")
+    store.put("k" * 64, str(source), "t", source="p/a.txt")
+    assert store.lookup("k" * 64) is None
+    assert asyncio.run(store.acquire("k" * 64)) is None
+
+
+def test_files_citing_their_project_are_not_reused_elsewhere(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / "artifacts"))
+    description = "Crie o index.html do {} com o título {}"
+    canonical = canonical_task("frontend_dev", description.format("saas_platform", "saas_platform"), "index.html", "saas_platform")
+    assert canonical == canonical_task("frontend_dev", description.format("loja_virtual", "loja_virtual"), "index.html", "loja_virtual")
+    key = store.make_key(canonical)
+
+    page = tmp_path / "saas_platform" / "index.html"
+    page.parent.mkdir()
+    page.write_text("<html><head><title>SaaS Platform</title></head></html>")
+    store.put(key, str(page), canonical, source="saas_platform/index.html", project_id="saas_platform")
+    assert store.lookup(key, "saas_platform") is not None
+    assert store.lookup(key, "loja_virtual") is None
+    assert asyncio.run(store.acquire(key, "loja_virtual")) is None
+    store.release(key)
+
+    # Sem o nome do projeto no conteúdo, o arquivo serve para qualquer projeto
+    generic = tmp_path / "loja_virtual" / "index.html"
+    generic.parent.mkdir()
+    generic.write_text("<html><head><title>Início</title></head></html>")
+    store.put(key, str(generic), canonical, source="loja_virtual/index.html", project_id="loja_virtual")
+    assert store.lookup(key, "outro_projeto")["source"] == "loja_virtual/index.html"
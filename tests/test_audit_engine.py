@@ -0,0 +1,159 @@
+# tests/test_audit_engine.py
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.core import audit_checks
+from src.core.audit_checks import (OrphanProjectsCheck, OversizedLogsCheck, ProjectDiskUsageCheck, StalePlanCheck,
+                                   StalePlansQueueCheck)
+from src.core.audit_engine import AuditEngine, FileTracker
+from src.core.file_watcher import FileWatcher
+
+
+def write(path, size=10, age=0.0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+def test_file_tracker_totals_by_group(tmp_path):
+    tracker = FileTracker("out", group=lambda rel_path: rel_path.split("/")[1])
+    write(tmp_path / "out/a/x.py", 10)
+    write(tmp_path / "out/a/sub/y.py", 5)
+    write(tmp_path / "out/b/z.py", 7)
+    # Evento no diretório ancestral: varre o prefixo inteiro
+    tracker.apply(".", str(tmp_path))
+    assert tracker.totals == {"a": 15, "b": 7}
+    assert set(tracker.files) == {"out/a/x.py", "out/a/sub/y.py", "out/b/z.py"}
+
+    write(tmp_path / "out/a/x.py", 30)
+    tracker.apply("out/a/x.py", str(tmp_path / "out/a/x.py"))
+    assert tracker.totals["a"] == 35
+
+    os.remove(tmp_path / "out/b/z.py")
+    os.rmdir(tmp_path / "out/b")
+    tracker.apply("out/b", str(tmp_path / "out/b"))
+    assert tracker.totals == {"a": 35} and "out/b" not in tracker.dirs
+
+
+def test_engine_reports_each_problem_once_until_it_changes(tmp_path):
+    engine = AuditEngine(str(tmp_path), [OversizedLogsCheck(max_mb=1e-4)])
+    engine.prime()
+    assert engine.evaluate() == []
+
+    log = write(tmp_path / "logs/app.log", 200)
+    engine.dispatch([log])
+    [(ticket, description)] = engine.evaluate()
+    assert ticket == "oversized_logs.md" and "'logs/app.log'" in description
+
+    # Sem mudanças, nada novo; resolvido e reaparecido, é reportado de novo
+    assert engine.evaluate() == []
+    os.remove(log)
+    engine.dispatch([log])
+    assert engine.evaluate() == []
+    engine.dispatch([write(tmp_path / "logs/app.log", 200)])
+    assert [ticket for ticket, _ in engine.evaluate()] == ["oversized_logs.md"]
+
+
+def test_rescan_dispatches_only_changed_files(tmp_path):
+    check = ProjectDiskUsageCheck(max_mb=1)
+    engine = AuditEngine(str(tmp_path), [check])
+    write(tmp_path / "workspace/output/loja/app.py", 10)
+    engine.rescan()
+    assert check.tracker.totals == {"loja": 10}
+
+    seen = []
+    check.on_change = lambda rel_path, full_path: seen.append(rel_path)
+    engine.rescan()
+    assert seen == []
+    write(tmp_path / "workspace/output/loja/novo.py", 3)
+    engine.rescan()
+    assert seen == ["workspace/output/loja/novo.py"]
+
+
+def test_roots_are_the_nearest_existing_directories(tmp_path):
+    os.makedirs(tmp_path / "workspace")
+    engine = AuditEngine(str(tmp_path), [StalePlanCheck(), ProjectDiskUsageCheck(), OversizedLogsCheck()])
+    assert engine.roots() == [str(tmp_path)]
+    os.makedirs(tmp_path / "logs")
+    assert AuditEngine(str(tmp_path), [StalePlanCheck(), OversizedLogsCheck()]).roots() == \
+        [str(tmp_path / "logs"), str(tmp_path / "workspace")]
+
+
+def test_time_based_checks_become_due(tmp_path):
+    plan = write(tmp_path / "workspace/plan.md", age=100)
+    engine = AuditEngine(str(tmp_path), [StalePlanCheck(max_age=300)])
+    engine.prime()
+    assert engine.evaluate() == []
+    assert 190 < engine.seconds_until_due() <= 200
+
+    assert [ticket for ticket, _ in engine.evaluate(now=time.time() + 250)] == ["stale_plan.md"]
+    os.remove(plan)
+    engine.dispatch([plan])
+    assert engine.evaluate(now=time.time() + 250) == [] and engine.seconds_until_due() is None
+
+
+def test_stale_plans_queue(tmp_path):
+    engine = AuditEngine(str(tmp_path), [StalePlansQueueCheck(max_age=60)])
+    write(tmp_path / "workspace/plans_queue/velho.json", age=120)
+    write(tmp_path / "workspace/plans_queue/novo.json")
+    write(tmp_path / "workspace/plans_queue/notas.txt", age=120)
+    engine.prime()
+    [(_, description)] = engine.evaluate()
+    assert "'velho.json'" in description and "novo.json" not in description and "notas.txt" not in description
+
+
+class FakeManifestStore:
+    def __init__(self, registered):
+        self.registered = set(registered)
+
+    def registered_dirs(self):
+        return self.registered
+
+
+@pytest.mark.parametrize("registered, age, orphan", [
+    ((), 1000, True),
+    (("orfao",), 1000, False),
+    ((), 10, False),  # ainda dentro da carência: o plano pode estar em execução
+])
+def test_orphan_projects(tmp_path, monkeypatch, registered, age, orphan):
+    monkeypatch.setattr(audit_checks, "get_manifest_store", lambda: FakeManifestStore(registered))
+    project_dir = tmp_path / "workspace/output/orfao"
+    write(project_dir / "app.py", age=age)
+    stamp = time.time() - age
+    os.utime(project_dir, (stamp, stamp))
+    engine = AuditEngine(str(tmp_path), [OrphanProjectsCheck(grace=600)])
+    engine.prime()
+    findings = engine.evaluate()
+    assert [ticket for ticket, _ in findings] == (["orphan_projects.md"] if orphan else [])
+    assert all("'orfao'" in description for _, description in findings)
+
+
+def test_failing_check_does_not_stop_the_others(tmp_path):
+    class Broken(StalePlanCheck):
+        def evaluate(self, now):
+            raise RuntimeError("quebrou")
+
+    engine = AuditEngine(str(tmp_path), [Broken(), OversizedLogsCheck(max_mb=1e-4)])
+    write(tmp_path / "logs/app.log", 200)
+    engine.prime()
+    assert [ticket for ticket, _ in engine.evaluate()] == ["oversized_logs.md"]
+
+
+def test_watcher_without_watchdog_asks_for_a_rescan(tmp_path):
+    watcher = FileWatcher(str(tmp_path), poll_interval=0.01)
+    watcher.start()
+    if watcher.native:
+        watcher.stop()
+        pytest.skip("watchdog instalado: o modo de varredura não é usado")
+    stop_event = threading.Event()
+    assert watcher.wait_for_changes(stop_event) is None
+    stop_event.set()
+    assert watcher.wait_for_changes(stop_event) == set()
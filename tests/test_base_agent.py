@@ -0,0 +1,106 @@
+# tests/test_base_agent.py
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.base_agent import BaseAgent
+from src.core.llm_client import FakeBackend, LLMError, LLMRequest, get_backend, set_backend
+from src.core.response_cache import ResponseCache
+
+
+class CountingBackend(FakeBackend):
+    """Responde com uma versão diferente a cada chamada."""
+    async def generate(self, request):
+        await super().generate(request)
+        return f"```python\nversao = {self.calls}\n```"
+
+
+@pytest.fixture
+def agent(tmp_path):
+    return BaseAgent("Teste", "Você gera código.", backend=CountingBackend(chunk_size=5),
+                     cache=ResponseCache(cache_dir=str(tmp_path / "cache")))
+
+
+def test_rejected_file_is_not_served_again_from_the_cache(agent, tmp_path):
+    path = tmp_path / "app.py"
+    asyncio.run(agent.stream_code_to_file(str(path), "Crie app.py", ("python",)))
+    assert path.read_text() == "versao = 1"
+    asyncio.run(agent.stream_code_to_file(str(path), "Crie app.py", ("python",)))
+    assert path.read_text() == "versao = 1" and agent.backend.calls == 1
+
+    agent.forget_response("Crie app.py")
+    asyncio.run(agent.stream_code_to_file(str(path), "Crie app.py", ("python",)))
+    assert path.read_text() == "versao = 2"
+
+
+def test_regenerations_bypass_the_cache(agent, tmp_path):
+    path = tmp_path / "app.py"
+    for expected in ("versao = 1", "versao = 2"):
+        asyncio.run(agent.stream_code_to_file(str(path), "Corrija app.py", ("python",), use_cache=False))
+        assert path.read_text() == expected
+    assert agent.cache.writes == 0
+
+
+def make_agent(tmp_path, backend):
+    return BaseAgent("Teste", "Você gera código.", backend=backend, cache=ResponseCache(cache_dir=str(tmp_path / "cache")))
+
+
+def test_fake_backend_is_deterministic_and_streams_the_same_text():
+    backend = FakeBackend(chunk_size=7)
+    request = LLMRequest("modelo", "sistema", "Crie app.py")
+
+    async def main():
+        return await backend.generate(request), [chunk async for chunk in backend.stream(request)]
+
+    text, chunks = asyncio.run(main())
+    assert text == asyncio.run(FakeBackend().generate(request))
+    assert "".join(chunks) == text and all(len(chunk) <= 7 for chunk in chunks)
+    assert text != asyncio.run(backend.generate(LLMRequest("modelo", "sistema", "Crie outro.py")))
+
+
+def test_sync_think_runs_on_the_shared_loop_and_keeps_history(tmp_path):
+    prompts = []
+    agent = make_agent(tmp_path, FakeBackend(responder=lambda request: prompts.append(request) or f"r{len(prompts)}"))
+    assert agent.think("primeiro") == "r1"
+    assert agent.think("segundo") == "r2"
+    assert [turn["text"] for turn in prompts[1].history] == ["primeiro", "r1"]
+
+
+def test_generations_without_history_run_concurrently(tmp_path):
+    agent = make_agent(tmp_path, FakeBackend(latency=0.2))
+
+    async def main():
+        start = time.perf_counter()
+        texts = await asyncio.gather(*(agent.think_async(f"arquivo {i}", use_history=False) for i in range(5)))
+        return texts, time.perf_counter() - start
+
+    texts, elapsed = asyncio.run(main())
+    assert len(set(texts)) == 5 and elapsed < 0.6
+
+
+def test_backend_failures_become_llm_errors(tmp_path):
+    def responder(request):
+        raise RuntimeError("conexão recusada")
+
+    with pytest.raises(LLMError, match="conexão recusada"):
+        make_agent(tmp_path, FakeBackend(responder=responder)).think("oi")
+
+
+def test_backend_selection(monkeypatch):
+    try:
+        set_backend(None)
+        monkeypatch.setenv("LLM_BACKEND", "fake")
+        assert isinstance(get_backend(), FakeBackend) and get_backend() is get_backend()
+
+        custom = FakeBackend(latency=0.1)
+        set_backend(custom)
+        assert get_backend() is custom
+
+        set_backend(None)
+        monkeypatch.setenv("LLM_BACKEND", "inexistente")
+        with pytest.raises(ValueError, match="inexistente"):
+            get_backend()
+    finally:
+        set_backend(None)
@@ -0,0 +1,99 @@
+# tests/test_code_index.py
+
+import os
+
+import pytest
+
+from src.core.code_index import CodeIndex, tokenize
+
+MODELS = '''import sqlite3
+
+DB_PATH = "loja.db"
+
+
+def conectar():
+    return sqlite3.connect(DB_PATH)
+
+
+class Produto:
+    def __init__(self, nome, preco):
+        self.nome = nome
+        self.preco = preco
+
+    def aplicar_desconto(self, percentual):
+        self.preco *= 1 - percentual / 100
+'''
+
+ROUTES = '''from models import Produto
+
+
+def listar_produtos():
+    return [Produto("Caneca", 30.0)]
+'''
+
+
+@pytest.fixture
+def index(tmp_path):
+    write(tmp_path, "loja/models.py", MODELS)
+    write(tmp_path, "loja/routes.py", ROUTES)
+    write(tmp_path, "loja/static/style.css", ".carrinho { color: red; }\n#rodape { margin: 0; }\n")
+    write(tmp_path, "blog/app.js", "function publicarPost(titulo) {\n  return titulo;\n}\n")
+    return CodeIndex(root=str(tmp_path))
+
+
+def write(root, path, text):
+    full_path = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return full_path
+
+
+def test_tokenize_splits_identifiers_and_folds_accents():
+    assert tokenize("get_user_name UserProfile Ação") == \
+        ["get_user_name", "get", "user", "name", "userprofile", "user", "profile", "acao"]
+    assert tokenize("def return the de") == []
+
+
+def test_search_ranks_the_defining_chunk_first(index):
+    score, chunk = index.search("aplicar desconto no preço")[0]
+    assert (chunk.project, chunk.path) == ("loja", "models.py") and "Produto" in chunk.symbols
+    assert score > 0
+    assert [chunk.path for _, chunk in index.search("conectar", project="loja", k=1)] == ["models.py"]
+    assert index.search("publicarPost", project="loja") == []
+    assert index.search("publicarPost")[0][1].project == "blog"
+
+
+def test_updates_are_incremental(index, tmp_path):
+    assert index.scan() == 4 and index.scan() == 0
+    write(tmp_path, "loja/routes.py", ROUTES + "\n\ndef finalizar_compra():\n    return True\n")
+    assert index.update([os.path.join(tmp_path, "loja/routes.py")]) == 1
+    assert index.search("finalizar compra", k=1)[0][1].path == "routes.py"
+
+    os.remove(tmp_path / "loja/routes.py")
+    assert index.update([str(tmp_path / "loja/routes.py")]) == 1
+    assert all(chunk.path != "routes.py" for _, chunk in index.search("listar produtos finalizar"))
+
+
+def test_hidden_and_temporary_files_are_not_indexed(index, tmp_path):
+    write(tmp_path, "loja/.models.py.tmp123", "def segredo_temporario(): pass\n")
+    index.scan()
+    assert index.search("segredo_temporario") == []
+
+
+def test_context_respects_the_token_budget_and_skips_overlaps(index):
+    context = index.context("Produto preco desconto", project="loja", token_budget=1000)
+    assert context.startswith("--- loja/models.py")
+    assert context.count("def aplicar_desconto") == 1
+    assert index.context("Produto preco desconto", project="loja", token_budget=5) == ""
+    assert index.context("termo inexistente xyz") == ""
+
+
+def test_outline_and_projects_mentioned(index):
+    assert index.outline("loja").splitlines() == [
+        "- models.py: DB_PATH, conectar, Produto, __init__, aplicar_desconto",
+        "- routes.py: listar_produtos",
+        "- static/style.css: carrinho, rodape",
+    ]
+    assert index.projects_mentioned("adicione um carrinho na Loja") == ["loja"]
+    assert index.stats()["projects"] == 2
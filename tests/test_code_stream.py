@@ -0,0 +1,69 @@
+# tests/test_code_stream.py
+
+import asyncio
+import os
+
+import pytest
+
+from src.core.code_stream import FenceStripper, stream_to_file, write_file_atomic
+
+RESPONSE = "Aqui está o arquivo:\n```python\n\nprint('a')\n  x = 1\n\n```\nExplicação com ``` no meio."
+
+
+def strip(text, size, **kwargs):
+    stripper = FenceStripper(**kwargs)
+    output = "".join(stripper.feed(text[i:i + size]) for i in range(0, len(text), size))
+    return output + stripper.finish()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(RESPONSE)])
+def test_fence_stripper_is_independent_of_chunk_boundaries(size):
+    assert strip(RESPONSE, size, languages=("python",)) == "print('a')\n  x = 1"
+
+
+def test_fence_stripper_language_line():
+    # Sem a linguagem configurada, só uma linha vazia após a cerca é descartada
+    assert strip("```\nhtml\n<p>x</p>\n```", 1) == "html\n<p>x</p>"
+    assert strip("```html\n<p>x</p>\n```", 1, languages=("html",)) == "<p>x</p>"
+
+
+def test_fence_stripper_without_fence_or_closing():
+    assert strip("print(1)\n", 1) == "print(1)\n"
+    assert strip("x" * 3000, 100) == "x" * 3000
+    assert strip("```\nsem fim  \n", 2) == "sem fim"
+
+
+async def chunks(*pieces, fail=False):
+    for piece in pieces:
+        await asyncio.sleep(0)
+        yield piece
+    if fail:
+        raise ConnectionError("stream interrompido")
+
+
+def test_stream_to_file_writes_atomically(tmp_path):
+    path = tmp_path / "pkg" / "app.py"
+    progress = []
+    written = asyncio.run(stream_to_file(chunks("```py", "thon\nprint(", "'olá')\n``", "`"), str(path),
+                                         FenceStripper(languages=("python",)), on_progress=progress.append))
+    assert path.read_text(encoding="utf-8") == "print('olá')"
+    assert written == len("print('olá')".encode("utf-8"))
+    assert progress and progress[-1] <= written
+    assert os.listdir(tmp_path / "pkg") == ["app.py"]
+
+
+def test_stream_to_file_keeps_the_original_on_error(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text("original")
+    with pytest.raises(ConnectionError):
+        asyncio.run(stream_to_file(chunks("novo ", "conteúdo", fail=True), str(path)))
+    assert path.read_text() == "original"
+    assert os.listdir(tmp_path) == ["app.py"]
+
+
+def test_write_file_atomic(tmp_path):
+    path = tmp_path / "a" / "b.txt"
+    write_file_atomic(str(path), "um")
+    write_file_atomic(str(path), "dois")
+    assert path.read_text() == "dois"
+    assert os.listdir(path.parent) == ["b.txt"]
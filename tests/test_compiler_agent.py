@@ -0,0 +1,43 @@
+# tests/test_compiler_agent.py
+
+import os
+import sys
+
+from src.agents import compiler_agent
+from src.agents.compiler_agent import CompilerAgent, local_modules
+
+
+def test_local_modules_follow_local_imports(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "util.py").write_text("from . import helpers\n")
+    (tmp_path / "pkg" / "helpers.py").write_text("import os\n")
+    (tmp_path / "main.py").write_text("import json\nfrom pkg import util\n")
+    (tmp_path / "unused.py").write_text("")
+    assert [os.path.relpath(path, tmp_path) for path in local_modules(str(tmp_path / "main.py"))] == \
+        sorted(["main.py", os.path.join("pkg", "__init__.py"), os.path.join("pkg", "util.py"),
+                os.path.join("pkg", "helpers.py")])
+
+
+def test_environment_digest_follows_site_packages_changes(tmp_path, monkeypatch):
+    agent = CompilerAgent.__new__(CompilerAgent)
+    agent._environment_digest = None
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.setattr(sys, "path", [str(site_packages)])
+    packages = ["flask==3.0.0"]
+
+    class Dist:
+        def __init__(self, spec):
+            name, self.version = spec.split("==")
+            self.metadata = {"Name": name}
+
+    monkeypatch.setattr(compiler_agent.importlib.metadata, "distributions", lambda: [Dist(p) for p in packages])
+    first = agent._environment()
+    packages[0] = "flask==3.1.0"
+    assert agent._environment() == first  # site-packages intocado: o resumo em memória vale
+
+    # Um 'pip install' durante a sessão troca o .dist-info e altera o mtime do diretório
+    (site_packages / "flask-3.1.0.dist-info").mkdir()
+    os.utime(site_packages, ns=(0, 10 ** 9))
+    assert agent._environment() != first
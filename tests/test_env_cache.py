@@ -0,0 +1,108 @@
+# tests/test_env_cache.py
+
+import asyncio
+import os
+
+import pytest
+
+from src.core import env_cache
+from src.core.env_cache import (EnvironmentCache, environment_key, is_pinned, parse_requirements_install, read_requirements,
+                                requirements_key)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(env_cache, "OUTPUT_DIR", str(tmp_path / "workspace" / "output"))
+    env_dir = tmp_path / "workspace" / "output" / "app" / ".venv"
+    python = EnvironmentCache.python_path(str(env_dir))
+    os.makedirs(os.path.dirname(python))
+    open(python, "w").close()
+    return EnvironmentCache(root=str(tmp_path / "envs"), wheelhouse=str(tmp_path / "wheelhouse"))
+
+
+@pytest.mark.parametrize("command", [
+    "python workspace/output/app/main.py",
+    "python3.11 workspace/output/app/main.py",
+    "streamlit run workspace/output/app/app.py",
+    "pytest workspace/output/app",
+    "flask --app workspace/output/app/app.py run",
+    "pyinstaller --onefile \"/abs/workspace/output/app/main.py\"",
+])
+def test_project_commands_run_in_the_project_environment(cache, command):
+    env = cache.subprocess_env(command)
+    bin_dir = EnvironmentCache.bin_dir(env["VIRTUAL_ENV"])
+    assert env["VIRTUAL_ENV"].endswith(os.path.join("app", ".venv"))
+    assert env["PATH"].split(os.pathsep)[0] == bin_dir
+    assert "PYTHONHOME" not in env
+
+
+def test_commands_without_a_project_environment(cache):
+    assert cache.subprocess_env("python main.py") is None
+    assert cache.subprocess_env("python workspace/output/other/main.py") is None
+    assert cache.subprocess_env("diff workspace/output/app/a.py workspace/output/other/a.py") is None
+
+
+def test_parse_requirements_install():
+    assert parse_requirements_install("pip install -r workspace/output/app/requirements.txt") == ("app", "workspace/output/app/requirements.txt")
+    assert parse_requirements_install("python3 -m pip install -q -r 'workspace/output/app/requirements.txt'") is not None
+    assert parse_requirements_install("pip install flask") is None
+    assert parse_requirements_install("pip install -r requirements.txt") is None
+
+
+def test_requirements_key_normalizes(tmp_path):
+    a, b, c = tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "c.txt"
+    a.write_text("Flask_SQLAlchemy >= 3.0\nrequests\n")
+    b.write_text("# deps\nrequests  # http\nflask-sqlalchemy>=3.0\n")
+    c.write_text("-r base.txt\n")
+    assert requirements_key(str(a)) == requirements_key(str(b))
+    assert requirements_key(str(c)) is None
+
+
+def test_pinned_requirements_key_the_environment_directly(tmp_path):
+    path = tmp_path / "requirements.txt"
+    path.write_text("Flask==3.0.2\nrequests[socks]==2.31.0 ; python_version >= '3.8'\n")
+    requested = read_requirements(str(path))
+    assert is_pinned(requested) and environment_key(requested) == requirements_key(str(path))
+    assert not is_pinned(["flask"]) and not is_pinned(["flask>=3.0"]) and not is_pinned(["flask==3.*"])
+
+
+def test_unpinned_requirements_are_keyed_on_the_resolved_versions(cache, tmp_path, monkeypatch):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("flask\n")
+    os.makedirs(os.path.join(env_cache.OUTPUT_DIR, "loja"))
+    resolutions = iter([["flask==3.0.0"], ["flask==3.0.0"], ["flask==3.1.0"]])
+
+    async def resolve(requirements_path):
+        return next(resolutions), ""
+
+    async def freeze(python):
+        return []
+
+    commands = []
+
+    async def run(command):
+        commands.append(command)
+        return {"success": True}
+
+    monkeypatch.setattr(cache, "_resolve", resolve)
+    monkeypatch.setattr(cache, "_freeze", freeze)
+    first = asyncio.run(cache.ensure("loja", str(requirements), run))
+    assert first["success"] and not first["reused"]
+    assert open(os.path.join(first["env"], "requirements.lock")).read() == "flask==3.0.0\n"
+    assert asyncio.run(cache.ensure("loja", str(requirements), run))["reused"]
+
+    # Uma nova versão publicada: o ambiente antigo não é reaproveitado
+    newer = asyncio.run(cache.ensure("loja", str(requirements), run))
+    assert not newer["reused"] and newer["env"] != first["env"]
+
+
+def test_unresolvable_requirements_fail_without_building(cache, tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("pacote-que-nao-existe-xyz\n")
+    cache.offline = True
+
+    async def run(command):
+        raise AssertionError("nenhum comando deveria rodar")
+
+    result = asyncio.run(cache.ensure("loja", str(requirements), run))
+    assert not result["success"] and "resolver" in result["reason"]
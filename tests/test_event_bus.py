@@ -0,0 +1,48 @@
+# tests/test_event_bus.py
+
+import queue
+import threading
+
+import pytest
+
+from src.core.event_bus import BUG_TICKET, PLAN_FINISHED, SHUTDOWN, USER_INPUT, EventBus, get_event_bus
+
+
+def test_events_reach_only_the_subscribed_topics():
+    bus = EventBus()
+    plans = bus.subscribe(PLAN_FINISHED)
+    everything = bus.subscribe(PLAN_FINISHED, USER_INPUT)
+    bus.publish(USER_INPUT, "crie um app")
+    bus.publish(PLAN_FINISHED, "plan_1")
+    bus.publish(BUG_TICKET, "ticket.md")  # sem assinantes
+
+    assert [(e.topic, e.payload) for e in (everything.get_nowait(), everything.get_nowait())] == \
+        [(USER_INPUT, "crie um app"), (PLAN_FINISHED, "plan_1")]
+    assert plans.get_nowait().payload == "plan_1"
+    assert plans.empty() and everything.empty()
+
+
+def test_shutdown_reaches_every_subscriber_and_unsubscribe_stops_delivery():
+    bus = EventBus()
+    a, b = bus.subscribe(USER_INPUT), bus.subscribe(BUG_TICKET)
+    bus.unsubscribe(b)
+    bus.publish(SHUTDOWN)
+    assert a.get_nowait().topic == SHUTDOWN
+    assert b.empty()
+
+
+def test_subscriber_blocks_until_an_event_arrives():
+    bus = EventBus()
+    events = bus.subscribe(USER_INPUT)
+    received = []
+    consumer = threading.Thread(target=lambda: received.append(events.get(timeout=2)))
+    consumer.start()
+    bus.publish(USER_INPUT, "oi")
+    consumer.join()
+    assert received[0].payload == "oi"
+    with pytest.raises(queue.Empty):
+        events.get(timeout=0.01)
+
+
+def test_default_bus_is_shared():
+    assert get_event_bus() is get_event_bus()
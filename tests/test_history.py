@@ -0,0 +1,72 @@
+# tests/test_history.py
+
+import asyncio
+
+import pytest
+
+from src.core.history import FRESH, SLIDING_WINDOW, SUMMARIZE, ConversationHistory
+
+
+def record_all(history, pairs):
+    async def main():
+        for prompt, response in pairs:
+            await history.record(prompt, response)
+    asyncio.run(main())
+
+
+def pairs(count, size=40):
+    return [(f"p{i} " + "x" * size, f"r{i} " + "y" * size) for i in range(count)]
+
+
+def test_fresh_keeps_nothing():
+    history = ConversationHistory("a", strategy=FRESH)
+    record_all(history, pairs(3))
+    assert history.context() == [] and history.turns == []
+
+
+def test_sliding_window_limits_turns_and_tokens():
+    history = ConversationHistory("a", strategy=SLIDING_WINDOW, max_turns=2)
+    record_all(history, pairs(5))
+    assert [turn["text"][:2] for turn in history.context()] == ["p3", "r3", "p4", "r4"]
+
+    history = ConversationHistory("a", strategy=SLIDING_WINDOW, max_tokens=50)
+    record_all(history, pairs(5))
+    assert history.context_tokens() <= 50 and history.turns[-1]["text"].startswith("r4")
+
+
+def test_summarize_condenses_the_oldest_turns():
+    calls = []
+
+    async def summarizer(previous, turns):
+        calls.append((previous, [turn["text"][:2] for turn in turns]))
+        return f"resumo {len(calls)}"
+
+    history = ConversationHistory("a", strategy=SUMMARIZE, max_tokens=100, summarizer=summarizer)
+    record_all(history, pairs(6))
+    assert calls and calls[0][0] == "" and calls[0][1][:2] == ["p0", "r0"]
+    context = history.context()
+    assert context[0]["text"].endswith(f"resumo {len(calls)}") and context[-1]["text"].startswith("r5")
+    assert history.summarizations == len(calls)
+
+
+def test_failing_summarizer_falls_back_to_a_local_summary():
+    async def summarizer(previous, turns):
+        raise RuntimeError("sem rede")
+
+    history = ConversationHistory("a", strategy=SUMMARIZE, max_tokens=100, summarizer=summarizer)
+    record_all(history, pairs(6))
+    # O resumo local guarda o texto truncado dos turnos, limitado ao final mais recente
+    assert "- Agente: r3" in history.summary
+    assert len(history.summary) <= history.max_tokens
+    assert history.turns[-1]["text"].startswith("r5")
+
+
+def test_token_accounting_and_unknown_strategy():
+    history = ConversationHistory("a")
+    history.track(120, "y" * 40)
+    history.track(80, "")
+    stats = history.stats()
+    assert (stats["calls"], stats["prompt_tokens"], stats["last_prompt_tokens"]) == (2, 200, 80)
+    assert stats["response_tokens"] > 0
+    with pytest.raises(ValueError):
+        ConversationHistory("a", strategy="infinito")
@@ -0,0 +1,101 @@
+# tests/test_intent_classifier.py
+
+import threading
+
+import pytest
+
+from src.core.intent_classifier import IntentClassifier
+from src.core.orchestrator import Orchestrator
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+
+@pytest.mark.parametrize("text, intent, params", [
+    ("execute o comando ls -l", "RUN", {"command_to_execute": "ls -l"}),
+    ("por favor, rode `pytest -q`", "RUN", {"command_to_execute": "pytest -q"}),
+    ("$ ls -la", "RUN", {"command_to_execute": "ls -la"}),
+    ("salve meu trabalho com a mensagem 'finalizei'", "COMMIT", {"commit_message": "finalizei"}),
+    ("faça commit com a mensagem 'ajustes'", "COMMIT", {"commit_message": "ajustes"}),
+    ("modifique o arquivo src/core/orchestrator.py para adicionar um log", "SELF_MODIFY",
+     {"file_path": "src/core/orchestrator.py", "description": "adicionar um log"}),
+    ("crie um app flask simples", "BUILD", {"description": "um app flask simples"}),
+])
+def test_rules(classifier, text, intent, params):
+    prediction = classifier.classify(text)
+    assert (prediction.intent, prediction.params, prediction.source) == (intent, params, "rules")
+    assert prediction.confidence == IntentClassifier.RULE_CONFIDENCE
+
+
+@pytest.mark.parametrize("text", [
+    "crie uma api que execute o comando ls",
+    "crie um jogo que salve o placar com a mensagem 'fim de jogo'",
+    "quero um script que rode o comando `backup.sh`",
+    "faça um bot que grave as mensagens com a mensagem 'oi'",
+])
+def test_build_requests_mentioning_commands_or_commits_stay_build(classifier, text):
+    assert classifier.classify(text).intent == "BUILD"
+
+
+def test_build_verb_never_yields_a_confident_local_action(classifier):
+    # Cita uma classe do sistema: a regra de criação não vale, e o modelo não pode decidir sozinho
+    prediction = classifier.classify("crie um app que atualize o Orchestrator")
+    assert prediction.intent == "BUILD" or prediction.confidence <= IntentClassifier.UNSURE_CONFIDENCE
+
+
+class FakePromptEngineer:
+    def __init__(self, analysis):
+        self.analysis = analysis
+
+    def analyze_user_intent(self, user_input):
+        return self.analysis
+
+
+class FakeGit:
+    def __init__(self):
+        self.messages = []
+
+    def run(self, message):
+        self.messages.append(message)
+
+
+def make_orchestrator(analysis):
+    orchestrator = Orchestrator.__new__(Orchestrator)
+    orchestrator.git = FakeGit()
+    orchestrator.agents = {"prompt_engineer": FakePromptEngineer(analysis), "git": orchestrator.git}
+    orchestrator.prompt_needed = threading.Event()
+    orchestrator._pending_confirmation = None
+    orchestrator.handled = []
+    orchestrator._handle_request = orchestrator.handled.append
+    return orchestrator
+
+
+def test_local_actions_wait_for_confirmation():
+    orchestrator = make_orchestrator({"intent": "COMMIT", "params": {"commit_message": "fim"}})
+    orchestrator._route_request("salve com a mensagem 'fim'")
+    assert orchestrator.git.messages == [] and orchestrator._pending_confirmation is not None
+
+    orchestrator._resolve_confirmation("n")
+    assert orchestrator.git.messages == [] and orchestrator._pending_confirmation is None
+
+    orchestrator._route_request("salve com a mensagem 'fim'")
+    orchestrator._resolve_confirmation("sim")
+    assert orchestrator.git.messages == ["fim"]
+
+
+def test_self_modify_waits_for_confirmation():
+    orchestrator = make_orchestrator({"intent": "SELF_MODIFY", "params": {"file_path": "src/core/logger.py", "description": "x"}})
+    calls = []
+    orchestrator.self_modify = lambda paths, description: calls.append((paths, description))
+    orchestrator._route_request("altere o src/core/logger.py")
+    assert calls == []
+    orchestrator._resolve_confirmation("s")
+    assert calls == [("src/core/logger.py", "x")]
+
+
+def test_build_goes_to_the_architect():
+    orchestrator = make_orchestrator({"intent": "BUILD", "params": {"description": "um jogo"}})
+    orchestrator._route_request("crie um jogo")
+    assert orchestrator.handled == ["crie um jogo"] and orchestrator._pending_confirmation is None
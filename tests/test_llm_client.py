@@ -0,0 +1,141 @@
+# tests/test_llm_client.py
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.llm_client import GeminiBackend, LLMRequest
+from src.core.model_pool import LLMError, ModelClientPool, RetryPolicy
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Responde com a próxima resposta roteirizada para o caminho da requisição."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.received.append((self.path, self.headers.get("x-goog-api-key"), json.loads(body)))
+        status, headers, payload = self.server.script.pop(0)
+        if isinstance(payload, list):  # SSE em chunks
+            self.send_response(status)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in payload:
+                data = f"data: {json.dumps(event)}\r\n\r\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeminiHandler)
+    httpd.script, httpd.received = [], []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def reply(text, tokens=7):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}], "usageMetadata": {"totalTokenCount": tokens}}
+
+
+def backend_for(server, max_retries=2):
+    pool = ModelClientPool(retry_policy=RetryPolicy(max_retries=max_retries, base_delay=0.01, max_delay=1.0))
+    return GeminiBackend(base_url=f"http://127.0.0.1:{server.server_address[1]}", api_key="test-key", pool=pool)
+
+
+def request(prompt="Olá"):
+    return LLMRequest("gemini-test", "Você é um teste.", prompt, {"temperature": 0.1},
+                      history=[{"role": "user", "text": "oi"}, {"role": "model", "text": "olá"}])
+
+
+def test_generate_200(server):
+    server.script.append((200, {}, reply("resposta")))
+    backend = backend_for(server)
+
+    async def main():
+        first = await backend.generate(request())
+        server.script.append((200, {}, reply("segunda")))
+        second = await backend.generate(request("de novo"))
+        await backend.pool.http_pool(backend.base_url).aclose()
+        return first, second
+
+    assert asyncio.run(main()) == ("resposta", "segunda")
+    path, api_key, body = server.received[0]
+    assert path == "/v1beta/models/gemini-test:generateContent"
+    assert api_key == "test-key"
+    assert body["systemInstruction"] == {"parts": [{"text": "Você é um teste."}]}
+    assert [turn["role"] for turn in body["contents"]] == ["user", "model", "user"]
+    assert body["generationConfig"] == {"temperature": 0.1}
+
+
+def test_429_honors_retry_after(server):
+    server.script += [(429, {"Retry-After": "0.2"}, {"error": {"message": "quota"}}), (200, {}, reply("ok"))]
+    backend = backend_for(server)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        text = await backend.generate(request())
+        return text, loop.time() - start
+
+    text, elapsed = asyncio.run(main())
+    assert text == "ok" and len(server.received) == 2
+    assert elapsed >= 0.2
+
+
+def test_5xx_is_retried_then_gives_up(server):
+    server.script += [(503, {}, {"error": {"message": "indisponível"}}), (500, {}, {}), (200, {}, reply("ok"))]
+    assert asyncio.run(backend_for(server).generate(request())) == "ok"
+
+    server.script += [(500, {}, {"error": {"message": "falhou"}})] * 2
+    with pytest.raises(LLMError) as error:
+        asyncio.run(backend_for(server, max_retries=1).generate(request()))
+    assert error.value.status == 500
+
+
+def test_4xx_is_not_retried(server):
+    server.script += [(400, {}, {"error": {"message": "pedido inválido"}})]
+    with pytest.raises(LLMError) as error:
+        asyncio.run(backend_for(server).generate(request()))
+    assert error.value.status == 400 and not error.value.retryable
+    assert "pedido inválido" in str(error.value)
+    assert len(server.received) == 1
+
+
+def test_sse_stream(server):
+    server.script += [(503, {}, {}), (200, {}, [reply("Olá, "), reply(""), reply("mundo"), reply("!")])]
+    backend = backend_for(server)
+
+    async def main():
+        return [piece async for piece in backend.stream(request())]
+
+    assert asyncio.run(main()) == ["Olá, ", "mundo", "!"]
+    assert server.received[-1][0] == "/v1beta/models/gemini-test:streamGenerateContent?alt=sse"
+
+
+def test_connection_errors_become_llm_errors():
+    pool = ModelClientPool(retry_policy=RetryPolicy(max_retries=1, base_delay=0.01))
+    backend = GeminiBackend(base_url="http://127.0.0.1:9", api_key="k", pool=pool)
+    with pytest.raises(LLMError):
+        asyncio.run(backend.generate(request()))
@@ -0,0 +1,90 @@
+# tests/test_logger.py
+
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+from src.core.logger import (CompressingRotatingFileHandler, ContextFilter, JSONLinesFormatter, NonBlockingQueueHandler,
+                             SamplingFilter, _parse_mapping, log_context)
+
+
+def make_record(name="Executor", level=logging.INFO, msg="mensagem", exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, exc_info)
+
+
+def test_sampling_keeps_the_configured_share_of_low_levels():
+    sampling = SamplingFilter({"Executor": 0.25, "Silencioso": 0})
+    kept = [sampling.filter(make_record("Executor.sub")) for _ in range(100)]
+    # O primeiro registro é sempre mantido; depois, 1 a cada 4
+    assert kept[0] and sum(kept) == 26
+    assert all(sampling.filter(make_record("Executor", logging.WARNING)) for _ in range(10))
+    assert not sampling.filter(make_record("Silencioso"))
+    assert all(sampling.filter(make_record("Outro")) for _ in range(10))
+
+
+def test_context_is_attached_and_restored_as_json():
+    context = ContextFilter()
+    formatter = JSONLinesFormatter()
+    with log_context(plan_id="plan_1", task_id=2):
+        with log_context(agent="Backend"):
+            inner = make_record()
+            context.filter(inner)
+        outer = make_record()
+        context.filter(outer)
+
+    entry = json.loads(formatter.format(inner))
+    assert (entry["plan_id"], entry["task_id"], entry["agent"], entry["msg"]) == ("plan_1", 2, "Backend", "mensagem")
+    assert "agent" not in json.loads(formatter.format(outer))
+    context.filter(after := make_record())
+    assert after.plan_id is None
+
+
+def test_queue_handler_drops_low_levels_when_full_and_keeps_tracebacks():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1 and log_queue.qsize() == 1
+
+    log_queue.get_nowait()
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        handler.handle(make_record(level=logging.ERROR, exc_info=sys.exc_info()))
+    entry = json.loads(JSONLinesFormatter().format(log_queue.get_nowait()))
+    assert entry["msg"] == "mensagem" and "ValueError: falhou" in entry["exc"]
+
+
+def test_rotation_by_size_compresses_old_files(tmp_path):
+    path = str(tmp_path / "system_debug.jsonl")
+    handler = CompressingRotatingFileHandler(path, max_bytes=200, backup_count=2)
+    handler.setFormatter(JSONLinesFormatter())
+    for i in range(20):
+        handler.emit(make_record(msg=f"registro {i} " + "x" * 40))
+    handler.close()
+    assert sorted(os.listdir(tmp_path)) == ["system_debug.jsonl", "system_debug.jsonl.1.gz", "system_debug.jsonl.2.gz"]
+    with gzip.open(path + ".1.gz", "rt", encoding="utf-8") as f:
+        assert all(json.loads(line)["logger"] == "Executor" for line in f)
+
+
+def test_rotation_by_age(tmp_path):
+    path = tmp_path / "system_debug.jsonl"
+    path.write_text('{"msg": "antigo"}\n')
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    handler = CompressingRotatingFileHandler(str(path), max_bytes=10 ** 6, backup_count=1, max_age=60)
+    handler.setFormatter(JSONLinesFormatter())
+    handler.emit(make_record(msg="novo"))
+    handler.close()
+    assert json.loads(path.read_text())["msg"] == "novo"
+    with gzip.open(str(path) + ".1.gz", "rt", encoding="utf-8") as f:
+        assert "antigo" in f.read()
+
+
+def test_parse_mapping():
+    assert _parse_mapping("ModelPool=INFO, EventBus = WARNING,,invalido") == {"ModelPool": "INFO", "EventBus": "WARNING"}
+    assert _parse_mapping(None) == {}
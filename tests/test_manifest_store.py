@@ -0,0 +1,92 @@
+# tests/test_manifest_store.py
+
+import json
+import threading
+
+import pytest
+
+from src.core.manifest_store import JSONManifestStore, SQLiteManifestStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        yield JSONManifestStore(str(tmp_path / "manifest.json"))
+    else:
+        store = SQLiteManifestStore(str(tmp_path / "manifest.db"), import_json=None)
+        yield store
+        store.close()
+
+
+def test_register_keeps_created_at_and_updates_the_rest(store):
+    store.register("loja", "workspace/output/loja", "Loja virtual")
+    created_at = store.get("loja")["created_at"]
+    store.set_status("loja", "ARCHIVED")
+    store.register("loja", "workspace/output/loja_v2", "Loja virtual 2")
+    entry = store.get("loja")
+    assert entry["created_at"] == created_at and entry["status"] == "ACTIVE"
+    assert (entry["path"], entry["description"]) == ("workspace/output/loja_v2", "Loja virtual 2")
+    assert store.registered_dirs() == {"loja_v2"}
+
+
+def test_query_filters_and_orders_by_last_access(store):
+    for project_id in ("a", "b", "c"):
+        store.register(project_id, f"workspace/output/{project_id}", project_id)
+    # Instantes fixos para não depender da resolução do relógio
+    for project_id, stamp in (("a", "2024-01-03T00:00:00Z"), ("b", "2024-01-01T00:00:00Z"), ("c", "2024-01-02T00:00:00Z")):
+        set_last_accessed(store, project_id, stamp)
+    store.set_status("c", "ARCHIVED")
+
+    assert list(store.query()) == ["b", "c", "a"]
+    assert list(store.query(status="ACTIVE")) == ["b", "a"]
+    assert list(store.query(accessed_before="2024-01-02T12:00:00Z")) == ["b", "c"]
+    assert list(store.query(limit=1)) == ["b"]
+
+    store.touch("b")
+    assert list(store.query(status="ACTIVE")) == ["a", "b"]
+    store.remove("a")
+    assert store.get("a") is None and set(store.all()) == {"b", "c"}
+
+
+def set_last_accessed(store, project_id, stamp):
+    if isinstance(store, JSONManifestStore):
+        with store.transaction() as manifest:
+            manifest[project_id] = {**manifest[project_id], "last_accessed": stamp}
+    else:
+        with store._write() as conn:
+            conn.execute("UPDATE projects SET last_accessed = ? WHERE project_id = ?", (stamp, project_id))
+
+
+def test_concurrent_registrations_are_not_lost(store):
+    threads = [threading.Thread(target=store.register, args=(f"p{i}", f"workspace/output/p{i}", "x")) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store.all()) == 20
+
+
+def test_json_store_sees_changes_from_other_instances(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    first, second = JSONManifestStore(path), JSONManifestStore(path)
+    first.register("a", "workspace/output/a", "A")
+    second.register("b", "workspace/output/b", "B")
+    assert set(first.all()) == {"a", "b"}
+    assert set(json.load(open(path, encoding="utf-8"))) == {"a", "b"}
+
+
+def test_sqlite_store_imports_the_json_manifest_only_into_an_empty_database(tmp_path):
+    json_store = JSONManifestStore(str(tmp_path / "manifest.json"))
+    json_store.register("legado", "workspace/output/legado", "Projeto antigo")
+    store = SQLiteManifestStore(str(tmp_path / "manifest.db"), import_json=json_store.path)
+    assert store.get("legado")["description"] == "Projeto antigo"
+    store.register("legado", "workspace/output/legado", "Projeto atualizado")
+    store.close()
+
+    json_store.register("novo", "workspace/output/novo", "Só no JSON")
+    reopened = SQLiteManifestStore(str(tmp_path / "manifest.db"), import_json=json_store.path)
+    try:
+        assert reopened.get("legado")["description"] == "Projeto atualizado"
+        assert reopened.get("novo") is None
+    finally:
+        reopened.close()
@@ -0,0 +1,117 @@
+# tests/test_patching.py
+
+from src.core.patching import Hunk, apply_hunks, locate, parse_edits
+
+BLOCKS = """Vou alterar dois arquivos:
+
+**app.py**
+```python
+<<<<<<< SEARCH
+def soma(a, b):
+    return a - b
+=======
+def soma(a, b):
+    return a + b
+>>>>>>> REPLACE
+```
+Arquivo: utils/helpers.py
+<<<<<<< SEARCH
+=======
+X = 1
+>>>>>>> REPLACE
+app.py
+<<<<<<< SEARCH
+print(soma(1, 2))
+=======
+print(soma(2, 2))
+>>>>>>> REPLACE
+"""
+
+SOURCE = "def soma(a, b):\n    return a - b\n\nprint(soma(1, 2))\n"
+
+
+def hunks_of(edit):
+    return [(hunk.search, hunk.replace) for hunk in edit.hunks]
+
+
+def test_parse_search_replace_blocks_groups_by_file():
+    edits = parse_edits(BLOCKS)
+    assert [edit.path for edit in edits] == ["app.py", "utils/helpers.py"]
+    assert hunks_of(edits[0]) == [
+        (["def soma(a, b):", "    return a - b"], ["def soma(a, b):", "    return a + b"]),
+        (["print(soma(1, 2))"], ["print(soma(2, 2))"]),
+    ]
+    assert hunks_of(edits[1]) == [([], ["X = 1"])]
+
+
+def test_parse_unified_diff_and_default_path():
+    diff = "--- a/app.py\n+++ b/app.py\n@@ -1,3 +1,3 @@\n def soma(a, b):\n-    return a - b\n+    return a + b\n\n"
+    edits = parse_edits(diff)
+    assert [edit.path for edit in edits] == ["app.py"]
+    assert hunks_of(edits[0]) == [(["def soma(a, b):", "    return a - b"], ["def soma(a, b):", "    return a + b"])]
+
+    edits = parse_edits("<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE", default_path="x.py")
+    assert [edit.path for edit in edits] == ["x.py"] and hunks_of(edits[0]) == [(["a"], ["b"])]
+    assert parse_edits("<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE") == []
+
+
+def test_apply_hunks_in_sequence():
+    edits = parse_edits(BLOCKS)
+    content, failures = apply_hunks(SOURCE, edits[0].hunks)
+    assert content == "def soma(a, b):\n    return a + b\n\nprint(soma(2, 2))\n"
+    assert failures == []
+    assert apply_hunks("", edits[1].hunks) == ("X = 1\n", [])
+
+
+def test_apply_hunks_reindents_loose_matches():
+    content, failures = apply_hunks("class A:\n    def f(self):\n        return 1\n",
+                                    [Hunk(["def f(self):", "    return 1"], ["def f(self):", "    return 2"])])
+    assert content == "class A:\n    def f(self):\n        return 2\n" and failures == []
+
+
+def test_apply_hunks_fuzzy_match():
+    source = "import os\n\ndef calcular_total(itens, desconto=0):\n    return sum(itens) - desconto\n"
+    search = ["def calcular_total(itens, desconto):", "    return sum(itens) - desconto"]
+    assert locate(source.split("\n"), search) == (2, "fuzzy (0.98)")
+    content, failures = apply_hunks(source, [Hunk(search, ["def calcular_total(itens, desconto=0):",
+                                                           "    return max(0, sum(itens) - desconto)"])])
+    assert content.endswith("    return max(0, sum(itens) - desconto)\n") and failures == []
+
+
+def test_apply_hunks_reports_failures_and_keeps_the_rest():
+    missing = Hunk(["nao existe"], ["x"])
+    content, failures = apply_hunks(SOURCE, [missing, Hunk(["print(soma(1, 2))"], ["print(soma(3, 3))"])])
+    assert content == SOURCE.replace("soma(1, 2)", "soma(3, 3)")
+    assert failures == [(missing, "o trecho SEARCH não foi encontrado no arquivo atual")]
+
+
+def test_repeated_snippets_follow_the_previous_hunk():
+    assert apply_hunks("x = 1\nx = 1\n", [Hunk(["x = 1"], ["x = 2"]), Hunk(["x = 1"], ["x = 3"])]) == ("x = 2\nx = 3\n", [])
+    source = "def total_a(itens):\n    return sum(itens)\n\ndef total_b(itens):\n    return sum(itens)\n"
+    assert locate(source.split("\n"), ["def total_c(itens):", "    return sum(itens)"]) == \
+        (None, "o trecho SEARCH corresponde a mais de um lugar do arquivo")
+
+
+def test_prose_before_a_block_is_not_a_path():
+    response = "Aqui está a alteração:\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n"
+    edits = parse_edits(response, default_path="src/app.py")
+    assert [edit.path for edit in edits] == ["src/app.py"]
+
+    # Sem caminho no texto nem 'default_path', o bloco segue o último caminho citado
+    response = "app.py\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\nAgora o segundo trecho:\n" \
+               "<<<<<<< SEARCH\nc\n=======\nd\n>>>>>>> REPLACE\n"
+    assert [(edit.path, len(edit.hunks)) for edit in parse_edits(response)] == [("app.py", 2)]
+
+
+def test_known_paths_without_extension():
+    response = "Makefile\n<<<<<<< SEARCH\nall:\n=======\nall: build\n>>>>>>> REPLACE\n"
+    assert parse_edits(response) == []
+    assert [edit.path for edit in parse_edits(response, known_paths=["/proj/Makefile"])] == ["Makefile"]
+
+
+def test_removed_sql_comment_does_not_end_the_hunk():
+    diff = ("--- a/schema.sql\n+++ b/schema.sql\n@@ -1,3 +1,2 @@\n CREATE TABLE t (id INT);\n"
+            "--- tabela antiga\n-DROP TABLE velha;\n+DROP TABLE IF EXISTS velha;\n")
+    edits = parse_edits(diff)
+    assert hunks_of(edits[0]) == [(["CREATE TABLE t (id INT);", "-- tabela antiga", "DROP TABLE velha;"],
+                                   ["CREATE TABLE t (id INT);", "DROP TABLE IF EXISTS velha;"])]
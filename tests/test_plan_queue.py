@@ -0,0 +1,130 @@
+# tests/test_plan_queue.py
+
+import json
+
+from src.core.plan_queue import PRIORITY_MAINTENANCE, PlanQueue
+
+
+def make_plan(project_id="loja", tasks=3):
+    return {
+        "project_id": project_id,
+        "description": "Loja virtual",
+        "action_plan": [{"agent": "backend_dev", "task": f"Crie m{i}.py", "target_file": f"m{i}.py"} for i in range(1, tasks + 1)],
+    }
+
+
+def new_queue(tmp_path, **kwargs):
+    return PlanQueue(journal_path=str(tmp_path / "journal.jsonl"), inbox_dir=str(tmp_path / "inbox"), **kwargs)
+
+
+def test_interrupted_plan_resumes_after_the_completed_tasks(tmp_path):
+    queue = new_queue(tmp_path)
+    plan_id = queue.put(make_plan())
+    queued = queue.get_nowait()
+    queue.mark_task_done(plan_id, 1)
+    queue.mark_task_done(plan_id, 2)
+    assert queued.completed_tasks == {1, 2}
+
+    # Crash: uma nova fila reproduz o journal
+    recovered = new_queue(tmp_path).get_nowait()
+    assert recovered.plan_id == plan_id
+    assert recovered.plan == make_plan()
+    assert recovered.completed_tasks == {1, 2}
+    assert recovered.attempts == 2
+
+
+def test_finished_plans_are_not_recovered_and_failed_ones_are(tmp_path):
+    queue = new_queue(tmp_path)
+    done_id = queue.put(make_plan("a"))
+    failed_id = queue.put(make_plan("b"))
+    queue.get_nowait()
+    queue.finish(done_id, succeeded=True)
+    queue.get_nowait()
+    queue.finish(failed_id, succeeded=False)
+
+    recovered = new_queue(tmp_path)
+    assert len(recovered) == 1
+    assert recovered.get_nowait().plan_id == failed_id
+
+
+def test_discarded_and_exhausted_plans_are_dropped(tmp_path):
+    queue = new_queue(tmp_path, max_attempts=2)
+    failed_id = queue.put(make_plan("a"))
+    queue.get_nowait()
+    queue.finish(failed_id, succeeded=False)
+    queue.discard_failed()
+    assert len(new_queue(tmp_path, max_attempts=2)) == 0
+
+    queue = new_queue(tmp_path, max_attempts=2)
+    plan_id = queue.put(make_plan("b"))
+    for _ in range(2):
+        queue = new_queue(tmp_path, max_attempts=2)
+        assert queue.get_nowait().plan_id == plan_id
+    assert len(new_queue(tmp_path, max_attempts=2)) == 0
+
+
+def test_maintenance_plans_run_first(tmp_path):
+    queue = new_queue(tmp_path)
+    queue.put(make_plan("loja"))
+    maintenance_id = queue.put(make_plan("system_maintenance"))
+    assert queue.get_nowait().plan_id == maintenance_id
+    assert new_queue(tmp_path).get_nowait().priority == PRIORITY_MAINTENANCE
+
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    queue = new_queue(tmp_path)
+    plan_id = queue.put(make_plan())
+    queue.get_nowait()
+    queue.mark_task_done(plan_id, 1)
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "task_done", "plan_id": "' + plan_id + '", "ta')
+
+    recovered = new_queue(tmp_path).get_nowait()
+    assert recovered.completed_tasks == {1}
+
+
+def test_interrupted_stream_is_discarded_on_recovery(tmp_path):
+    plan = make_plan(tasks=4)
+    header = {key: value for key, value in plan.items() if key != "action_plan"}
+    queue = new_queue(tmp_path)
+    plan_id = queue.new_plan_id()
+    queue.begin_stream(plan_id, header)
+    for task in plan["action_plan"][:2]:
+        queue.add_streamed_task(plan_id, task)
+    queue.mark_task_done(plan_id, 1)
+
+    # Crash antes de o plano chegar por completo: o plano truncado não é executado
+    recovered = new_queue(tmp_path)
+    assert len(recovered) == 0 and recovered.get_nowait() is None
+    assert len(new_queue(tmp_path)) == 0
+
+
+def test_completed_stream_recovers_the_full_plan(tmp_path):
+    plan = make_plan(tasks=3)
+    header = {key: value for key, value in plan.items() if key != "action_plan"}
+    queue = new_queue(tmp_path)
+    plan_id = queue.new_plan_id()
+    queue.begin_stream(plan_id, header)
+    for task in plan["action_plan"]:
+        queue.add_streamed_task(plan_id, task)
+    queue.mark_task_done(plan_id, 2)
+    queued = queue.complete_stream(plan_id, plan)
+    assert queued.plan == plan and queued.completed_tasks == {2}
+
+    recovered = new_queue(tmp_path).get_nowait()
+    assert recovered.plan == plan
+    assert recovered.completed_tasks == {2}
+
+    # A recuperação compacta o journal num único 'enqueue' com o plano completo
+    records = [json.loads(line) for line in open(tmp_path / "journal.jsonl", encoding="utf-8")]
+    assert [record["op"] for record in records][:2] == ["enqueue", "start"]
+    assert records[0]["plan"] == plan
+
+
+def test_discarded_stream_is_not_recovered(tmp_path):
+    queue = new_queue(tmp_path)
+    plan_id = queue.new_plan_id()
+    queue.begin_stream(plan_id, {"project_id": "loja"})
+    queue.add_streamed_task(plan_id, make_plan()["action_plan"][0])
+    queue.discard(plan_id)
+    assert len(new_queue(tmp_path)) == 0
@@ -0,0 +1,35 @@
+# tests/test_project_map.py
+
+from src.core.project_map import ProjectMap
+
+
+def write(root, relative, content="x"):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def test_scan_skips_system_directories(tmp_path):
+    for relative in ("output/app/main.py", "output/app/artifacts/data.json", "manifest.json",
+                     "envs/abc/lib/python3.11/site-packages/flask/__init__.py", "wheelhouse/flask.whl",
+                     "artifacts/objects/ab/abcd", "traces/plan.json", "llm_cache/x.json",
+                     "output/app/.venv/bin/python", "output/app/__pycache__/main.cpython-311.pyc"):
+        write(tmp_path, relative)
+    project_map = ProjectMap(root=str(tmp_path))
+    project_map.scan()
+    assert sorted(project_map.snapshot()) == ["manifest.json", "output/app/artifacts/data.json", "output/app/main.py"]
+
+
+def test_update_ignores_events_from_system_directories(tmp_path):
+    project_map = ProjectMap(root=str(tmp_path))
+    project_map.scan()
+    env = write(tmp_path, "envs/abc/lib/site.py")
+    assert not project_map.update([str(env), str(env.parent.parent)])
+    main = write(tmp_path, "output/app/main.py", "print(1)")
+    assert project_map.update([str(main)])
+    main.write_text("print(2)!")
+    assert project_map.update([str(main.parent)])
+    main.unlink()
+    assert project_map.update([str(main)])
+    assert project_map.snapshot() == {}
@@ -0,0 +1,63 @@
+# tests/test_response_cache.py
+
+import os
+import time
+
+from src.core.llm_client import LLMRequest
+from src.core.response_cache import ResponseCache
+
+
+def make_request(prompt="Crie app.py", **kwargs):
+    return LLMRequest("modelo", "Você gera código.", prompt, **kwargs)
+
+
+def test_miss_then_hit(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    assert cache.get(make_request()) is None
+    cache.put(make_request(), "print('oi')")
+    assert cache.get(make_request()) == "print('oi')"
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+
+
+def test_key_covers_the_whole_request():
+    base = ResponseCache.make_key(make_request())
+    assert base == ResponseCache.make_key(make_request())
+    assert base != ResponseCache.make_key(make_request(prompt="Crie outro.py"))
+    assert base != ResponseCache.make_key(make_request(generation_config={"temperature": 0.2}))
+    assert base != ResponseCache.make_key(make_request(history=[{"role": "user", "text": "oi"}]))
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl_seconds=60)
+    cache.put(make_request(), "antigo")
+    cache.ttl_seconds = -1
+    assert cache.get(make_request()) is None
+    assert cache.evictions == 1 and cache.stats()["size_bytes"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_bytes=10 ** 6)
+    for name in ("a", "b"):
+        cache.put(make_request(name), "x" * 100)
+    # 'a' foi usado por último: 'b' é o primeiro a sair
+    old = time.time() - 100
+    os.utime(cache._entry_path(cache.make_key(make_request("b"))), (old, old))
+    cache.get(make_request("a"))
+
+    # Folga de alguns bytes: o tamanho de cada entrada varia com o created_at gravado
+    cache.max_bytes = cache.stats()["size_bytes"] + 20
+    cache.put(make_request("c"), "x" * 100)
+    assert cache.get(make_request("b")) is None
+    assert cache.get(make_request("a")) == cache.get(make_request("c")) == "x" * 100
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+
+def test_delete_and_disabled_cache(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.put(make_request(), "resposta")
+    cache.delete(make_request())
+    assert cache.get(make_request()) is None
+
+    disabled = ResponseCache(cache_dir=str(tmp_path / "off"), enabled=False)
+    disabled.put(make_request(), "resposta")
+    assert disabled.get(make_request()) is None and not os.path.exists(tmp_path / "off")
@@ -0,0 +1,128 @@
+# tests/test_task_scheduler.py
+
+import asyncio
+
+import pytest
+
+from src.core.task_scheduler import TaskScheduler, _references_file, build_task_graph, early_dependencies
+
+
+def code(target_file, agent="backend_dev", **extra):
+    return {"agent": agent, "task": f"Crie {target_file}", "target_file": target_file, **extra}
+
+
+def run(command, **extra):
+    return {"agent": "executor", "task": "Executar", "command": command, **extra}
+
+
+def deps(nodes):
+    return {node.index: node.depends_on for node in nodes}
+
+
+def test_independent_files_run_in_parallel():
+    nodes = build_task_graph([code("main.py"), code("utils.py"), code("index.html", agent="frontend_dev")])
+    assert deps(nodes) == {1: set(), 2: set(), 3: set()}
+
+
+def test_same_file_keeps_plan_order():
+    nodes = build_task_graph([code("main.py"), code("utils.py"), code("main.py")])
+    assert deps(nodes)[3] == {1}
+
+
+def test_executor_waits_for_every_earlier_coding_task():
+    # main.py importa utils.py, que o comando não cita
+    nodes = build_task_graph([
+        code("main.py"), code("utils.py"), run("python workspace/output/{project_id}/main.py"),
+        code("README.md"), run("pip list"),
+    ])
+    assert deps(nodes)[3] == {1, 2}
+    assert deps(nodes)[5] == {1, 2, 3, 4}
+
+
+def test_rewrite_waits_for_executor_that_reads_the_file():
+    nodes = build_task_graph([code("app.py"), run("python workspace/output/{project_id}/app.py"), code("app.py"), code("other.py")])
+    assert deps(nodes)[3] == {1, 2}
+    assert deps(nodes)[4] == set()
+
+
+def test_other_agents_are_barriers():
+    nodes = build_task_graph([code("a.py"), {"agent": "auditor", "task": "Auditar"}, code("b.py"), run("ls")])
+    assert deps(nodes)[2] == {1}
+    assert deps(nodes)[4] == {1, 2, 3}
+
+
+def test_explicit_dependencies():
+    nodes = build_task_graph([code("a.py", id="base"), code("b.py", depends_on=["base"]), code("c.py", depends_on=["b.py", 1])])
+    assert deps(nodes)[2] == {1}
+    assert deps(nodes)[3] == {1, 2}
+
+
+def test_invalid_and_cyclic_dependencies():
+    with pytest.raises(ValueError):
+        build_task_graph([code("a.py", depends_on=["missing"])])
+    with pytest.raises(ValueError):
+        build_task_graph([code("a.py", depends_on=[2]), code("b.py", depends_on=[1])])
+
+
+def test_references_file_compares_whole_path_tokens():
+    assert _references_file("python workspace/output/p/app.py", "app.py")
+    assert not _references_file("python workspace/output/p/webapp.py", "app.py")
+    assert _references_file("cat workspace/output/p/.env", ".env")
+    assert not _references_file("cat workspace/output/p/env", ".env")
+    assert _references_file("flask --app=src/app.py run", "./src/app.py")
+    assert _references_file(r"python .\src\app.py", "src/app.py")
+
+
+def test_early_dependencies_match_full_graph():
+    tasks = [code("main.py"), code("utils.py", depends_on=["main.py"]), run("python main.py"), code("main.py"), code("late.py", depends_on=[9])]
+    full = deps(build_task_graph(tasks[:4]))
+    assert early_dependencies(tasks[:1]) == full[1]
+    assert early_dependencies(tasks[:2]) == full[2]
+    assert early_dependencies(tasks[:3]) is None  # executor: só com o plano completo
+    assert early_dependencies(tasks[:4]) is None  # reescreve um arquivo lido por um executor
+    assert early_dependencies(tasks) is None  # depende de uma tarefa ainda não recebida
+
+
+def test_scheduler_runs_ready_tasks_in_parallel_up_to_the_limit():
+    nodes = build_task_graph([code("a.py"), code("b.py"), code("c.py"), run("python a.py")])
+    running, peak, order = set(), [0], []
+
+    async def runner(node):
+        running.add(node.index)
+        peak[0] = max(peak[0], len(running))
+        await asyncio.sleep(0.01)
+        running.discard(node.index)
+        order.append(node.index)
+        return True
+
+    assert asyncio.run(TaskScheduler(max_workers=2).run(nodes, runner))
+    assert peak[0] == 2
+    assert order[-1] == 4 and sorted(order) == [1, 2, 3, 4]
+
+
+def test_scheduler_skips_completed_tasks():
+    nodes = build_task_graph([code("a.py"), code("b.py"), run("python a.py")])
+    started = []
+
+    async def runner(node):
+        started.append(node.index)
+        return True
+
+    assert asyncio.run(TaskScheduler().run(nodes, runner, completed={1, 2}))
+    assert started == [3]
+
+
+def test_scheduler_stops_starting_tasks_after_a_failure():
+    nodes = build_task_graph([code("a.py"), code("b.py"), run("python a.py"), code("c.py", depends_on=[3])])
+    started = []
+
+    async def runner(node):
+        started.append(node.index)
+        await asyncio.sleep(0.01 * node.index)
+        if node.index == 1:
+            raise RuntimeError("falhou")
+        return True
+
+    assert not asyncio.run(TaskScheduler(max_workers=4).run(nodes, runner))
+    # A tarefa 2 já estava em andamento e termina; 3 e 4 nunca começam
+    assert started == [1, 2]
@@ -0,0 +1,73 @@
+# tests/test_tracing.py
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from src.core.tracing import Tracer
+
+
+def load(tmp_path, trace_id):
+    with open(tmp_path / f"{trace_id}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_spans_nest_through_tasks_and_threads(tmp_path):
+    tracer = Tracer(trace_dir=str(tmp_path))
+
+    def llm_call():
+        with tracer.span("llm.generate", "llm"):
+            pass
+
+    async def task(i):
+        with tracer.span(f"tarefa {i}", "task", lane=i, agent="backend"):
+            await asyncio.to_thread(llm_call)
+
+    async def main():
+        await asyncio.gather(task(1), task(2))
+
+    with tracer.trace("plan_1", "plano"):
+        asyncio.run(main())
+
+    events = {event["name"]: event for event in load(tmp_path, "plan_1")["traceEvents"]}
+    root = events["plano"]["args"]["span_id"]
+    assert events["tarefa 1"]["args"]["parent_id"] == root and events["tarefa 2"]["tid"] == 2
+    llm_parents = {event["args"]["parent_id"] for event in load(tmp_path, "plan_1")["traceEvents"] if event["name"] == "llm.generate"}
+    assert llm_parents == {events["tarefa 1"]["args"]["span_id"], events["tarefa 2"]["args"]["span_id"]}
+    assert events["tarefa 1"]["args"]["agent"] == "backend"
+
+
+def test_errors_are_recorded_and_spans_outside_a_plan_are_ignored(tmp_path):
+    tracer = Tracer(trace_dir=str(tmp_path))
+    with tracer.span("solto", "llm") as span:
+        span.set(tokens=3)
+    assert os.listdir(tmp_path) == []
+
+    with pytest.raises(ValueError):
+        with tracer.trace("plan/2", "plano"):
+            with tracer.span("tarefa", "task"):
+                raise ValueError("falhou")
+    events = load(tmp_path, "plan_2")["traceEvents"]
+    assert [event["args"].get("error") for event in events] == ["ValueError", "ValueError"]
+
+
+def test_old_traces_are_pruned_and_summarized(tmp_path):
+    tracer = Tracer(trace_dir=str(tmp_path), keep=2)
+    assert tracer.summarize() == "Nenhum trace registrado ainda."
+    for i, agent in enumerate(["backend", "frontend", "backend"]):
+        with tracer.trace(f"plan_{i}", "plano"):
+            with tracer.span(f"tarefa {i}", "task", agent=agent):
+                with tracer.span("subprocess", "subprocess"):
+                    time.sleep(0.01 * (i + 1))
+        stamp = time.time() - 10 + i
+        os.utime(tmp_path / f"plan_{i}.json", (stamp, stamp))
+
+    assert sorted(os.listdir(tmp_path)) == ["plan_1.json", "plan_2.json"]
+    assert [trace["otherData"]["trace_id"] for trace in tracer.recent_traces(5)] == ["plan_2", "plan_1"]
+    summary = tracer.summarize(top=1)
+    assert summary.startswith("Traces dos últimos 2 plano(s)")
+    assert "plan_2  tarefa 2 (backend)" in summary and "tarefa 1" not in summary.split("Tempo por agente")[0]
+    assert "subprocess" in summary.split("Tempo por tipo de operação:")[1]
@@ -0,0 +1,75 @@
+# tests/test_validation.py
+
+from src.core.validation import ERROR, WARNING, validate_file
+
+
+def write(root, relative, content):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def severities(result):
+    return [problem["severity"] for problem in result["problems"]]
+
+
+def test_valid_python(tmp_path):
+    write(tmp_path, "requirements.txt", "flask==3.0\n")
+    path = write(tmp_path, "app.py", "import os\nfrom flask import Flask\napp = Flask(__name__)\n")
+    result = validate_file(path, str(tmp_path))
+    assert result["ok"] and not result["problems"]
+    assert result["checks"] == ["sintaxe", "compilação", "imports"]
+
+
+def test_syntax_error(tmp_path):
+    result = validate_file(write(tmp_path, "app.py", "def f(:\n    pass\n"), str(tmp_path))
+    assert not result["ok"]
+    assert result["problems"][0]["check"] == "sintaxe"
+
+
+def test_undeclared_import_is_a_warning(tmp_path):
+    write(tmp_path, "requirements.txt", "flask\n")
+    result = validate_file(write(tmp_path, "app.py", "import requests\n"), str(tmp_path))
+    assert result["ok"]
+    assert severities(result) == [WARNING]
+    assert "requests" in result["problems"][0]["message"]
+
+
+def test_planned_sibling_module_counts_as_local(tmp_path):
+    # utils.py ainda está sendo gerado por outra tarefa do plano
+    write(tmp_path, "requirements.txt", "flask\n")
+    path = write(tmp_path, "main.py", "import utils\nfrom pkg.helpers import f\nfrom .models import User\n")
+    assert len(validate_file(path, str(tmp_path))["problems"]) == 2
+    result = validate_file(path, str(tmp_path), ("utils.py", "pkg/helpers.py", "./models.py"))
+    assert result["ok"] and not result["problems"]
+
+
+def test_missing_relative_import_is_an_error(tmp_path):
+    result = validate_file(write(tmp_path, "pkg/a.py", "from .missing import x\n"), str(tmp_path))
+    assert severities(result) == [ERROR]
+
+
+def test_empty_files(tmp_path):
+    assert validate_file(write(tmp_path, "pkg/__init__.py", ""), str(tmp_path))["ok"]
+    assert validate_file(write(tmp_path, "requirements.txt", ""), str(tmp_path))["ok"]
+    assert validate_file(write(tmp_path, "notes.txt", "\n"), str(tmp_path))["ok"]
+    for name in ("main.py", "index.html", "data.json"):
+        result = validate_file(write(tmp_path, name, "  \n"), str(tmp_path))
+        assert not result["ok"] and result["problems"][0]["check"] == "conteúdo"
+
+
+def test_requirements_syntax_and_coverage(tmp_path):
+    write(tmp_path, "app.py", "import yaml\nimport numpy\n")
+    result = validate_file(write(tmp_path, "requirements.txt", "pyyaml>=6\nnot a requirement!\n"), str(tmp_path))
+    assert severities(result) == [ERROR, WARNING]
+    assert "numpy" in result["problems"][1]["message"]
+
+
+def test_json_and_html(tmp_path):
+    assert not validate_file(write(tmp_path, "data.json", "{'a': 1}"), str(tmp_path))["ok"]
+    assert validate_file(write(tmp_path, "ok.json", '{"a": 1}'), str(tmp_path))["ok"]
+    html = validate_file(write(tmp_path, "index.html", "<html><body><div><p>oi</body></html>"), str(tmp_path))
+    assert not html["ok"] and severities(html) == [ERROR]
+    assert "<div>" in html["problems"][0]["message"]
+    assert validate_file(write(tmp_path, "ok.html", "<ul><li>a<li>b</ul><br>"), str(tmp_path))["problems"] == []